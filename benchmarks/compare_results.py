@@ -0,0 +1,70 @@
+"""Benchmark compare_results against the previous last-column comparator.
+
+Usage:
+    python benchmarks/compare_results.py [rows]
+"""
+
+import sys
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.evaluation.metrics import compare_results
+
+
+def legacy_compare_results(result1: pd.DataFrame, result2: pd.DataFrame) -> bool:
+    """compare_results as it was before vectorization (last column only)."""
+    try:
+        if result1 is None or result2 is None:
+            return False
+        if result1.empty and result2.empty:
+            return True
+        if result1.shape[0] != result2.shape[0]:
+            return False
+        v1 = sorted([str(x) for x in result1.iloc[:, -1].tolist()])
+        v2 = sorted([str(x) for x in result2.iloc[:, -1].tolist()])
+        if v1 == v2:
+            return True
+        try:
+            n1 = sorted([float(x) for x in result1.iloc[:, -1].tolist()])
+            n2 = sorted([float(x) for x in result2.iloc[:, -1].tolist()])
+            return all(abs(a - b) < 1 for a, b in zip(n1, n2))
+        except (ValueError, TypeError):
+            return False
+    except Exception:
+        return False
+
+
+def make_results(rows: int, noise: float = 1e-9) -> tuple:
+    """Gold-like result and a shuffled, renamed, float-perturbed copy."""
+    rng = np.random.default_rng(0)
+    gold = pd.DataFrame({
+        "customer_city": rng.choice([f"city_{i}" for i in range(5000)], rows),
+        "orders": rng.integers(1, 50, rows),
+        "revenue": rng.random(rows) * 1000,
+    })
+    generated = gold.sample(frac=1.0, random_state=1).reset_index(drop=True)
+    generated = generated[["revenue", "customer_city", "orders"]]
+    generated.columns = ["total", "city", "n"]
+    generated["total"] += noise
+    return gold, generated
+
+
+def timed(fn, *args) -> tuple:
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    for label, noise in [("exact values", 0.0), ("float noise 1e-9", 1e-9)]:
+        gold, generated = make_results(rows, noise)
+        print(f"{rows:,} rows x {gold.shape[1]} columns, shuffled, {label}")
+        for name, fn in [("legacy (last column)", legacy_compare_results),
+                         ("vectorized (all columns)", compare_results)]:
+            equal, seconds = timed(fn, generated, gold)
+            print(f"  {name:26s} equal={equal!s:5s} {seconds:8.3f}s")
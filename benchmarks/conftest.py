@@ -0,0 +1,23 @@
+import sys
+from pathlib import Path
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def pytest_addoption(parser):
+    parser.addoption("--orders", default="10000",
+                     help="comma-separated synthetic database sizes, e.g. 10000,1000000,10000000")
+
+
+def pytest_generate_tests(metafunc):
+    if "orders" in metafunc.fixturenames:
+        scales = [int(s) for s in metafunc.config.getoption("orders").split(",")]
+        metafunc.parametrize("orders", scales, scope="session")
+
+
+@pytest.fixture(scope="session")
+def synthetic(orders):
+    """Path of the Olist-shaped database for this scale (built once, cached under data/bench)."""
+    from src.evaluation.synthetic import synthetic_db
+    return synthetic_db(orders)
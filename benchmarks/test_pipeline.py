@@ -0,0 +1,49 @@
+"""pytest-benchmark suite for the text-to-SQL pipeline.
+
+Usage:
+    pytest benchmarks/ --orders 10000,1000000 --benchmark-json=data/results/bench/pytest.json
+    pytest benchmarks/ --benchmark-autosave --benchmark-compare   # against the last saved run
+"""
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from src.evaluation.benchmark import bench_api, configured, gold_queries
+
+QUERIES = gold_queries()
+
+
+@pytest.mark.parametrize("index", range(len(QUERIES)), ids=[f"q{i:02d}" for i in range(len(QUERIES))])
+def test_execute_sql(benchmark, synthetic, index):
+    """execute_sql on one gold query, result cache off."""
+    from src.sql.executor import execute_sql
+    with configured(db_path=synthetic, result_cache_enabled=False):
+        success, _, error = benchmark(execute_sql, QUERIES[index][1])
+    assert success, error
+
+
+def test_get_schema(benchmark, synthetic):
+    """get_schema on a direct connection."""
+    import sqlite3
+    from src.sql.executor import get_schema
+    conn = sqlite3.connect(synthetic)
+    assert "orders" in benchmark(get_schema, conn)
+    conn.close()
+
+
+def test_compare_results(benchmark, synthetic):
+    """compare_results of every gold result against a shuffled copy."""
+    from src.evaluation.metrics import compare_results
+    from src.sql.executor import execute_sql
+    with configured(db_path=synthetic, result_cache_enabled=False):
+        frames = [execute_sql(sql)[1] for _, sql in QUERIES]
+    pairs = [(f, f.sample(frac=1, random_state=0)) for f in frames if f is not None]
+    assert all(benchmark(lambda: [compare_results(a, b) for a, b in pairs]))
+
+
+def test_api_throughput(benchmark, synthetic):
+    """100 concurrent /query requests through the stub LLM."""
+    result = benchmark.pedantic(bench_api, args=(synthetic, QUERIES, 100, 16), rounds=3)
+    benchmark.extra_info.update(result)
+    assert result["errors"] == 0
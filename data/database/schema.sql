@@ -1,11 +1,11 @@
 CREATE TABLE customers (
-  customer_id TEXT,
+  customer_id TEXT PRIMARY KEY,
   customer_city TEXT,
   customer_state TEXT
 );
 
 CREATE TABLE products (
-  product_id TEXT,
+  product_id TEXT PRIMARY KEY,
   product_category TEXT,
   product_weight_g REAL,
   product_length_cm REAL,
@@ -14,33 +14,36 @@ CREATE TABLE products (
 );
 
 CREATE TABLE orders (
-  order_id TEXT,
-  customer_id TEXT,
+  order_id TEXT PRIMARY KEY,
+  customer_id TEXT REFERENCES customers (customer_id),
   order_status TEXT,
   order_purchase_timestamp TEXT,
   order_delivered_timestamp TEXT
 );
 
 CREATE TABLE order_items (
-  order_id TEXT,
+  order_id TEXT REFERENCES orders (order_id),
   order_item_id INTEGER,
-  product_id TEXT,
+  product_id TEXT REFERENCES products (product_id),
   price REAL,
-  freight_value REAL
+  freight_value REAL,
+  PRIMARY KEY (order_id, order_item_id)
 );
 
 CREATE TABLE payments (
-  order_id TEXT,
+  order_id TEXT REFERENCES orders (order_id),
   payment_sequential INTEGER,
   payment_type TEXT,
   payment_installments INTEGER,
-  payment_value REAL
+  payment_value REAL,
+  PRIMARY KEY (order_id, payment_sequential)
 );
 
 CREATE TABLE reviews (
   review_id TEXT,
-  order_id TEXT,
+  order_id TEXT REFERENCES orders (order_id),
   review_score INTEGER,
   review_comment_title TEXT,
-  review_comment_message TEXT
-);
\ No newline at end of file
+  review_comment_message TEXT,
+  PRIMARY KEY (review_id, order_id)
+);
@@ -5,7 +5,17 @@ Text-to-SQL E-commerce Platform
 Usage:
     python run.py demo    # Interactive demo
     python run.py api     # Launch API server
+    python run.py api [--workers N] [--reload]  # N preloaded workers, or dev auto-reload
     python run.py eval    # Run evaluation
+    python run.py eval [--workers N] [--resume]  # Parallel, resumable
+    python run.py api --backend stub  # Replay recorded responses (no GPU needed)
+    python run.py bench [--scales 10000,1000000] [--compare old.json]  # Performance
+    python run.py indexes [--apply]  # Recommend (and build) indexes
+    python run.py summaries [--force]  # Refresh materialized summary tables
+    python run.py ingest [--download] [--append] [--parquet]  # Load the Olist CSVs from data/raw
+    python run.py api --engine auto  # DuckDB for large analytical scans
+    python run.py batch --input questions.jsonl [--output results.jsonl]  # Pipelined batch answers
+    python run.py startup [--output report.json]  # Import-time profile vs. the cold-start budget
 """
 
 import argparse
@@ -13,15 +23,21 @@ import argparse
 
 def demo():
     """Interactive demo."""
-    from src.sql.generator import generate_sql
-    from src.sql.executor import execute_sql, get_connection
+    from src.config.settings import CONFIG
+    from src.sql.generator import generate_sql, warm_up
+    from src.sql.executor import execute_sql
     
     print("=" * 60)
     print("TEXT-TO-SQL DEMO")
     print("=" * 60)
     print("Type 'quit' to exit\n")
     
-    conn = get_connection()
+    if CONFIG.llm_backend == "ollama":
+        try:
+            timings = warm_up()
+            print(f"Model warm ({timings['wall_ms']:.0f} ms, prefix {timings['prompt_tokens']} tokens)\n")
+        except Exception as e:
+            print(f"Warm-up skipped: {e}\n")
     
     while True:
         question = input("\nQuestion: ").strip()
@@ -31,34 +47,36 @@ def demo():
         sql = generate_sql(question)
         print(f"\nSQL: {sql}")
         
-        success, result, error = execute_sql(sql, conn)
+        success, result, error = execute_sql(sql)
         if success:
             print(f"\nResult:\n{result}")
         else:
             print(f"\nError: {error}")
     
-    conn.close()
     print("\nBye!")
 
 
-def api():
-    """Launch API server."""
-    import uvicorn
+def api(workers=None, reload=False):
+    """Launch API server: preloaded worker processes, or one auto-reloading process."""
+    from src.config.settings import CONFIG
     print("=" * 60)
     print("TEXT-TO-SQL API")
     print("=" * 60)
-    print("URL: http://localhost:8000")
-    print("Docs: http://localhost:8000/docs")
+    print(f"URL: http://localhost:{CONFIG.serve_port}")
+    print(f"Docs: http://localhost:{CONFIG.serve_port}/docs")
     print("=" * 60)
-    uvicorn.run("src.api.app:app", host="0.0.0.0", port=8000, reload=True)
+    if reload:
+        import uvicorn
+        uvicorn.run("src.api.app:app", host=CONFIG.serve_host, port=CONFIG.serve_port, reload=True)
+    else:
+        from src.api.serve import serve
+        serve(workers=workers)
 
 
-def evaluate():
+def evaluate(workers=None, resume=False, output="data/results/eval_run.jsonl"):
     """Run evaluation."""
     import json
-    from src.sql.generator import generate_sql
-    from src.sql.executor import execute_sql, get_connection
-    from src.evaluation.metrics import execution_accuracy
+    from src.evaluation.runner import run_evaluation
     
     print("=" * 60)
     print("EVALUATION")
@@ -67,27 +85,18 @@ def evaluate():
     with open("data/results/test_questions.json", "r") as f:
         questions = json.load(f)
     
-    conn = get_connection()
-    correct = 0
-    total = len(questions)
-    
-    by_difficulty = {"simple": [0, 0], "medium": [0, 0], "complex": [0, 0]}
+    def report(record):
+        status = "[OK]" if record["execution_accuracy"] else "[FAIL]"
+        print(f"[{record['index']+1:2d}] {status} [{record['difficulty']:7s}] {record['question'][:40]}...")
     
-    for i, q in enumerate(questions):
-        sql = generate_sql(q["question"])
-        gen_ok, gen_res, _ = execute_sql(sql, conn)
-        exp_ok, exp_res, _ = execute_sql(q["sql"], conn)
-        
-        ex = execution_accuracy(gen_res, exp_res) if gen_ok and exp_ok else False
-        if ex:
-            correct += 1
-            by_difficulty[q["difficulty"]][0] += 1
-        by_difficulty[q["difficulty"]][1] += 1
-        
-        status = "[OK]" if ex else "[FAIL]"
-        print(f"[{i+1:2d}] {status} [{q['difficulty']:7s}] {q['question'][:40]}...")
+    records = run_evaluation(questions, output, llm_workers=workers, resume=resume, on_record=report)
     
-    conn.close()
+    total = len(records)
+    correct = sum(r["execution_accuracy"] for r in records)
+    by_difficulty = {"simple": [0, 0], "medium": [0, 0], "complex": [0, 0]}
+    for r in records:
+        by_difficulty[r["difficulty"]][0] += r["execution_accuracy"]
+        by_difficulty[r["difficulty"]][1] += 1
     
     print("\n" + "=" * 60)
     print("RESULTS")
@@ -96,16 +105,238 @@ def evaluate():
     print("\nBy difficulty:")
     for diff, (ok, tot) in by_difficulty.items():
         print(f"  {diff:8s}: {ok}/{tot} ({ok/tot:.0%})")
+    print(f"\nPer-question records: {output}")
+
+
+def bench(scales=None, requests=200, output=None, compare=None):
+    """Time the pipeline on synthetic databases and save a JSON report."""
+    import json
+    from pathlib import Path
+    from src.evaluation.benchmark import DEFAULT_SCALES, REGRESSION_THRESHOLD, compare_reports, run_benchmarks
+    
+    print("=" * 60)
+    print("BENCHMARK")
+    print("=" * 60)
+    
+    report = run_benchmarks(scales or DEFAULT_SCALES, requests=requests)
+    output = Path(output or f"data/results/bench/{report['commit']}_{report['timestamp'].replace(':', '')}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nReport: {output}")
+    
+    if compare:
+        rows = compare_reports(json.loads(Path(compare).read_text()), report)
+        print(f"\nAgainst {compare}:")
+        for key, old, new, change, regressed in rows:
+            flag = "  <-- REGRESSION" if regressed else ""
+            print(f"  {key:40s} {old:9.2f} -> {new:9.2f} ms ({change:+.0%}){flag}")
+        print(f"{sum(r[4] for r in rows)} regressions (>{REGRESSION_THRESHOLD:.0%} slower) out of {len(rows)} timings")
+
+
+def indexes(apply=False):
+    """Recommend indexes from the query log and test set, optionally build them."""
+    import json
+    from src.sql.executor import get_connection
+    from src.sql.indexes import apply_indexes, recommend_indexes, time_queries
+    from src.sql.query_log import read_query_log
+    
+    print("=" * 60)
+    print("INDEX ADVISOR")
+    print("=" * 60)
+    
+    with open("data/results/test_questions.json", "r") as f:
+        questions = json.load(f)
+    gold = [q["sql"] for q in questions]
+    logged = [entry["sql"] for entry in read_query_log()]
+    
+    conn = get_connection()
+    recommendations = recommend_indexes(logged + gold, conn)
+    print(f"Mined {len(logged)} logged + {len(gold)} test queries\n")
+    for rec in recommendations:
+        print(f"  [{rec['queries']:3d} queries] {rec['sql']}")
+    if not recommendations:
+        print("  No new indexes recommended.")
+    
+    if apply and recommendations:
+        before = time_queries(gold, conn)
+        apply_indexes(recommendations, conn)
+        after = time_queries(gold, conn)
+        
+        print("\n" + "=" * 60)
+        print("LATENCY (median ms, test set gold SQL)")
+        print("=" * 60)
+        for q, b, a in zip(questions, before, after):
+            print(f"  {b:8.2f} -> {a:8.2f}  {q['question'][:40]}...")
+        print(f"  {sum(before):8.2f} -> {sum(after):8.2f}  TOTAL")
+        
+        report = {
+            "indexes": recommendations,
+            "latency_ms": [
+                {"question": q["question"], "before": b, "after": a}
+                for q, b, a in zip(questions, before, after)
+            ]
+        }
+        with open("data/results/index_report.json", "w") as f:
+            json.dump(report, f, indent=2)
+    elif recommendations:
+        print("\nRun with --apply to build them.")
+    
+    conn.close()
+
+
+def ingest(raw_dir=None, append=False, download=False, parquet=False):
+    """Load the Olist CSVs into the database (full rebuild or append)."""
+    import time
+    from src.config.settings import CONFIG
+    from src.sql.ingest import download_raw, ingest as load
+    
+    raw_dir = raw_dir or CONFIG.raw_data_dir
+    if download:
+        for path in download_raw(raw_dir):
+            print(f"  Downloaded {path.name}")
+    
+    print("=" * 60)
+    print(f"INGEST ({'append' if append else 'full rebuild'}) {raw_dir} -> {CONFIG.db_path}")
+    print("=" * 60)
+    start = time.perf_counter()
+    stats = load(raw_dir, append=append)
+    for table, s in stats.items():
+        rate = s["rows"] / s["seconds"] if s["seconds"] else 0
+        print(f"  {table:12s} {s['rows']:>10,} rows {s['seconds']:7.1f}s ({rate:,.0f} rows/s)"
+              f"  nulled={s['nulled']} dropped={s['dropped']}")
+    print(f"Done in {time.perf_counter() - start:.1f}s (indexes, ANALYZE and summaries included)")
+    
+    if parquet:
+        from src.sql.engines import export_parquet
+        start = time.perf_counter()
+        print(f"Parquet export for the DuckDB engine: {export_parquet()} ({time.perf_counter() - start:.1f}s)")
+
+
+def batch(input_path, output=None, engine=None):
+    """Answer a JSONL file of questions through the pipelined batch engine."""
+    import asyncio
+    import json
+    import time
+    from pathlib import Path
+    from src.api.serialization import dumps
+    from src.sql.batch import run_batch
+    
+    questions = []
+    for line in Path(input_path).read_text().splitlines():
+        if line.strip():
+            item = json.loads(line)
+            questions.append(item["question"] if isinstance(item, dict) else item)
+    output = Path(output or f"data/results/batch_{Path(input_path).stem}.jsonl")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    
+    print("=" * 60)
+    print(f"BATCH {len(questions)} questions -> {output}")
+    print("=" * 60)
+    
+    async def consume():
+        ok = 0
+        start = time.perf_counter()
+        with open(output, "wb") as out:
+            async for record in run_batch(questions, engine):
+                out.write(dumps(record) + b"\n")
+                ok += record["success"]
+                status = "[OK]" if record["success"] else "[FAIL]"
+                print(f"[{record['index']+1:3d}] {status} {record['question'][:50]}")
+        from src.sql.generator import close_async_client
+        await close_async_client()
+        return ok, time.perf_counter() - start
+    
+    ok, seconds = asyncio.run(consume())
+    print(f"\n{ok}/{len(questions)} succeeded in {seconds:.1f}s ({len(questions) / seconds:.1f} questions/s)")
+
+
+def startup(output=None):
+    """Profile a cold start (imports and indexes) against Config.cold_start_budget_ms."""
+    import json
+    import sys
+    from pathlib import Path
+    from src.api.startup import profile_startup
+    
+    print("=" * 60)
+    print("COLD START PROFILE")
+    print("=" * 60)
+    
+    report = profile_startup()
+    for stage, ms in report["stages_ms"].items():
+        print(f"  {stage:10s} {ms:8.0f} ms")
+    print(f"\nSlowest packages to import (self time, {report['modules']} modules):")
+    for package, ms in report["packages"]:
+        print(f"  {package:24s} {ms:8.1f} ms")
+    verdict = "within" if report["within_budget"] else "OVER"
+    print(f"\nCold start {report['wall_ms']:.0f} ms, {verdict} the {report['budget_ms']:.0f} ms budget")
+    if output:
+        Path(output).parent.mkdir(parents=True, exist_ok=True)
+        Path(output).write_text(json.dumps(report, indent=2))
+        print(f"Report: {output}")
+    if not report["within_budget"]:
+        sys.exit(1)
+
+
+def summaries(force=False):
+    """Refresh materialized summary tables whose sources changed."""
+    from src.sql.executor import get_connection
+    from src.sql.summaries import get_summary_registry
+    
+    conn = get_connection()
+    refreshed = get_summary_registry().refresh(conn, force=force)
+    conn.close()
+    print(f"Refreshed: {', '.join(refreshed) if refreshed else 'nothing (all fresh)'}")
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Text-to-SQL Platform")
-    parser.add_argument("command", choices=["demo", "api", "eval"])
+    parser.add_argument("command", choices=["demo", "api", "eval", "bench", "indexes", "summaries", "ingest", "startup", "batch"])
+    parser.add_argument("--apply", action="store_true", help="indexes: build the recommended indexes")
+    parser.add_argument("--force", action="store_true", help="summaries: rebuild even if fresh")
+    parser.add_argument("--workers", type=int, help="eval: concurrent LLM requests; api: worker processes")
+    parser.add_argument("--reload", action="store_true", help="api: single process, reload on code changes")
+    parser.add_argument("--resume", action="store_true", help="eval: skip questions already in --output")
+    parser.add_argument("--output", help="eval, batch: JSONL output; bench, startup: JSON report")
+    parser.add_argument("--input", help="batch: JSONL of questions ({\"question\": ...} or strings)")
+    parser.add_argument("--scales", help="bench: comma-separated order counts (default 10000)")
+    parser.add_argument("--requests", type=int, default=200, help="bench: API requests per scale")
+    parser.add_argument("--compare", help="bench: earlier report to compare against")
+    parser.add_argument("--raw-dir", help="ingest: directory of Olist CSVs (default data/raw)")
+    parser.add_argument("--append", action="store_true", help="ingest: upsert into the existing database")
+    parser.add_argument("--download", action="store_true", help="ingest: fetch missing CSVs first")
+    parser.add_argument("--parquet", action="store_true", help="ingest: also export Parquet for the DuckDB engine")
+    parser.add_argument("--engine", choices=["sqlite", "duckdb", "auto"], help="SQL engine (default: sqlite)")
+    parser.add_argument("--backend", choices=["ollama", "openai", "stub"], help="LLM backend (default: ollama)")
     args = parser.parse_args()
     
+    if args.backend:
+        # Environment too, so the API's reloader subprocess picks it up
+        import os
+        from src.config.settings import CONFIG
+        os.environ["LLM_BACKEND"] = CONFIG.llm_backend = args.backend
+    if args.engine:
+        import os
+        from src.config.settings import CONFIG
+        os.environ["SQL_ENGINE"] = CONFIG.sql_engine = args.engine
+    
     if args.command == "demo":
         demo()
     elif args.command == "api":
-        api()
+        api(workers=args.workers, reload=args.reload)
     elif args.command == "eval":
-        evaluate()
+        evaluate(workers=args.workers, resume=args.resume, output=args.output or "data/results/eval_run.jsonl")
+    elif args.command == "bench":
+        scales = [int(s) for s in args.scales.split(",")] if args.scales else None
+        bench(scales=scales, requests=args.requests, output=args.output, compare=args.compare)
+    elif args.command == "indexes":
+        indexes(apply=args.apply)
+    elif args.command == "summaries":
+        summaries(force=args.force)
+    elif args.command == "ingest":
+        ingest(raw_dir=args.raw_dir, append=args.append, download=args.download, parquet=args.parquet)
+    elif args.command == "batch":
+        if not args.input:
+            parser.error("batch needs --input")
+        batch(args.input, output=args.output, engine=args.engine)
+    elif args.command == "startup":
+        startup(output=args.output)
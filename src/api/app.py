@@ -1,16 +1,82 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
+from pydantic import BaseModel, Field
 from typing import Optional, List, Any
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from src.api.startup import get_startup
+    # Warm up in the background: the server accepts at once, /ready reports progress
+    warmup = asyncio.create_task(get_startup(reset=True).run())
+    yield
+    warmup.cancel()
+    from src.sql.generator import close_async_client
+    await close_async_client()
+
+
+class TimingMiddleware:
+    """Time /query requests end to end; with an X-Debug-Timing header, return
+    the per-stage breakdown as a Server-Timing header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith("/query"):
+            return await self.app(scope, receive, send)
+        import time
+        from src.config.settings import CONFIG
+        from src.sql.telemetry import observe, request_trace, server_timing
+        
+        debug = CONFIG.timing_header_enabled and any(
+            name == b"x-debug-timing" and value not in (b"", b"0") for name, value in scope["headers"]
+        )
+        start = time.perf_counter()
+        with request_trace() as trace:
+            async def send_with_timing(message):
+                if debug and message["type"] == "http.response.start":
+                    trace["total"] = (time.perf_counter() - start) * 1000
+                    headers = list(message.get("headers", [])) + [(b"server-timing", server_timing(trace).encode())]
+                    message = {**message, "headers": headers}
+                await send(message)
+            
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                observe("stage_seconds", time.perf_counter() - start, "total")
+
+
 app = FastAPI(
     title="Text-to-SQL API",
     description="Convert natural language to SQL queries",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
+app.add_middleware(TimingMiddleware)
 
 
 class QuestionRequest(BaseModel):
     question: str
+    limit: Optional[int] = Field(None, ge=1)
+    cursor: Optional[str] = None
+    format: Optional[str] = None  # records | columnar | arrow (default: from Accept)
+    engine: Optional[str] = None  # sqlite | duckdb | auto (default: Config.sql_engine)
+
+
+class BatchRequest(BaseModel):
+    questions: List[str]
+    engine: Optional[str] = None
+    limit: Optional[int] = Field(None, ge=0)  # rows kept per result; row_count has the full count
+
+
+class ExportRequest(BaseModel):
+    question: str
+    format: str = "ndjson"
 
 
 class SQLResponse(BaseModel):
@@ -19,6 +85,34 @@ class SQLResponse(BaseModel):
     success: bool
     result: Optional[List[Any]] = None
     error: Optional[str] = None
+    cached: Optional[str] = None
+    next_cursor: Optional[str] = None
+
+
+class ColumnarSQLResponse(BaseModel):
+    """SQLResponse with the result as column names and one array per column."""
+    question: str
+    sql: str
+    success: bool
+    error: Optional[str] = None
+    cached: Optional[str] = None
+    next_cursor: Optional[str] = None
+    columns: List[str]
+    data: List[List[Any]]
+    row_count: int
+
+
+# Other media types /query returns (serialization.FORMATS), for the OpenAPI schema
+QUERY_RESPONSES = {
+    200: {
+        "description": "Records (default), columns and arrays, or an Arrow IPC stream, by `format` or Accept. "
+                       "Failed queries are always records with a null result.",
+        "content": {
+            "application/vnd.texttosql.columnar+json": {"schema": ColumnarSQLResponse.model_json_schema()},
+            "application/vnd.apache.arrow.stream": {"schema": {"type": "string", "format": "binary"}},
+        },
+    },
+}
 
 
 @app.get("/")
@@ -28,24 +122,300 @@ def root():
 
 @app.get("/health")
 def health():
+    """Liveness: the process answers. Use /ready before sending traffic."""
     return {"status": "healthy"}
 
 
-@app.post("/query", response_model=SQLResponse)
-def query(request: QuestionRequest):
-    from src.sql.generator import generate_sql
-    from src.sql.executor import execute_sql
+@app.get("/ready")
+def ready():
+    """Readiness: 200 once startup has finished, else 503; state and ms per stage."""
+    from fastapi.responses import JSONResponse
+    from src.api.startup import get_startup
+    
+    startup = get_startup()
+    return JSONResponse(startup.report(), status_code=200 if startup.ready else 503)
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    from src.config.settings import CONFIG
+    from src.sql.cache import get_query_cache
+    
+    if not CONFIG.cache_enabled:
+        return {"enabled": False}
+    return {"enabled": True, **get_query_cache().stats()}
+
+
+@app.get("/cache/results/stats")
+def result_cache_stats():
+    from src.sql.result_cache import get_result_cache
+    from src.sql.shared_cache import get_shared_cache
+    
+    shared = get_shared_cache()
+    return {**get_result_cache().stats(), "shared": shared.stats() if shared else None}
+
+
+@app.get("/pool/stats")
+def pool_stats():
+    from src.sql.pool import get_pool
+    
+    return get_pool().stats()
+
+
+@app.get("/llm/stats")
+def llm_stats():
+    from src.sql.correction import correction_stats
+    from src.sql.generator import llm_timings
+    
+    return {**llm_timings(), "self_correction": correction_stats()}
+
+
+@app.get("/scheduler/stats")
+async def scheduler_stats():
+    from src.sql.scheduler import get_scheduler
+    
+    return get_scheduler().stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text format: per-stage latency, tokens/s, rows, cache hit ratios."""
+    from src.sql.telemetry import render_metrics
+    
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@app.delete("/cache")
+def cache_clear():
+    from src.sql.cache import get_query_cache
+    from src.sql.result_cache import get_result_cache
+    
+    get_query_cache().clear()
+    get_result_cache().clear()
+    return {"status": "cleared"}
+
+
+async def run_until_disconnect(http_request: Request, coro, poll_interval: float = 0.5):
+    """Await coro, cancelling it if the client goes away first."""
+    task = asyncio.ensure_future(coro)
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=poll_interval)
+        if done:
+            return task.result()
+        if await http_request.is_disconnected():
+            task.cancel()
+            raise HTTPException(status_code=499, detail="Client disconnected")
+
+
+async def resolve_sql(question: str, http_request: Request) -> tuple:
+    """Return (sql, cache_tier) for a question; cached questions skip the LLM."""
+    from src.config.settings import CONFIG
+    from src.sql.cache import get_query_cache
+    from src.sql.generator import agenerate_sql
+    from src.sql.telemetry import span
     
-    # Generate SQL
-    sql = generate_sql(request.question)
+    cache = get_query_cache() if CONFIG.cache_enabled else None
+    with span("cache_lookup"):
+        hit = await asyncio.to_thread(cache.get, question) if cache else None
+    if hit:
+        return hit
+    if not CONFIG.scheduler_enabled:
+        with span("generate"):
+            return await run_until_disconnect(http_request, agenerate_sql(question)), None
+    from src.sql.scheduler import Overloaded, get_scheduler
+    try:
+        with span("generate"):
+            sql = await run_until_disconnect(http_request, get_scheduler().submit(question))
+    except Overloaded as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers={"Retry-After": "1"})
+    return sql, None
+
+
+async def remember_sql(question: str, sql: str, cached: bool = False):
+    """Log SQL that executed successfully, caching it if it was generated."""
+    from src.config.settings import CONFIG
+    from src.sql.cache import get_query_cache
+    from src.sql.query_log import log_query
+    
+    await asyncio.to_thread(log_query, question, sql)
+    if CONFIG.cache_enabled and not cached:
+        await asyncio.to_thread(get_query_cache().put, question, sql)
+
+
+@app.post("/query", response_model=SQLResponse, responses=QUERY_RESPONSES)
+async def query(request: QuestionRequest, http_request: Request):
+    """Results as JSON records (default), columns plus arrays, or Arrow IPC,
+    chosen by `format` or the Accept header; serialized straight to bytes."""
+    from fastapi.responses import Response
+    from src.api import serialization
+    from src.sql.engines import ENGINES
+    from src.sql.executor import aexecute_sql, decode_cursor, execute_page
+    from src.sql.telemetry import span
+    
+    try:
+        fmt = serialization.negotiate(http_request.headers.get("accept"), request.format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if request.engine and request.engine not in ENGINES:
+        raise HTTPException(status_code=400, detail=f"engine must be one of {', '.join(ENGINES)}")
+    if fmt is None or (fmt == "arrow" and not serialization.arrow_available()):
+        raise HTTPException(status_code=406, detail=f"Acceptable formats: {', '.join(serialization.FORMATS.values())}")
+    
+    # Continuation pages reuse the SQL and, unless limit is given, the page size from the token
+    offset, limit = 0, request.limit
+    if request.cursor:
+        try:
+            sql, offset, page_size = decode_cursor(request.cursor)
+            limit = limit or page_size
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        tier = None
+    else:
+        sql, tier = await resolve_sql(request.question, http_request)
     
     # Execute
-    success, result, error = execute_sql(sql)
-    
-    return SQLResponse(
-        question=request.question,
-        sql=sql,
-        success=success,
-        result=result.to_dict(orient="records") if success and result is not None else None,
-        error=error
+    next_cursor = None
+    if limit:
+        success, result, error, next_cursor = await asyncio.to_thread(
+            execute_page, sql, limit, offset, None, request.engine
+        )
+    else:
+        success, result, error = await aexecute_sql(sql, request.engine)
+    if success and not request.cursor:
+        await remember_sql(request.question, sql, cached=tier is not None)
+    
+    envelope = {
+        "question": request.question,
+        "sql": sql,
+        "success": success,
+        "error": error,
+        "cached": tier,
+        "next_cursor": next_cursor,
+    }
+    result = result if success else None
+    with span("serialize"):
+        if result is None:
+            body = serialization.json_body(envelope)
+        elif fmt == "arrow":
+            body = await asyncio.to_thread(serialization.arrow_body, envelope, result)
+        else:
+            body = await asyncio.to_thread(serialization.json_body, envelope, result, fmt)
+    media_type = serialization.FORMATS[fmt] if result is not None else serialization.RECORDS
+    return Response(body, media_type=media_type)
+
+
+def _export_lines(sql: str, fmt: str):
+    import csv
+    import io
+    from src.api.serialization import dumps
+    from src.config.settings import CONFIG
+    from src.sql.executor import iter_sql
+    
+    batches = iter_sql(sql, max_rows=CONFIG.export_max_rows, max_bytes=CONFIG.export_max_bytes,
+                       timeout=CONFIG.export_timeout_seconds)
+    try:
+        for i, (columns, rows) in enumerate(batches):
+            if fmt == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                if i == 0:
+                    writer.writerow(columns)
+                writer.writerows(rows)
+                yield buffer.getvalue()
+            else:
+                yield b"".join(dumps(dict(zip(columns, row))) + b"\n" for row in rows)
+    except Exception as e:
+        if fmt == "csv":
+            # CSV has no error row: abort the response so the client can't take it as complete
+            raise
+        yield dumps({"error": str(e)}) + b"\n"
+
+
+@app.post("/query/export")
+async def query_export(request: ExportRequest, http_request: Request):
+    """Stream the full result as NDJSON or CSV with flat memory use."""
+    from urllib.parse import quote
+    
+    if request.format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'csv'")
+    sql, _ = await resolve_sql(request.question, http_request)
+    media_type = "text/csv" if request.format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _export_lines(sql, request.format),
+        media_type=media_type,
+        headers={"X-Generated-SQL": quote(sql)}
     )
+
+
+@app.post("/query/batch")
+async def query_batch(request: BatchRequest):
+    """Run many questions through the pipelined engine; JSONL in completion order."""
+    from src.api.serialization import dumps
+    from src.config.settings import CONFIG
+    from src.sql.batch import run_batch
+    from src.sql.engines import ENGINES
+    
+    if len(request.questions) > CONFIG.batch_max_questions:
+        raise HTTPException(status_code=400, detail=f"At most {CONFIG.batch_max_questions} questions per batch")
+    if request.engine and request.engine not in ENGINES:
+        raise HTTPException(status_code=400, detail=f"engine must be one of {', '.join(ENGINES)}")
+    
+    async def lines():
+        async for record in run_batch(request.questions, request.engine, request.limit):
+            yield dumps(record) + b"\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def _sse(event: str, data: dict) -> str:
+    from src.api.serialization import dumps
+    return f"event: {event}\ndata: {dumps(data).decode()}\n\n"
+
+
+@app.get("/query/stream")
+async def query_stream(question: str):
+    """Server-sent events: partial SQL while generating, then result rows.
+
+    Generation takes a scheduler slot like /query; when shed, the error
+    event carries /query's status code (429 or 503).
+    """
+    from contextlib import nullcontext
+    from src.config.settings import CONFIG
+    from src.sql.cache import get_query_cache
+    from src.sql.generator import astream_sql
+    from src.sql.executor import iter_sql
+    from src.sql.scheduler import Overloaded, get_scheduler
+    
+    async def events():
+        cache = get_query_cache() if CONFIG.cache_enabled else None
+        hit = await asyncio.to_thread(cache.get, question) if cache else None
+        if hit:
+            sql = hit[0]
+        else:
+            sql = ""
+            try:
+                async with get_scheduler().slot() if CONFIG.scheduler_enabled else nullcontext():
+                    async for partial in astream_sql(question):
+                        if partial != sql:
+                            sql = partial
+                            yield _sse("sql_partial", {"sql": sql})
+            except Overloaded as e:
+                yield _sse("error", {"error": e.detail, "status": e.status_code})
+                return
+            except Exception as e:
+                yield _sse("error", {"error": f"ERROR: {e}"})
+                return
+        yield _sse("sql", {"sql": sql, "cached": hit[1] if hit else None})
+        
+        row_count = 0
+        try:
+            async for columns, rows in iterate_in_threadpool(iter_sql(sql)):
+                row_count += len(rows)
+                yield _sse("rows", {"rows": [dict(zip(columns, row)) for row in rows]})
+        except Exception as e:
+            yield _sse("error", {"error": str(e)})
+            return
+        await remember_sql(question, sql, cached=hit is not None)
+        yield _sse("done", {"row_count": row_count})
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
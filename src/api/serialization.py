@@ -0,0 +1,109 @@
+import json
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the json module
+    orjson = None
+
+RECORDS = "application/json"
+COLUMNAR = "application/vnd.texttosql.columnar+json"
+ARROW = "application/vnd.apache.arrow.stream"
+FORMATS = {"records": RECORDS, "columnar": COLUMNAR, "arrow": ARROW}
+_BY_MEDIA_TYPE = {media_type: name for name, media_type in FORMATS.items()}
+
+
+def _default(obj):
+    return obj.tolist() if hasattr(obj, "tolist") else str(obj)
+
+
+def dumps(obj) -> bytes:
+    """JSON bytes: orjson when installed (numpy arrays as-is, NaN as null)."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, default=_default).encode()
+
+
+def column_values(series: pd.Series):
+    """One column for dumps: the numeric array itself when orjson can take it, else a list."""
+    if orjson is not None:
+        values = series.to_numpy()
+        if values.dtype.kind in "iufb" and values.flags.c_contiguous:
+            return values
+        return series.tolist()
+    # The json module would write NaN, which is not valid JSON
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def records(df: pd.DataFrame) -> list:
+    """Rows as dicts, built column-wise (no per-cell DataFrame access)."""
+    columns = [str(c) for c in df.columns]
+    if orjson is not None:
+        lists = [df.iloc[:, i].tolist() for i in range(df.shape[1])]
+    else:
+        lists = [column_values(df.iloc[:, i]) for i in range(df.shape[1])]
+    return [dict(zip(columns, row)) for row in zip(*lists)]
+
+
+def negotiate(accept: str = None, fmt: str = None) -> str:
+    """Response format from an explicit name or the Accept header.
+
+    Raises ValueError for an unknown name and returns None when Accept
+    allows none of the formats.
+    """
+    if fmt:
+        if fmt not in FORMATS:
+            raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+        return fmt
+    if not accept:
+        return "records"
+    ranges = []
+    for i, part in enumerate(accept.split(",")):
+        media_type, *params = [p.strip() for p in part.split(";")]
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        ranges.append((-q, i, media_type.lower()))
+    for neg_q, _, media_type in sorted(ranges):
+        if neg_q == 0:
+            break
+        if media_type in _BY_MEDIA_TYPE:
+            return _BY_MEDIA_TYPE[media_type]
+        if media_type in ("*/*", "application/*"):
+            return "records"
+    return None
+
+
+def json_body(envelope: dict, result: pd.DataFrame = None, fmt: str = "records") -> bytes:
+    """envelope plus the result, as records or as columns and arrays."""
+    if result is None:
+        return dumps({**envelope, "result": None})
+    if fmt == "columnar":
+        columns = [str(c) for c in result.columns]
+        data = [column_values(result.iloc[:, i]) for i in range(result.shape[1])]
+        return dumps({**envelope, "columns": columns, "data": data, "row_count": len(result)})
+    return dumps({**envelope, "result": records(result)})
+
+
+def arrow_body(envelope: dict, result: pd.DataFrame) -> bytes:
+    """Arrow IPC stream; the envelope travels as schema metadata."""
+    import pyarrow as pa
+    table = pa.Table.from_pandas(result, preserve_index=False)
+    metadata = {k: json.dumps(v) for k, v in envelope.items()}
+    table = table.replace_schema_metadata(metadata)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def arrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
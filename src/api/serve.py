@@ -0,0 +1,154 @@
+import gc
+import os
+import signal
+import socket
+import time
+from src.config.settings import CONFIG
+
+
+def _timed(timings: dict, stage: str, fn):
+    start = time.perf_counter()
+    result = fn()
+    timings[stage] = (time.perf_counter() - start) * 1000
+    return result
+
+
+def preload() -> dict:
+    """Import and build what workers only read, before fork; returns ms per stage.
+
+    The heavy modules, embedding model, schema index and example bank end
+    up in pages the workers share copy-on-write, and the workers' own
+    startup finds them loaded. Connections are closed afterwards so none
+    crosses the fork, and gc.freeze() keeps the collector from touching
+    (and so copying) the preloaded objects.
+    """
+    from src.api.startup import import_modules, load_indexes
+    from src.sql import pool
+
+    # Forked workers can't use the tokenizer's thread pool
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    timings = {}
+    _timed(timings, "imports", import_modules)
+    _timed(timings, "indexes", load_indexes)
+    if pool._pool is not None:
+        pool._pool.close()
+        pool._pool = None
+    gc.collect()
+    gc.freeze()
+    return timings
+
+
+def bind(host: str, port: int) -> socket.socket:
+    """Listening socket the workers inherit and accept on."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(sock: socket.socket):
+    """Serve the preloaded app on an inherited socket until SIGTERM, then drain."""
+    import uvicorn
+    from src.api.app import app
+    config = uvicorn.Config(app, lifespan="on", timeout_graceful_shutdown=CONFIG.graceful_timeout)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class Supervisor:
+    """Pre-fork process manager: N workers on one socket.
+
+    Crashed workers are replaced. SIGTERM or SIGINT is forwarded to the
+    workers, which stop accepting and finish in-flight requests; any
+    still running after the graceful timeout are killed.
+    """
+
+    def __init__(self, sock: socket.socket, workers: int = None, target=run_worker, graceful_timeout: float = None):
+        self.sock = sock
+        self.workers = workers or CONFIG.serve_workers
+        self.target = target
+        self.graceful_timeout = CONFIG.graceful_timeout if graceful_timeout is None else graceful_timeout
+        self.children = {}  # pid -> start time
+        self.stopping = False
+        self.restarts = 0
+
+    def spawn(self):
+        pid = os.fork()
+        if pid:
+            self.children[pid] = time.monotonic()
+            return
+        code = 0
+        try:
+            for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGALRM):
+                signal.signal(sig, signal.SIG_DFL)
+            self.target(self.sock)
+        except BaseException:
+            import traceback
+            traceback.print_exc()
+            code = 1
+        finally:
+            os._exit(code)
+
+    def _stop(self, signum, frame):
+        if self.stopping:
+            return
+        self.stopping = True
+        for pid in list(self.children):
+            _kill(pid, signal.SIGTERM)
+        signal.alarm(max(1, int(self.graceful_timeout) + 1))
+
+    def _kill_remaining(self, signum, frame):
+        for pid in list(self.children):
+            _kill(pid, signal.SIGKILL)
+
+    def run(self) -> int:
+        """Start the workers and supervise them until they have all exited."""
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGALRM, self._kill_remaining)
+        for _ in range(self.workers):
+            self.spawn()
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started = self.children.pop(pid, None)
+            if started is None or self.stopping:
+                continue
+            print(f"Worker {pid} exited ({os.waitstatus_to_exitcode(status)}); restarting")
+            self.restarts += 1
+            if time.monotonic() - started < 1.0:
+                time.sleep(1.0)  # crashing on start: don't spin
+            if not self.stopping:
+                self.spawn()
+        signal.alarm(0)
+        self.sock.close()
+        return 0
+
+
+def _kill(pid: int, sig):
+    try:
+        os.kill(pid, sig)
+    except ProcessLookupError:
+        pass
+
+
+def serve(host: str = None, port: int = None, workers: int = None) -> int:
+    """Production server: preload, then fork CONFIG.serve_workers uvicorn workers."""
+    host = host or CONFIG.serve_host
+    port = port or CONFIG.serve_port
+    workers = workers or CONFIG.serve_workers
+    if not hasattr(os, "fork"):
+        # No fork (Windows): uvicorn's spawn-based workers, without the shared preload
+        import uvicorn
+        uvicorn.run("src.api.app:app", host=host, port=port, workers=workers,
+                    timeout_graceful_shutdown=CONFIG.graceful_timeout)
+        return 0
+    sock = bind(host, port)
+    timings = preload()
+    print("Preloaded: " + ", ".join(f"{stage} {ms:.0f} ms" for stage, ms in timings.items()))
+    print(f"Serving on http://{host}:{sock.getsockname()[1]} with {workers} workers")
+    return Supervisor(sock, workers).run()
@@ -0,0 +1,190 @@
+import asyncio
+import importlib
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+from src.config.settings import CONFIG
+
+# Imported in the background on startup (and before fork by serve.preload)
+HEAVY_MODULES = [
+    "pandas",
+    "numpy",
+    "sqlglot",
+    "src.api.app",
+    "src.api.serialization",
+    "src.sql.generator",
+    "src.sql.executor",
+    "src.sql.correction",
+    "src.sql.cache",
+]
+# Stages that must succeed before /ready; the others may fail (no Ollama, no database)
+REQUIRED = ("imports", "indexes")
+STAGES = ("imports", "indexes", "llm", "page_cache")
+
+
+def import_modules() -> dict:
+    for name in HEAVY_MODULES:
+        importlib.import_module(name)
+    return {"modules": len(HEAVY_MODULES)}
+
+
+def load_indexes() -> dict:
+    """Embedding model, schema index and example bank."""
+    from src.sql import embeddings
+    from src.sql.examples import get_example_bank
+    from src.sql.schema_index import get_schema_index
+    embeddings._load_model()
+    loaded = {"embedder": embeddings.embedder_id()}
+    if CONFIG.schema_rag_enabled:
+        loaded["schema_index"] = get_schema_index() is not None
+    if CONFIG.example_bank_enabled:
+        loaded["examples"] = len(get_example_bank().pairs)
+    return loaded
+
+
+def warm_queries(budget_seconds: float = None) -> dict:
+    """Run the gold queries once to pull their pages into the OS cache.
+
+    Results land in the result cache too. Stops once the time budget is spent.
+    """
+    from src.evaluation.benchmark import gold_queries
+    from src.sql.executor import execute_sql
+    budget_seconds = CONFIG.startup_warm_seconds if budget_seconds is None else budget_seconds
+    if not CONFIG.db_path.exists():
+        raise FileNotFoundError(f"{CONFIG.db_path} does not exist")
+    deadline = time.perf_counter() + budget_seconds
+    ran = failed = 0
+    for _, sql in gold_queries():
+        if time.perf_counter() > deadline:
+            break
+        success, _, _ = execute_sql(sql)
+        ran += 1
+        failed += not success
+    return {"queries": ran, "failed": failed}
+
+
+class Startup:
+    """State and duration of each warm-up stage, reported by /ready.
+
+    The server accepts requests while the stages run; /ready answers 503
+    until the required ones are done and the rest have finished.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {name: {"state": "pending", "ms": None, "detail": None} for name in STAGES}
+
+    async def stage(self, name: str, fn):
+        """Run fn (sync functions in a thread), recording its outcome."""
+        stage = self.stages[name]
+        stage["state"] = "running"
+        start = time.perf_counter()
+        try:
+            result = await fn() if asyncio.iscoroutinefunction(fn) else await asyncio.to_thread(fn)
+            stage["state"], stage["detail"] = "done", result
+        except Exception as e:
+            stage["state"], stage["detail"] = "failed", str(e)
+        stage["ms"] = (time.perf_counter() - start) * 1000
+        print(f"Startup {name}: {stage['state']} in {stage['ms']:.0f} ms")
+
+    def skip(self, name: str, reason: str):
+        self.stages[name].update(state="skipped", ms=0.0, detail=reason)
+
+    async def run(self):
+        """Imports, then indexes, then the page cache; the LLM warms up alongside."""
+        async def local():
+            await self.stage("imports", import_modules)
+            await self.stage("indexes", load_indexes)
+            if CONFIG.startup_warm_queries:
+                await self.stage("page_cache", warm_queries)
+            else:
+                self.skip("page_cache", "disabled")
+
+        async def llm():
+            if not CONFIG.llm_warmup or CONFIG.llm_backend != "ollama":
+                return self.skip("llm", f"{CONFIG.llm_backend} backend" if CONFIG.llm_warmup else "disabled")
+            from src.sql.generator import awarm_up
+            await self.stage("llm", awarm_up)
+
+        await asyncio.gather(local(), llm())
+
+    @property
+    def ready(self) -> bool:
+        states = {name: stage["state"] for name, stage in self.stages.items()}
+        return (all(states[name] == "done" for name in REQUIRED)
+                and all(state not in ("pending", "running") for state in states.values()))
+
+    def report(self) -> dict:
+        return {
+            "ready": self.ready,
+            "uptime_ms": (time.perf_counter() - self.started) * 1000,
+            "stages": self.stages,
+        }
+
+
+_startup = None
+
+
+def get_startup(reset: bool = False) -> Startup:
+    """This process's startup; reset begins a new one (each app lifespan)."""
+    global _startup
+    if _startup is None or reset:
+        _startup = Startup()
+    return _startup
+
+
+# Run in a fresh interpreter by profile_startup; prints the stage timings as JSON
+_PROFILE_SCRIPT = """
+import json, time
+start = time.perf_counter()
+from src.api import startup
+timings = {}
+for name, fn in (("imports", startup.import_modules), ("indexes", startup.load_indexes)):
+    t = time.perf_counter()
+    fn()
+    timings[name] = (time.perf_counter() - t) * 1000
+timings["total"] = (time.perf_counter() - start) * 1000
+print(json.dumps(timings))
+"""
+
+
+def parse_importtime(stderr: str) -> list:
+    """(module, self_us, cumulative_us, depth) rows from `python -X importtime` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def profile_startup(top: int = 15) -> dict:
+    """Cold start in a fresh interpreter: import and index time, slowest imports.
+
+    packages sums self time per top-level package, so a package's
+    imports are charged to it wherever they were first imported from.
+    """
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROFILE_SCRIPT],
+        capture_output=True, text=True, check=True, cwd=Path(__file__).resolve().parents[2]
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    rows = parse_importtime(completed.stderr)
+    packages = {}
+    for name, self_us, _, _ in rows:
+        root = name.split(".")[0]
+        packages[root] = packages.get(root, 0) + self_us / 1000
+    stages = json.loads(completed.stdout.strip().splitlines()[-1])
+    return {
+        "wall_ms": wall_ms,
+        "stages_ms": stages,
+        "budget_ms": CONFIG.cold_start_budget_ms,
+        "within_budget": wall_ms <= CONFIG.cold_start_budget_ms,
+        "modules": len(rows),
+        "packages": sorted(packages.items(), key=lambda p: -p[1])[:top],
+    }
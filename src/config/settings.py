@@ -1,19 +1,191 @@
-from dataclasses import dataclass
+import os
+import secrets
+from dataclasses import dataclass, field
 from pathlib import Path
 
+# Materialized summaries: name -> GROUP BY query over the base tables
+SUMMARY_TABLES = {
+    "mv_revenue_by_category": (
+        "SELECT p.product_category, SUM(oi.price), AVG(oi.price), COUNT(*), COUNT(DISTINCT oi.order_id) "
+        "FROM order_items oi JOIN products p ON oi.product_id = p.product_id "
+        "GROUP BY p.product_category"
+    ),
+    "mv_basket_by_city": (
+        "SELECT c.customer_city, AVG(oi.price), SUM(oi.price), COUNT(*), COUNT(DISTINCT o.order_id) "
+        "FROM customers c JOIN orders o ON c.customer_id = o.customer_id "
+        "JOIN order_items oi ON o.order_id = oi.order_id "
+        "GROUP BY c.customer_city"
+    ),
+    "mv_delivery_by_state": (
+        "SELECT c.customer_state, "
+        "AVG(julianday(o.order_delivered_timestamp) - julianday(o.order_purchase_timestamp)), COUNT(*) "
+        "FROM customers c JOIN orders o ON c.customer_id = o.customer_id "
+        "WHERE o.order_delivered_timestamp IS NOT NULL "
+        "GROUP BY c.customer_state"
+    ),
+}
+
 @dataclass
 class Config:
     # Paths
     data_dir: Path = Path("data")
     db_path: Path = Path("data/database/ecommerce.db")
+    raw_data_dir: Path = Path("data/raw")  # Olist CSVs read by `run.py ingest`
     
     # LLM
-    ollama_url: str = "http://localhost:11434/api/generate"
+    ollama_url: str = field(default_factory=lambda: os.environ.get("OLLAMA_URL", "http://localhost:11434/api/generate"))
     model: str = "mistral"
     temperature: float = 0.0
     max_tokens: int = 200
+    llm_timeout: float = 120.0
+    llm_max_connections: int = 8
+    llm_stream: bool = True
+    llm_keep_alive: str = "30m"
+    llm_warmup: bool = True
+    llm_reuse_context: bool = False
+    llm_backend: str = field(default_factory=lambda: os.environ.get("LLM_BACKEND", "ollama"))  # ollama | openai | stub
+    openai_base_url: str = "http://localhost:8000/v1"
+    openai_api_key: str = ""
+    stub_latency_ms: float = 200.0
+    stub_tokens_per_second: float = 50.0
+    
+    # Generation scheduler (single-flight, concurrency cap, load shedding)
+    scheduler_enabled: bool = True
+    scheduler_max_concurrent: int = 4
+    scheduler_max_queue: int = 64
+    scheduler_queue_timeout: float = 30.0
+    
+    # Batch questions (/query/batch, `run.py batch`): pipelined stages joined by bounded queues
+    batch_max_questions: int = 1000
+    batch_queue_size: int = 16
+    batch_generate_workers: int = 4  # concurrent LLM generations, like scheduler_max_concurrent
+    batch_validate_workers: int = 2
+    batch_execute_workers: int = 4
+    
+    # SQLite connection pool (read-only)
+    pool_size: int = 4
+    pool_timeout: float = 10.0
+    pool_health_check_seconds: float = 30.0
+    sqlite_cache_size_kib: int = 64 * 1024
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    
+    # Ingestion
+    ingest_chunk_rows: int = 200_000
+    
+    # Result limits
+    fetch_batch_size: int = 1000
+    max_result_rows: int = 100_000
+    max_result_bytes: int = 64 * 1024 * 1024
+    export_max_rows: int = 10_000_000
+    export_max_bytes: int = 16 * 1024 ** 3
+    export_timeout_seconds: float = 600.0  # wall-clock budget per export; 0 = unlimited
+    # Signs /query continuation tokens; set CURSOR_SECRET so tokens survive restarts
+    cursor_secret: str = field(default_factory=lambda: os.environ.get("CURSOR_SECRET") or secrets.token_hex(32))
+    
+    # Execution engine: sqlite, duckdb, or auto (DuckDB once the scanned tables are large)
+    sql_engine: str = field(default_factory=lambda: os.environ.get("SQL_ENGINE", "sqlite"))
+    duckdb_source: str = "parquet"  # parquet export next to the database, or sqlite (needs the sqlite extension)
+    duckdb_min_scan_rows: int = 1_000_000
+    duckdb_threads: int = 0  # 0 = DuckDB's default (one per core)
+    
+    # Query guardrails
+    guard_enabled: bool = True
+    guard_large_table_rows: int = 100_000
+    guard_max_scan_cost: int = 10 ** 9
+    query_timeout_seconds: float = 30.0
+    query_max_vm_steps: int = 2_000_000_000
+    
+    # Materialized summaries
+    summaries_enabled: bool = True
+    summary_tables: dict = field(default_factory=lambda: dict(SUMMARY_TABLES))
     
     # SQL Generation
-    max_retries: int = 2
+    max_retries: int = 2  # self-correction attempts after a failed validation
+    self_correction_enabled: bool = True
+    fix_cache_max_entries: int = 1000
+    
+    # Evaluation
+    eval_llm_workers: int = 4
+    eval_sql_workers: int = 4
+    compare_rtol: float = 0.0
+    compare_atol: float = 1.0
+    compare_chunk_rows: int = 1_000_000
+    
+    # Production serving (`run.py api`): preloaded, forked uvicorn workers
+    serve_host: str = field(default_factory=lambda: os.environ.get("HOST", "0.0.0.0"))
+    serve_port: int = field(default_factory=lambda: int(os.environ.get("PORT", 8000)))
+    serve_workers: int = field(
+        default_factory=lambda: int(os.environ.get("WEB_CONCURRENCY", 0)) or min(4, os.cpu_count() or 1)
+    )
+    graceful_timeout: float = 30.0  # seconds a worker gets to finish in-flight requests
+    
+    # Startup (stages reported by /ready)
+    startup_warm_queries: bool = True  # run the gold queries to prime the page cache
+    startup_warm_seconds: float = 30.0
+    cold_start_budget_ms: float = 5000.0  # `run.py startup` fails above this
+    
+    # Telemetry (/metrics and the X-Debug-Timing breakdown)
+    metrics_enabled: bool = True
+    metrics_window: int = 1024  # recent values kept per histogram for p50/p95/p99
+    timing_header_enabled: bool = True
+    
+    # Embeddings
+    embedding_model: str = "all-MiniLM-L6-v2"
+    
+    # Schema retrieval (only the relevant tables go into the prompt)
+    schema_rag_enabled: bool = True
+    schema_top_k: int = 3
+    schema_sample_values: int = 3
+    
+    # Few-shot example selection (nearest neighbours from the example bank)
+    example_bank_enabled: bool = True
+    few_shot_k: int = 4
+    
+    # Question -> SQL cache
+    cache_enabled: bool = True
+    cache_max_entries: int = 10000
+    cache_ttl_seconds: int = 7 * 24 * 3600
+    cache_similarity_threshold: float = 0.92
+    
+    # Result cache (canonical SQL -> columnar result)
+    result_cache_enabled: bool = True
+    result_cache_max_bytes: int = 256 * 1024 * 1024
+    
+    # Cross-worker cache file behind the result and fix caches
+    shared_cache_enabled: bool = True
+    shared_cache_max_bytes: int = 512 * 1024 * 1024
+    
+    # Executed-query log: rotated to query_log.jsonl.1 past this size
+    query_log_max_bytes: int = 32 * 1024 * 1024
+    
+    @property
+    def query_log_path(self) -> Path:
+        """JSONL log of successfully executed generated queries."""
+        return self.db_path.parent / "query_log.jsonl"
+    
+    @property
+    def cache_path(self) -> Path:
+        """SQLite file holding the question cache, next to the database."""
+        return self.db_path.parent / "query_cache.db"
+    
+    @property
+    def shared_cache_path(self) -> Path:
+        """SQLite file every worker process shares, next to the database."""
+        return self.db_path.parent / "shared_cache.db"
+    
+    @property
+    def schema_index_path(self) -> Path:
+        """Persisted schema embedding index, next to the database."""
+        return self.db_path.parent / "schema_index.npz"
+    
+    @property
+    def parquet_dir(self) -> Path:
+        """Parquet export read by the DuckDB engine, next to the database."""
+        return self.db_path.parent / f"{self.db_path.stem}_parquet"
+    
+    @property
+    def example_bank_path(self) -> Path:
+        """Example bank files (.npy matrix, .json pairs), next to the database."""
+        return self.db_path.parent / "example_bank"
 
 CONFIG = Config()
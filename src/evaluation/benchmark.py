@@ -0,0 +1,196 @@
+import asyncio
+import json
+import platform
+import sqlite3
+import statistics
+import subprocess
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from src.config.settings import CONFIG
+from src.evaluation.synthetic import synthetic_db
+
+DEFAULT_SCALES = (10_000,)
+REGRESSION_THRESHOLD = 0.15
+
+
+def time_call(fn, repeat: int = 5, warmup: int = 1) -> dict:
+    """Run fn warmup + repeat times; wall-clock statistics in ms."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "min_ms": samples[0],
+        "median_ms": statistics.median(samples),
+        "mean_ms": statistics.fmean(samples),
+        "max_ms": samples[-1],
+        "rounds": repeat,
+    }
+
+
+@contextmanager
+def configured(**overrides):
+    """Temporarily override CONFIG fields."""
+    saved = {name: getattr(CONFIG, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(CONFIG, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(CONFIG, name, value)
+
+
+def gold_queries(path: Path = None) -> list:
+    """(question, sql) pairs from test_questions.json."""
+    path = path or CONFIG.data_dir / "results" / "test_questions.json"
+    return [(q["question"], q["sql"]) for q in json.loads(path.read_text())]
+
+
+def bench_execute(db_path: Path, queries: list, repeat: int = 5) -> dict:
+    """execute_sql on each gold query, result cache off."""
+    from src.sql.executor import execute_sql
+    results = {}
+    with configured(db_path=db_path, result_cache_enabled=False):
+        for i, (_, sql) in enumerate(queries):
+            success, result, error = execute_sql(sql)
+            timing = time_call(lambda: execute_sql(sql), repeat)
+            results[f"q{i:02d}"] = {**timing, "success": success, "rows": len(result) if success else 0,
+                                    "error": error}
+    return results
+
+
+def bench_schema(db_path: Path, repeat: int = 20) -> dict:
+    from src.sql.executor import get_schema
+    conn = sqlite3.connect(db_path)
+    try:
+        return time_call(lambda: get_schema(conn), repeat)
+    finally:
+        conn.close()
+
+
+def bench_compare(db_path: Path, queries: list, repeat: int = 5) -> dict:
+    """compare_results of each gold result against a row-shuffled copy."""
+    from src.evaluation.metrics import compare_results
+    from src.sql.executor import execute_sql
+    frames = []
+    with configured(db_path=db_path, result_cache_enabled=False):
+        for _, sql in queries:
+            success, result, _ = execute_sql(sql)
+            if success:
+                frames.append((result, result.sample(frac=1, random_state=0)))
+    timing = time_call(lambda: [compare_results(a, b) for a, b in frames], repeat)
+    return {**timing, "pairs": len(frames), "rows": sum(len(a) for a, _ in frames)}
+
+
+async def _drive(app, questions: list, requests: int, concurrency: int) -> tuple:
+    import httpx
+    latencies, errors = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench",
+                                 timeout=None) as client:
+        async def one(i):
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post("/query", json={"question": questions[i % len(questions)]})
+                latencies.append((time.perf_counter() - start) * 1000)
+                if response.status_code != 200 or not response.json()["success"]:
+                    errors += 1
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        return time.perf_counter() - start, sorted(latencies), errors
+
+
+def bench_api(db_path: Path, queries: list, requests: int = 200, concurrency: int = 16,
+              latency_ms: float = 0.0) -> dict:
+    """POST /query throughput in-process with the stub LLM; question and result caches off."""
+    from src.api.app import app
+    from src.sql import backends
+    from src.sql.cache import normalize_question
+    responses = {normalize_question(q): " ".join(sql.split()) + ";" for q, sql in queries}
+    stub = backends.StubBackend(responses, latency_ms=latency_ms, tokens_per_second=0)
+    saved = backends._backend, backends._backend_name
+    backends._backend, backends._backend_name = stub, "stub"
+    try:
+        with configured(db_path=db_path, llm_backend="stub", cache_enabled=False, result_cache_enabled=False):
+            elapsed, latencies, errors = asyncio.run(_drive(app, [q for q, _ in queries], requests, concurrency))
+    finally:
+        backends._backend, backends._backend_name = saved
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "stub_latency_ms": latency_ms,
+        "requests_per_second": requests / elapsed,
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))],
+        "errors": errors,
+    }
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_benchmarks(scales=DEFAULT_SCALES, requests: int = 200, concurrency: int = 16, repeat: int = 5,
+                   log=print) -> dict:
+    """All benchmarks at each scale, as one JSON-serializable report."""
+    queries = gold_queries()
+    report = {
+        "commit": _commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "scales": {},
+    }
+    for orders in scales:
+        start = time.perf_counter()
+        db_path = synthetic_db(orders)
+        log(f"[{orders:,} orders] database ready in {time.perf_counter() - start:.1f}s ({db_path})")
+        results = {
+            "execute_sql": bench_execute(db_path, queries, repeat),
+            "get_schema": bench_schema(db_path),
+            "compare_results": bench_compare(db_path, queries, repeat),
+            "api": bench_api(db_path, queries, requests, concurrency),
+        }
+        total = sum(r["median_ms"] for r in results["execute_sql"].values())
+        log(f"[{orders:,} orders] execute_sql {total:.1f} ms for {len(queries)} gold queries, "
+            f"compare_results {results['compare_results']['median_ms']:.1f} ms, "
+            f"API {results['api']['requests_per_second']:.0f} req/s")
+        report["scales"][str(orders)] = results
+    return report
+
+
+def _timings(report: dict) -> dict:
+    """Flatten a report to {"scale/benchmark[/query]": ms}, using the best
+    round (least sensitive to noise) and the API's median latency."""
+    flat = {}
+    for scale, results in report["scales"].items():
+        for name, result in results.items():
+            if "min_ms" in result:
+                flat[f"{scale}/{name}"] = result["min_ms"]
+            elif name == "api":
+                flat[f"{scale}/api/p50"] = result["p50_ms"]
+            else:
+                for query, timing in result.items():
+                    flat[f"{scale}/{name}/{query}"] = timing["min_ms"]
+    return flat
+
+
+def compare_reports(baseline: dict, current: dict, threshold: float = REGRESSION_THRESHOLD) -> list:
+    """(key, baseline_ms, current_ms, change, regressed) for timings in both reports."""
+    old, new = _timings(baseline), _timings(current)
+    rows = []
+    for key in sorted(old.keys() & new.keys()):
+        change = (new[key] - old[key]) / old[key] if old[key] else 0.0
+        rows.append((key, old[key], new[key], change, change > threshold))
+    return rows
@@ -1,30 +1,220 @@
+import itertools
+import numpy as np
 import pandas as pd
+from src.config.settings import CONFIG
 
 
-def compare_results(result1: pd.DataFrame, result2: pd.DataFrame) -> bool:
+NULL = "\x00NULL"  # sorts and hashes NULLs as one distinct text value
+MAX_ALIGNMENTS = 64
+MAX_REPORTED_ROWS = 20
+_HASH_MULTIPLIER = np.uint64(0x100000001B3)
+
+
+def _text_keys(values: np.ndarray) -> np.ndarray:
+    return pd.util.hash_array(values, categorize=True)
+
+
+def _normalize_column(series: pd.Series) -> tuple:
+    """(kind, values, keys) for one result column.
+
+    kind is "num" (float64 values, NaN for NULL), "text" (object values,
+    NULL as a sentinel) or "null" when every value is NULL. Text columns
+    whose values all parse as numbers count as numeric. keys are what rows
+    sort and hash by: the floats themselves, or a 64-bit hash of the text.
+    """
+    nulls = series.isna().to_numpy()
+    if nulls.all():
+        values = np.full(len(series), np.nan)
+        return "null", values, values
+    if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan) + 0.0  # -0.0 -> 0.0
+        return "num", values, values
+    # Parse only the distinct values; result columns repeat a lot
+    codes, uniques = pd.factorize(series)
+    numeric = pd.to_numeric(pd.Series(uniques), errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    if not np.isnan(numeric).any():
+        values = np.where(codes >= 0, numeric[codes], np.nan) + 0.0
+        return "num", values, values
+    text = np.asarray(uniques.astype(str), dtype=object)[codes]
+    text[nulls] = NULL
+    return "text", text, _text_keys(text)
+
+
+def _as_kind(column: tuple, kind: str) -> tuple:
+    """An all-NULL column viewed as another kind so it can align with it."""
+    if column[0] != "null" or kind != "text":
+        return (kind,) + column[1:]
+    values = np.full(len(column[1]), NULL, dtype=object)
+    return "text", values, np.full(len(values), _text_keys(np.array([NULL], dtype=object))[0])
+
+
+def _values_match(a: np.ndarray, b: np.ndarray, kind: str, rtol: float, atol: float) -> np.ndarray:
+    if kind == "text":
+        return a == b
+    # Strict absolute bound: with atol=1, values 1 apart (an off-by-one COUNT) differ
+    with np.errstate(invalid="ignore"):
+        diff = np.abs(a - b)
+        close = (a == b) | (diff < atol) | (diff <= rtol * np.abs(b))
+    return close | (np.isnan(a) & np.isnan(b))
+
+
+def _kinds_compatible(a: tuple, b: tuple) -> bool:
+    return a[0] == b[0] or "null" in (a[0], b[0])
+
+
+def _row_hashes(columns: list, chunk_rows: int) -> np.ndarray:
+    """Sorted per-row hashes: equal arrays mean equal row multisets."""
+    n = len(columns[0][1])
+    hashes = np.empty(n, dtype=np.uint64)
+    for start in range(0, n, chunk_rows):
+        stop = min(start + chunk_rows, n)
+        combined = np.zeros(stop - start, dtype=np.uint64)
+        for kind, values, keys in columns:
+            column = keys[start:stop] if kind == "text" else pd.util.hash_array(values[start:stop])
+            combined = (combined * _HASH_MULTIPLIER) ^ column
+        hashes[start:stop] = combined
+    return np.sort(hashes)
+
+
+def _sort_order(keys: list) -> np.ndarray:
+    """Row order sorted by keys[0], then keys[1], ... (NaN last).
+
+    Chained stable argsorts; much faster than np.lexsort on large inputs.
+    """
+    order = np.arange(len(keys[0]))
+    for key in reversed(keys):
+        order = order[np.argsort(key[order], kind="stable")]
+    return order
+
+
+def _compare_rows(left: list, right: list, rtol: float, atol: float, chunk_rows: int) -> tuple:
+    """Compare aligned columns as multisets of rows.
+
+    Returns (differing_column_positions, differing_row_pairs) where row
+    pairs are original (left, right) row indices after sorting both sides.
+    """
+    if np.array_equal(_row_hashes(left, chunk_rows), _row_hashes(right, chunk_rows)):
+        return [], []
+    # Sort both sides the same way (text hashes first, then numbers) and
+    # compare position by position with float tolerance
+    text_first = sorted(range(len(left)), key=lambda i: left[i][0] != "text")
+    order_left = _sort_order([left[i][2] for i in text_first])
+    order_right = _sort_order([right[i][2] for i in text_first])
+
+    columns, rows = set(), []
+    for start in range(0, len(order_left), chunk_rows):
+        il, ir = order_left[start:start + chunk_rows], order_right[start:start + chunk_rows]
+        bad = np.zeros(len(il), dtype=bool)
+        for position, ((kind, a, _), (_, b, _)) in enumerate(zip(left, right)):
+            mismatch = ~_values_match(a[il], b[ir], kind, rtol, atol)
+            if mismatch.any():
+                columns.add(position)
+                bad |= mismatch
+        if len(rows) < MAX_REPORTED_ROWS:
+            rows.extend(zip(il[bad].tolist(), ir[bad].tolist()))
+    return sorted(columns), rows[:MAX_REPORTED_ROWS]
+
+
+def _alignments(narrow: list, wide: list, narrow_names: list, wide_names: list, rtol: float, atol: float):
+    """Candidate column mappings narrow -> wide, most plausible first.
+
+    A column's candidates are the columns holding the same multiset of
+    values; if there are none, any column of a compatible kind (so the
+    row-level diff can say where they differ).
+    """
+    sorted_narrow = [np.sort(keys) for _, _, keys in narrow]
+    sorted_wide = [np.sort(keys) for _, _, keys in wide]
+    candidates = []
+    for i, column in enumerate(narrow):
+        matches = [
+            j for j, other in enumerate(wide)
+            if column[0] == other[0]
+            and _values_match(sorted_narrow[i], sorted_wide[j], "text" if column[0] == "text" else "num",
+                              rtol, atol).all()
+        ]
+        if not matches:
+            matches = [j for j, other in enumerate(wide) if _kinds_compatible(column, other)]
+        # Prefer the same name, then the same position
+        matches.sort(key=lambda j: (wide_names[j] != narrow_names[i], j != i))
+        candidates.append(matches)
+    yielded = 0
+    for mapping in itertools.product(*candidates):
+        if len(set(mapping)) != len(mapping):
+            continue
+        yield mapping
+        yielded += 1
+        if yielded >= MAX_ALIGNMENTS:
+            return
+
+
+def compare_frames(result1: pd.DataFrame, result2: pd.DataFrame, rtol: float = None,
+                   atol: float = None, chunk_rows: int = None) -> dict:
+    """Order-insensitive comparison of two query results with a diff report.
+
+    Columns are aligned by value (the narrower result's columns must all
+    appear in the wider one, in any order and under any name), then rows are
+    compared as multisets: by hash first, then sorted with float tolerance.
+    Returns a dict with equal, reason, columns (name mapping),
+    differing_columns and differing_rows (row index pairs).
+    """
+    rtol = CONFIG.compare_rtol if rtol is None else rtol
+    atol = CONFIG.compare_atol if atol is None else atol
+    chunk_rows = chunk_rows or CONFIG.compare_chunk_rows
+    report = {"equal": False, "reason": None, "columns": {}, "differing_columns": [], "differing_rows": []}
+    if result1 is None or result2 is None:
+        report["reason"] = "missing result"
+        return report
+    if result1.empty and result2.empty:
+        report["equal"] = True
+        return report
+    if len(result1) != len(result2):
+        report["reason"] = f"row count {len(result1)} != {len(result2)}"
+        return report
+
+    swapped = result1.shape[1] > result2.shape[1]
+    narrow_frame, wide_frame = (result2, result1) if swapped else (result1, result2)
+    narrow = [_normalize_column(narrow_frame.iloc[:, i]) for i in range(narrow_frame.shape[1])]
+    wide = [_normalize_column(wide_frame.iloc[:, i]) for i in range(wide_frame.shape[1])]
+    narrow_names = [str(c) for c in narrow_frame.columns]
+    wide_names = [str(c) for c in wide_frame.columns]
+
+    best = None
+    for mapping in _alignments(narrow, wide, narrow_names, wide_names, rtol, atol):
+        left, right = [], []
+        for i, j in zip(range(len(narrow)), mapping):
+            kind = narrow[i][0] if narrow[i][0] != "null" else wide[j][0]
+            left.append(_as_kind(narrow[i], kind))
+            right.append(_as_kind(wide[j], kind))
+        differing_columns, differing_rows = _compare_rows(left, right, rtol, atol, chunk_rows)
+        pairs = {narrow_names[i]: wide_names[j] for i, j in enumerate(mapping)}
+        if swapped:
+            pairs = {v: k for k, v in pairs.items()}
+            differing_rows = [(b, a) for a, b in differing_rows]
+        candidate = {
+            "equal": not differing_columns,
+            "reason": None if not differing_columns else "row values differ",
+            "columns": pairs,
+            "differing_columns": [narrow_names[p] for p in differing_columns],
+            "differing_rows": differing_rows,
+        }
+        if candidate["equal"]:
+            return candidate
+        best = best or candidate
+    if best is None:
+        report["reason"] = "no column alignment"
+        report["differing_columns"] = [
+            name for name, column in zip(narrow_names, narrow)
+            if not any(_kinds_compatible(column, other) for other in wide)
+        ]
+        return report
+    return best
+
+
+def compare_results(result1: pd.DataFrame, result2: pd.DataFrame, rtol: float = None,
+                    atol: float = None) -> bool:
     """Compare two SQL query results."""
     try:
-        if result1 is None or result2 is None:
-            return False
-        if result1.empty and result2.empty:
-            return True
-        if result1.shape[0] != result2.shape[0]:
-            return False
-        
-        # Compare last column values
-        v1 = sorted([str(x) for x in result1.iloc[:, -1].tolist()])
-        v2 = sorted([str(x) for x in result2.iloc[:, -1].tolist()])
-        
-        if v1 == v2:
-            return True
-        
-        # Numeric comparison with tolerance
-        try:
-            n1 = sorted([float(x) for x in result1.iloc[:, -1].tolist()])
-            n2 = sorted([float(x) for x in result2.iloc[:, -1].tolist()])
-            return all(abs(a - b) < 1 for a, b in zip(n1, n2))
-        except (ValueError, TypeError):
-            return False
+        return compare_frames(result1, result2, rtol=rtol, atol=atol)["equal"]
     except Exception:
         return False
 
@@ -42,6 +232,31 @@ def normalize_sql(sql: str) -> str:
     return sql
 
 
+def canonical_sql(sql: str) -> str:
+    """AST-aware normalize_sql: table aliases resolve to table names and
+    formatting, keyword case and quoting are unified. Falls back to
+    normalize_sql when the statement does not parse.
+    """
+    try:
+        import sqlglot
+        from sqlglot import exp
+        tree = sqlglot.parse_one(sql.strip().rstrip(";"), read="sqlite")
+        tables = list(tree.find_all(exp.Table))
+        names = [t.name.lower() for t in tables]
+        aliases = {}
+        for table in tables:
+            # Self-joins need their aliases to stay distinguishable
+            if table.alias and names.count(table.name.lower()) == 1:
+                aliases[table.alias.lower()] = table.name.lower()
+                table.set("alias", None)
+        for column in tree.find_all(exp.Column):
+            if column.table and column.table.lower() in aliases:
+                column.set("table", exp.to_identifier(aliases[column.table.lower()]))
+        return tree.sql(dialect="sqlite", normalize=True)
+    except Exception:
+        return normalize_sql(sql)
+
+
 def exact_match(sql1: str, sql2: str) -> bool:
     """Check if two SQL queries are identical."""
     return normalize_sql(sql1) == normalize_sql(sql2)
@@ -0,0 +1,170 @@
+import hashlib
+import json
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from io import StringIO
+from pathlib import Path
+import pandas as pd
+from src.config.settings import CONFIG
+from src.evaluation.metrics import canonical_sql, execution_accuracy
+
+
+def _init_worker(config):
+    """Process-pool initializer: spawned workers start from the parent's settings."""
+    CONFIG.__dict__.update(vars(config))
+
+
+def _execute_timed(sql: str, db_path: str) -> tuple:
+    """Process-pool worker: run sql against db_path, return (ok, result, error, ms)."""
+    from src.sql.executor import execute_sql
+    CONFIG.db_path = Path(db_path)
+    start = time.perf_counter()
+    success, result, error = execute_sql(sql)
+    return success, result, error, (time.perf_counter() - start) * 1000
+
+
+def _generate_timed(question: str) -> tuple:
+    from src.sql.generator import generate_sql
+    start = time.perf_counter()
+    sql = generate_sql(question)
+    return sql, (time.perf_counter() - start) * 1000
+
+
+class GoldCache:
+    """Gold query results on disk, one JSONL file per database version.
+
+    Each result is appended as it arrives, so an interrupted run keeps what
+    it computed; a torn last line is skipped on load.
+    """
+
+    def __init__(self, directory: Path = None, db_path: Path = None):
+        from src.sql.pool import enable_wal
+        from src.sql.result_cache import data_version
+        db_path = db_path or CONFIG.db_path
+        if Path(db_path).exists():
+            enable_wal(db_path)  # the switch itself touches the file; do it before versioning
+        version = hashlib.sha256(repr(data_version(db_path)).encode()).hexdigest()[:16]
+        self.path = (directory or CONFIG.data_dir / "results" / "gold_cache") / f"{version}.jsonl"
+        self._entries = {}
+        if self.path.exists():
+            for line in self.path.read_text().splitlines():
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self._entries[record.pop("sql")] = record
+
+    def get(self, sql: str):
+        """(ok, DataFrame, error) for a cached gold query, or None."""
+        entry = self._entries.get(canonical_sql(sql))
+        if entry is None:
+            return None
+        if not entry["ok"]:
+            return False, None, entry["error"]
+        frame = pd.read_json(StringIO(entry["result"]), orient="split", dtype=False, convert_dates=False)
+        return True, frame, None
+
+    def put(self, sql: str, success: bool, result: pd.DataFrame, error: str):
+        """Record a gold result and append it to the file."""
+        key = canonical_sql(sql)
+        self._entries[key] = {
+            "ok": success,
+            "result": result.to_json(orient="split", index=False, double_precision=15) if success else None,
+            "error": error,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(json.dumps({"sql": key, **self._entries[key]}) + "\n")
+
+
+def completed_indices(output: Path) -> set:
+    """Question indices already recorded in a previous (possibly crashed) run."""
+    if not output.exists():
+        return set()
+    done = set()
+    for line in output.read_text().splitlines():
+        try:
+            done.add(json.loads(line)["index"])
+        except (json.JSONDecodeError, KeyError):
+            continue
+    return done
+
+
+def run_evaluation(questions: list, output: Path, llm_workers: int = None, sql_workers: int = None,
+                   resume: bool = False, on_record=None) -> list:
+    """Evaluate questions concurrently and append one JSONL record per question.
+
+    LLM calls run on a bounded thread pool and SQL on a process pool; gold
+    results are computed once per database version and cached on disk.
+    The process pool uses spawn: forking after the LLM threads started
+    could copy a lock one of them held.
+    Returns all records in the output file (including resumed ones).
+    """
+    llm_workers = llm_workers or CONFIG.eval_llm_workers
+    sql_workers = sql_workers or CONFIG.eval_sql_workers
+    db_path = str(CONFIG.db_path)
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    done = completed_indices(output) if resume else set()
+    if not resume and output.exists():
+        output.unlink()
+    pending = [i for i in range(len(questions)) if i not in done]
+
+    gold_cache = GoldCache()
+    gold = {}
+    sql_pool = ProcessPoolExecutor(sql_workers, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_init_worker, initargs=(CONFIG,))
+    with sql_pool, ThreadPoolExecutor(llm_workers) as llm_pool, open(output, "a") as out:
+        gold_futures = {}
+        for i in pending:
+            sql = questions[i]["sql"]
+            cached = gold_cache.get(sql)
+            if cached is not None:
+                gold[i] = cached
+            else:
+                gold_futures[sql_pool.submit(_execute_timed, sql, db_path)] = i
+        llm_futures = {llm_pool.submit(_generate_timed, questions[i]["question"]): i for i in pending}
+        exec_futures = {}
+        timings = {}
+
+        while gold_futures or llm_futures or exec_futures:
+            finished, _ = wait(list(gold_futures) + list(llm_futures) + list(exec_futures),
+                               return_when=FIRST_COMPLETED)
+            for future in finished:
+                if future in gold_futures:
+                    i = gold_futures.pop(future)
+                    success, result, error, _ = future.result()
+                    gold[i] = (success, result, error)
+                    gold_cache.put(questions[i]["sql"], success, result, error)
+                elif future in llm_futures:
+                    i = llm_futures.pop(future)
+                    sql, llm_ms = future.result()
+                    timings[i] = {"llm_ms": round(llm_ms, 1)}
+                    exec_futures[sql_pool.submit(_execute_timed, sql, db_path)] = (i, sql)
+                else:
+                    i, sql = exec_futures.pop(future)
+                    timings[i]["exec_ms"] = round(future.result()[3], 1)
+                    timings[i]["result"] = future.result()[:3]
+                    timings[i]["sql"] = sql
+
+            # Score questions whose generated and gold results are both ready
+            for i in [i for i in list(timings) if "result" in timings[i] and i in gold]:
+                entry = timings.pop(i)
+                gen_ok, gen_res, gen_err = entry.pop("result")
+                exp_ok, exp_res, _ = gold[i]
+                record = {
+                    "index": i,
+                    "question": questions[i]["question"],
+                    "difficulty": questions[i].get("difficulty"),
+                    "generated_sql": entry.pop("sql"),
+                    "execution_success": gen_ok,
+                    "execution_accuracy": bool(gen_ok and exp_ok and execution_accuracy(gen_res, exp_res)),
+                    "error": gen_err,
+                    "timings": entry,
+                }
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                if on_record:
+                    on_record(record)
+    return [json.loads(line) for line in output.read_text().splitlines()]
@@ -0,0 +1,181 @@
+import os
+import sqlite3
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from src.config.settings import CONFIG
+from src.sql.ingest import finalize, insert_frame
+
+SYNTHETIC_VERSION = 2
+CHUNK_ORDERS = 100_000
+
+# Shapes taken from the public Olist dataset
+ORDER_STATUSES = {
+    "delivered": 0.970, "shipped": 0.011, "canceled": 0.006, "unavailable": 0.006,
+    "invoiced": 0.003, "processing": 0.003, "created": 0.0005, "approved": 0.0005,
+}
+CITIES = {
+    ("sao paulo", "SP"): 0.16, ("rio de janeiro", "RJ"): 0.07, ("belo horizonte", "MG"): 0.03,
+    ("brasilia", "DF"): 0.02, ("curitiba", "PR"): 0.015, ("campinas", "SP"): 0.015,
+    ("porto alegre", "RS"): 0.014, ("salvador", "BA"): 0.013, ("guarulhos", "SP"): 0.012,
+    ("sao bernardo do campo", "SP"): 0.01, ("niteroi", "RJ"): 0.009, ("santo andre", "SP"): 0.008,
+    ("osasco", "SP"): 0.008, ("santos", "SP"): 0.007, ("goiania", "GO"): 0.007,
+    ("recife", "PE"): 0.006, ("fortaleza", "CE"): 0.006, ("florianopolis", "SC"): 0.006,
+    ("manaus", "AM"): 0.003, ("belem", "PA"): 0.003,
+}
+CATEGORIES = [
+    "cama_mesa_banho", "beleza_saude", "esporte_lazer", "moveis_decoracao", "informatica_acessorios",
+    "utilidades_domesticas", "relogios_presentes", "telefonia", "ferramentas_jardim", "automotivo",
+    "brinquedos", "cool_stuff", "perfumaria", "bebes", "eletronicos", "papelaria", "fashion_bolsas_e_acessorios",
+    "pet_shop", "moveis_escritorio", "consoles_games",
+]
+PAYMENT_TYPES = {"credit_card": 0.74, "boleto": 0.19, "voucher": 0.055, "debit_card": 0.015}
+REVIEW_SCORES = {5: 0.57, 4: 0.19, 3: 0.08, 2: 0.03, 1: 0.13}
+PURCHASE_START = np.datetime64("2016-09-01T00:00:00")
+PURCHASE_SECONDS = int((np.datetime64("2018-10-01T00:00:00") - PURCHASE_START) / np.timedelta64(1, "s"))
+
+
+def _choice(rng, weights: dict, size: int) -> np.ndarray:
+    """Indices into weights' keys, drawn with the given (normalized) weights."""
+    p = np.array(list(weights.values()), dtype=float)
+    return rng.choice(len(p), size=size, p=p / p.sum())
+
+
+def _ids(index: np.ndarray, salt: int) -> np.ndarray:
+    """Olist-style 32-hex-digit ids, unique per (salt, index)."""
+    index = np.asarray(index, dtype=np.uint64)
+    mixed = (index + np.uint64(salt)) * np.uint64(0x9E3779B97F4A7C15)
+    return np.char.add(np.char.mod("%016x", mixed), np.char.mod("%016x", index))
+
+
+def _range_ids(start: int, count: int, salt: int) -> np.ndarray:
+    return _ids(np.arange(start, start + count), salt)
+
+
+def _timestamps(seconds: np.ndarray) -> np.ndarray:
+    text = np.datetime_as_string(PURCHASE_START + seconds.astype("timedelta64[s]"), unit="s")
+    return np.char.replace(text, "T", " ")
+
+
+def table_sizes(orders: int) -> dict:
+    """Row counts for a database with the given number of orders."""
+    return {
+        "orders": orders,
+        "customers": max(1, orders // 2),
+        "products": min(32_951, max(100, orders // 10)),
+    }
+
+
+def _order_chunk(rng, start: int, count: int, sizes: dict) -> dict:
+    """Frames for orders [start, start + count) and their items, payments and reviews."""
+    statuses = np.array(list(ORDER_STATUSES))[_choice(rng, ORDER_STATUSES, count)]
+    purchase = rng.integers(0, PURCHASE_SECONDS, count)
+    delivery = purchase + rng.gamma(2.0, 6 * 86400, count).astype(np.int64)
+    delivered_at = np.where(statuses == "delivered", _timestamps(delivery), None)
+    order_ids = _range_ids(start, count, 1)
+    orders = pd.DataFrame({
+        "order_id": order_ids,
+        "customer_id": _ids(rng.integers(0, sizes["customers"], count), 2),
+        "order_status": statuses,
+        "order_purchase_timestamp": _timestamps(purchase),
+        "order_delivered_timestamp": delivered_at,
+    })
+
+    # 1.5 items per order on average (geometric), numbered 1..k within the order
+    per_order = rng.geometric(2 / 3, count)
+    owner = np.repeat(np.arange(count), per_order)
+    item_number = np.arange(len(owner)) - np.repeat(np.cumsum(per_order) - per_order, per_order) + 1
+    price = np.round(rng.lognormal(4.4, 0.9, len(owner)), 2)
+    freight = np.round(rng.lognormal(2.8, 0.5, len(owner)), 2)
+    items = pd.DataFrame({
+        "order_id": order_ids[owner],
+        "order_item_id": item_number,
+        "product_id": _ids(rng.integers(0, sizes["products"], len(owner)), 3),
+        "price": price,
+        "freight_value": freight,
+    })
+
+    # 1.2 payments per order on average; together they cover the order total
+    per_payment = rng.geometric(1 / 1.2, count)
+    payer = np.repeat(np.arange(count), per_payment)
+    sequence = np.arange(len(payer)) - np.repeat(np.cumsum(per_payment) - per_payment, per_payment) + 1
+    totals = np.bincount(owner, weights=price + freight, minlength=count)
+    payments = pd.DataFrame({
+        "order_id": order_ids[payer],
+        "payment_sequential": sequence,
+        "payment_type": np.array(list(PAYMENT_TYPES))[_choice(rng, PAYMENT_TYPES, len(payer))],
+        "payment_installments": rng.integers(1, 11, len(payer)),
+        "payment_value": np.round(totals[payer] / per_payment[payer], 2),
+    })
+
+    # 80% of orders are reviewed
+    reviewed = np.flatnonzero(rng.random(count) < 0.8)
+    scores = np.array(list(REVIEW_SCORES))[_choice(rng, REVIEW_SCORES, len(reviewed))]
+    has_comment = rng.random(len(reviewed)) < 0.4
+    reviews = pd.DataFrame({
+        "review_id": _ids(start + reviewed, 4),
+        "order_id": order_ids[reviewed],
+        "review_score": scores,
+        "review_comment_title": np.where(has_comment & (rng.random(len(reviewed)) < 0.3), "recomendo", None),
+        "review_comment_message": np.where(has_comment, np.where(scores >= 4, "produto otimo, chegou antes do prazo",
+                                                                 "produto nao chegou"), None),
+    })
+    return {"orders": orders, "order_items": items, "payments": payments, "reviews": reviews}
+
+
+def build_database(path: Path, orders: int, seed: int = 0, schema_path: Path = None) -> Path:
+    """Create an Olist-shaped database with `orders` orders from schema.sql.
+
+    Rows are generated and inserted in chunks of CHUNK_ORDERS orders, so
+    memory stays flat at any scale, and finished with the same indexes
+    and statistics as `run.py ingest`. The file is written under a
+    temporary name and renamed when complete.
+    """
+    schema_path = schema_path or CONFIG.db_path.parent / "schema.sql"
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.unlink(missing_ok=True)
+    rng = np.random.default_rng(seed)
+    sizes = table_sizes(orders)
+
+    conn = sqlite3.connect(tmp)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.executescript(schema_path.read_text())
+        for start in range(0, sizes["customers"], CHUNK_ORDERS):
+            count = min(CHUNK_ORDERS, sizes["customers"] - start)
+            city = np.array(list(CITIES), dtype=object)[_choice(rng, CITIES, count)]
+            insert_frame(conn, "customers", pd.DataFrame({
+                "customer_id": _range_ids(start, count, 2),
+                "customer_city": [c for c, _ in city],
+                "customer_state": [s for _, s in city],
+            }))
+        count = sizes["products"]
+        insert_frame(conn, "products", pd.DataFrame({
+            "product_id": _range_ids(0, count, 3),
+            "product_category": np.array(CATEGORIES)[rng.integers(0, len(CATEGORIES), count)],
+            "product_weight_g": rng.lognormal(6.5, 1.2, count).round(),
+            "product_length_cm": rng.integers(10, 100, count),
+            "product_height_cm": rng.integers(2, 80, count),
+            "product_width_cm": rng.integers(8, 80, count),
+        }))
+        for start in range(0, orders, CHUNK_ORDERS):
+            for table, frame in _order_chunk(rng, start, min(CHUNK_ORDERS, orders - start), sizes).items():
+                insert_frame(conn, table, frame)
+            conn.commit()
+        finalize(conn)
+    finally:
+        conn.close()
+    os.replace(tmp, path)
+    return path
+
+
+def synthetic_db(orders: int, directory: Path = None) -> Path:
+    """Path of the cached synthetic database for this scale, built on first use."""
+    directory = directory or CONFIG.data_dir / "bench"
+    path = Path(directory) / f"olist_{orders}_v{SYNTHETIC_VERSION}.db"
+    if not path.exists():
+        build_database(path, orders)
+    return path
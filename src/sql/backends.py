@@ -0,0 +1,206 @@
+import asyncio
+import hashlib
+import json
+import re
+import time
+from typing import AsyncIterator, Iterator, Protocol
+import requests
+from src.config.settings import CONFIG
+from src.sql.cache import normalize_question
+
+
+class LLMBackend(Protocol):
+    """Text completion in the four modes generator needs."""
+
+    def complete(self, prompt: str) -> str: ...
+
+    def stream(self, prompt: str) -> Iterator[str]: ...
+
+    async def acomplete(self, prompt: str) -> str: ...
+
+    def astream(self, prompt: str) -> AsyncIterator[str]: ...
+
+
+class OllamaBackend:
+    """Ollama /api/generate (the default)."""
+
+    def complete(self, prompt: str) -> str:
+        from src.sql.generator import ollama_complete
+        return ollama_complete(prompt)
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        from src.sql.generator import ollama_stream
+        return ollama_stream(prompt)
+
+    async def acomplete(self, prompt: str) -> str:
+        from src.sql.generator import ollama_acomplete
+        return await ollama_acomplete(prompt)
+
+    def astream(self, prompt: str) -> AsyncIterator[str]:
+        from src.sql.generator import ollama_astream
+        return ollama_astream(prompt)
+
+
+class OpenAIBackend:
+    """Any OpenAI-compatible /chat/completions server (vLLM, llama.cpp, TGI...)."""
+
+    def __init__(self, base_url: str = None, api_key: str = None, model: str = None):
+        self.url = (base_url or CONFIG.openai_base_url).rstrip("/") + "/chat/completions"
+        self.api_key = CONFIG.openai_api_key if api_key is None else api_key
+        self.model = model or CONFIG.model
+
+    def _body(self, prompt: str, stream: bool) -> dict:
+        return {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": CONFIG.temperature,
+            "max_tokens": CONFIG.max_tokens,
+            "stream": stream,
+        }
+
+    def _headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+
+    @staticmethod
+    def _delta(line: str):
+        """Content of one SSE line, None when the stream is finished."""
+        if not line.startswith("data:"):
+            return ""
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return None
+        choice = json.loads(data)["choices"][0]
+        return (choice.get("delta") or {}).get("content") or ""
+
+    def complete(self, prompt: str) -> str:
+        response = requests.post(self.url, json=self._body(prompt, False), headers=self._headers(),
+                                 timeout=CONFIG.llm_timeout)
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"]["content"].strip()
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        with requests.post(self.url, json=self._body(prompt, True), headers=self._headers(),
+                           stream=True, timeout=CONFIG.llm_timeout) as response:
+            response.raise_for_status()
+            for line in response.iter_lines(decode_unicode=True):
+                token = self._delta(line or "")
+                if token is None:
+                    break
+                if token:
+                    yield token
+
+    async def acomplete(self, prompt: str) -> str:
+        from src.sql.generator import get_async_client
+        response = await get_async_client().post(self.url, json=self._body(prompt, False), headers=self._headers())
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"]["content"].strip()
+
+    async def astream(self, prompt: str) -> AsyncIterator[str]:
+        from src.sql.generator import get_async_client
+        async with get_async_client().stream(
+            "POST", self.url, json=self._body(prompt, True), headers=self._headers()
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                token = self._delta(line)
+                if token is None:
+                    break
+                if token:
+                    yield token
+
+
+# The asked question is the last Q: line; few-shot examples come before it
+_QUESTION = re.compile(r"Q:[ \t]*([^\n]+?)\s*\nSQL:\s*$")
+_TOKEN = re.compile(r"\S+\s*|\s+")
+
+
+def load_recorded_responses(results_dir=None) -> dict:
+    """normalized question -> SQL from data/results/*.json.
+
+    Recorded generations (details[].generated_sql) win over gold SQL from
+    test_questions.json, so the stub reproduces the model's real output.
+    """
+    results_dir = results_dir or CONFIG.data_dir / "results"
+    gold, recorded = {}, {}
+    for path in sorted(results_dir.glob("*.json")):
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        items = data if isinstance(data, list) else data.get("details", []) if isinstance(data, dict) else []
+        for item in items:
+            if not isinstance(item, dict) or "question" not in item:
+                continue
+            key = normalize_question(item["question"])
+            if item.get("generated_sql"):
+                recorded.setdefault(key, item["generated_sql"])
+            elif item.get("sql"):
+                gold.setdefault(key, " ".join(item["sql"].split()) + ";")
+    return {**gold, **recorded}
+
+
+class StubBackend:
+    """Deterministic local backend: replays recorded responses with
+    simulated prefill latency and token rate, for CPU-only load tests.
+    """
+
+    def __init__(self, responses: dict = None, latency_ms: float = None, tokens_per_second: float = None):
+        self.responses = load_recorded_responses() if responses is None else responses
+        self.latency = (CONFIG.stub_latency_ms if latency_ms is None else latency_ms) / 1000
+        rate = CONFIG.stub_tokens_per_second if tokens_per_second is None else tokens_per_second
+        self.token_delay = 1 / rate if rate else 0.0
+
+    def respond(self, prompt: str) -> str:
+        """Recorded SQL for the prompt's question; unknown questions map to a
+        recorded response chosen by hash, so results are stable.
+        """
+        match = _QUESTION.match(prompt[prompt.rfind("Q:"):])
+        key = normalize_question(match.group(1) if match else prompt)
+        if key in self.responses:
+            return self.responses[key]
+        if not self.responses:
+            return "SELECT 1;"
+        choices = sorted(self.responses.values())
+        return choices[int(hashlib.md5(key.encode()).hexdigest(), 16) % len(choices)]
+
+    def _tokens(self, prompt: str) -> list:
+        return _TOKEN.findall(self.respond(prompt))
+
+    def complete(self, prompt: str) -> str:
+        tokens = self._tokens(prompt)
+        time.sleep(self.latency + len(tokens) * self.token_delay)
+        return "".join(tokens).strip()
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        time.sleep(self.latency)
+        for token in self._tokens(prompt):
+            time.sleep(self.token_delay)
+            yield token
+
+    async def acomplete(self, prompt: str) -> str:
+        tokens = self._tokens(prompt)
+        await asyncio.sleep(self.latency + len(tokens) * self.token_delay)
+        return "".join(tokens).strip()
+
+    async def astream(self, prompt: str) -> AsyncIterator[str]:
+        await asyncio.sleep(self.latency)
+        for token in self._tokens(prompt):
+            await asyncio.sleep(self.token_delay)
+            yield token
+
+
+BACKENDS = {"ollama": OllamaBackend, "openai": OpenAIBackend, "stub": StubBackend}
+
+_backend = None
+_backend_name = None
+
+
+def get_backend() -> LLMBackend:
+    """Backend selected by CONFIG.llm_backend, created on first use."""
+    global _backend, _backend_name
+    if _backend is None or _backend_name != CONFIG.llm_backend:
+        if CONFIG.llm_backend not in BACKENDS:
+            raise ValueError(f"Unknown llm_backend {CONFIG.llm_backend!r} (expected one of {sorted(BACKENDS)})")
+        _backend = BACKENDS[CONFIG.llm_backend]()
+        _backend_name = CONFIG.llm_backend
+    return _backend
@@ -0,0 +1,115 @@
+import asyncio
+import time
+from src.config.settings import CONFIG
+
+_DONE = object()
+
+
+async def _generate(record: dict) -> dict:
+    from src.sql import generator
+    from src.sql.cache import get_query_cache
+    from src.sql.scheduler import get_scheduler
+    cache = get_query_cache() if CONFIG.cache_enabled else None
+    hit = await asyncio.to_thread(cache.get, record["question"]) if cache else None
+    if hit:
+        record["sql"], record["cached"] = hit
+    elif CONFIG.scheduler_enabled:
+        # Single-flight with /query; the scheduled agenerate_sql also self-corrects
+        record["sql"] = await get_scheduler().submit(record["question"])
+    else:
+        record["sql"] = await generator.adraft_sql(record["question"])
+    return record
+
+
+async def _validate(record: dict) -> dict:
+    from src.sql import generator
+    from src.sql.correction import acorrect_sql
+    if not record["cached"] and not CONFIG.scheduler_enabled:
+        record["sql"] = await acorrect_sql(record["question"], record["sql"], generator.acomplete)
+    return record
+
+
+async def _execute(record: dict, engine: str = None, limit: int = None) -> dict:
+    from src.api.serialization import records
+    from src.sql.cache import get_query_cache
+    from src.sql.executor import execute_sql
+    from src.sql.query_log import log_query
+    if record["sql"].startswith("ERROR:"):
+        record["success"], record["error"] = False, record["sql"]
+        return record
+    success, result, error = await asyncio.to_thread(execute_sql, record["sql"], None, engine)
+    record["success"], record["error"] = success, error
+    if success:
+        record["row_count"] = len(result)
+        if limit is not None and len(result) > limit:
+            result = result.head(limit)
+        record["result"] = records(result)
+        await asyncio.to_thread(log_query, record["question"], record["sql"])
+        if CONFIG.cache_enabled and not record["cached"]:
+            await asyncio.to_thread(get_query_cache().put, record["question"], record["sql"])
+    return record
+
+
+async def _stage(name: str, fn, workers: int, inbox: asyncio.Queue, outbox: asyncio.Queue):
+    """Run fn on each record from inbox with `workers` tasks, passing results on.
+
+    Records that already failed skip fn. A record whose fn raises leaves
+    with success False and the error. _DONE goes downstream once the
+    inbox is drained.
+    """
+    async def worker():
+        while True:
+            record = await inbox.get()
+            if record is _DONE:
+                await inbox.put(_DONE)  # for the sibling workers
+                return
+            if record["success"] is not False:
+                start = time.perf_counter()
+                try:
+                    record = await fn(record)
+                except Exception as e:
+                    record["success"], record["error"] = False, f"{name}: {e}"
+                record["ms"][name] = (time.perf_counter() - start) * 1000
+            await outbox.put(record)
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    await outbox.put(_DONE)
+
+
+async def run_batch(questions: list, engine: str = None, limit: int = None):
+    """Yield one record per question, in completion order, through a pipeline.
+
+    Generation (LLM), validation (with self-correction) and execution
+    (SQLite or DuckDB, in threads) are separate stages joined by bounded
+    queues, so one question's SQL runs while the next ones generate.
+    With scheduler_enabled, generation goes through the same scheduler as
+    /query (single-flight, concurrency cap, shedding) and is corrected
+    there, so validation has nothing left to do. Each record carries the
+    question's input index. Cached questions skip the LLM and validation.
+    """
+    size = CONFIG.batch_queue_size
+    queues = [asyncio.Queue(size) for _ in range(4)]
+    stages = [
+        ("generate", _generate, CONFIG.batch_generate_workers),
+        ("validate", _validate, CONFIG.batch_validate_workers),
+        ("execute", lambda r: _execute(r, engine, limit), CONFIG.batch_execute_workers),
+    ]
+
+    async def feed():
+        for index, question in enumerate(questions):
+            await queues[0].put({"index": index, "question": question, "sql": None, "success": None,
+                                 "result": None, "row_count": None, "error": None, "cached": None, "ms": {}})
+        await queues[0].put(_DONE)
+
+    tasks = [asyncio.create_task(feed())]
+    for i, (name, fn, workers) in enumerate(stages):
+        tasks.append(asyncio.create_task(_stage(name, fn, workers, queues[i], queues[i + 1])))
+    try:
+        while (record := await queues[-1].get()) is not _DONE:
+            record["success"] = bool(record["success"])
+            yield record
+    finally:
+        # The consumer went away (client disconnect): stop the stages
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,202 @@
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+import numpy as np
+from src.config.settings import CONFIG
+from src.sql import embeddings
+
+# Numbers and quoted values: questions that differ only in these embed alike
+_LITERAL = re.compile(r"'[^']*'|\"[^\"]*\"|\d+(?:[.,]\d+)*")
+
+
+def _sha(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def normalize_question(question: str) -> str:
+    """Normalize question text for exact-match lookups."""
+    question = " ".join(question.lower().split())
+    return question.rstrip(" ?!.")
+
+
+def question_literals(question: str) -> tuple:
+    """Numbers and quoted strings in a question, in order."""
+    return tuple(_LITERAL.findall(normalize_question(question)))
+
+
+def context_key() -> str:
+    """Hash everything besides the question that changes the generated SQL.
+
+    The schema and examples are the ones build_prompt uses: the live schema
+    index (tables, columns, sample values) and the example bank, or the
+    static fallbacks when those are off or unavailable.
+    """
+    from src.sql.examples import examples_key
+    from src.sql.generator import SCHEMA, FEW_SHOT_EXAMPLES, PROMPT_TEMPLATE
+    from src.sql.schema_index import schema_key
+    parts = [
+        CONFIG.model,
+        str(CONFIG.temperature),
+        _sha(PROMPT_TEMPLATE),
+        f"schema:{schema_key() or _sha(SCHEMA)}:{CONFIG.schema_top_k}",
+        f"examples:{examples_key() or _sha(FEW_SHOT_EXAMPLES)}:{CONFIG.few_shot_k}",
+    ]
+    return _sha("|".join(parts))
+
+
+class QueryCache:
+    """Persistent question -> SQL cache with exact and nearest-neighbour tiers.
+
+    A nearest-neighbour hit also needs the same numbers and quoted values
+    as the cached question ("top 5" never answers "top 10").
+    """
+
+    def __init__(self, path=None, max_entries=None, ttl_seconds=None, similarity_threshold=None):
+        self.path = path or CONFIG.cache_path
+        self.max_entries = CONFIG.cache_max_entries if max_entries is None else max_entries
+        self.ttl_seconds = CONFIG.cache_ttl_seconds if ttl_seconds is None else ttl_seconds
+        self.similarity_threshold = (
+            CONFIG.cache_similarity_threshold if similarity_threshold is None else similarity_threshold
+        )
+        self.hits_exact = 0
+        self.hits_semantic = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._vectors = {}
+        self._data_version = None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                context TEXT,
+                question TEXT,
+                sql TEXT,
+                embedder TEXT,
+                embedding BLOB,
+                created_at REAL,
+                last_access REAL,
+                hits INTEGER DEFAULT 0
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_context ON entries(context, embedder)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_access ON entries(last_access)")
+        self._conn.commit()
+
+    def get(self, question: str):
+        """Return (sql, tier) for a cached question, or None on a miss."""
+        context = context_key()
+        normalized = normalize_question(question)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT key, sql FROM entries WHERE key = ? AND created_at > ?",
+                (_sha(context + normalized), now - self.ttl_seconds)
+            ).fetchone()
+            tier = "exact"
+            if row is None and self.similarity_threshold > 0:
+                row = self._nearest(context, normalized, now)
+                tier = "semantic"
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE entries SET last_access = ?, hits = hits + 1 WHERE key = ?", (now, row[0])
+            )
+            self._conn.commit()
+            if tier == "exact":
+                self.hits_exact += 1
+            else:
+                self.hits_semantic += 1
+            return row[1], tier
+
+    def _nearest(self, context: str, normalized: str, now: float):
+        embedder = embeddings.embedder_id()
+        # Other workers write the same file; their commits bump data_version
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            self._vectors.clear()
+            self._data_version = version
+        if context not in self._vectors:
+            rows = self._conn.execute(
+                "SELECT key, sql, embedding, created_at, question FROM entries WHERE context = ? AND embedder = ?",
+                (context, embedder)
+            ).fetchall()
+            if rows:
+                matrix = np.stack([np.frombuffer(r[2], dtype=np.float32) for r in rows])
+            else:
+                matrix = np.zeros((0, 0), dtype=np.float32)
+            self._vectors[context] = ([(r[0], r[1], r[3], question_literals(r[4])) for r in rows], matrix)
+        entries, matrix = self._vectors[context]
+        literals = question_literals(normalized)
+        same = [i for i, entry in enumerate(entries) if entry[3] == literals]
+        if not same:
+            return None
+        scores = matrix[same] @ embeddings.embed_one(normalized)
+        best = int(np.argmax(scores))
+        key, sql, created_at, _ = entries[same[best]]
+        if scores[best] < self.similarity_threshold or created_at <= now - self.ttl_seconds:
+            return None
+        return key, sql
+
+    def put(self, question: str, sql: str):
+        """Store the SQL generated for a question."""
+        context = context_key()
+        normalized = normalize_question(question)
+        vector = embeddings.embed_one(normalized)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(key, context, question, sql, embedder, embedding, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (_sha(context + normalized), context, normalized, sql,
+                 embeddings.embedder_id(), vector.astype(np.float32).tobytes(), now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+            self._vectors.clear()
+
+    def _evict(self, now: float):
+        """Drop expired entries, then the least recently used beyond max_entries."""
+        self._conn.execute("DELETE FROM entries WHERE created_at <= ?", (now - self.ttl_seconds,))
+        self._conn.execute(
+            "DELETE FROM entries WHERE key IN ("
+            "SELECT key FROM entries ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+    def clear(self):
+        """Remove every entry and reset counters."""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+            self._vectors.clear()
+            self.hits_exact = self.hits_semantic = self.misses = 0
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        lookups = self.hits_exact + self.hits_semantic + self.misses
+        return {
+            "entries": entries,
+            "hits_exact": self.hits_exact,
+            "hits_semantic": self.hits_semantic,
+            "misses": self.misses,
+            "hit_ratio": (self.hits_exact + self.hits_semantic) / lookups if lookups else 0.0,
+        }
+
+
+_cache = None
+
+
+def get_query_cache() -> QueryCache:
+    """Shared cache instance backed by CONFIG.cache_path."""
+    global _cache
+    if _cache is None:
+        _cache = QueryCache()
+    return _cache
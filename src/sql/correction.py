@@ -0,0 +1,253 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from sqlglot import exp
+from sqlglot.errors import ParseError
+from src.config.settings import CONFIG
+from src.sql.parsing import parse
+from src.sql.telemetry import span
+
+CORRECTION_PROMPT = """The following SQLite query for an e-commerce database is invalid.
+
+{schema}
+
+Failed SQL: {sql}
+Error: {error}
+
+Return ONLY the corrected SQL query.
+
+Q: {question}
+SQL:"""
+
+_local = threading.local()
+_stats_lock = threading.Lock()
+_stats = {"validated": 0, "invalid": 0, "fix_cache_hits": 0, "llm_corrections": 0, "fixed": 0, "unfixed": 0}
+
+
+def _count(name: str, n: int = 1):
+    with _stats_lock:
+        _stats[name] += n
+
+
+def _schema_source() -> tuple:
+    """(version, path) of the live database, else of schema.sql, else (version, None)."""
+    for path in (CONFIG.db_path, CONFIG.db_path.parent / "schema.sql"):
+        if path.exists():
+            return f"{path}:{path.stat().st_mtime_ns}", path
+    return "SCHEMA", None
+
+
+def _schema_ddl(path) -> list:
+    """CREATE statements to rebuild the schema from path (None: the prompt SCHEMA)."""
+    if path is None:
+        from src.sql.generator import SCHEMA
+        return [_ddl_from_summary(SCHEMA)]
+    if path.suffix == ".sql":
+        return [path.read_text()]
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE sql IS NOT NULL AND type IN ('table', 'view') "
+            "AND name NOT LIKE 'sqlite_%' ORDER BY rowid"
+        ).fetchall()
+    finally:
+        conn.close()
+    return [r[0] for r in rows]
+
+
+def _ddl_from_summary(schema: str) -> str:
+    """CREATE TABLEs from the prompt's "- table(col, ...)" lines."""
+    statements = []
+    for line in schema.splitlines():
+        line = line.strip().lstrip("- ")
+        if "(" in line and line.endswith(")"):
+            table, columns = line[:-1].split("(", 1)
+            statements.append(f"CREATE TABLE {table.strip()} ({columns});")
+    return "\n".join(statements)
+
+
+def schema_connection() -> sqlite3.Connection:
+    """Per-thread in-memory SQLite holding only the schema (no rows).
+
+    EXPLAIN against it resolves every table, column and function without
+    touching data; it is rebuilt when the live database changes.
+    """
+    version, path = _schema_source()
+    if getattr(_local, "version", None) != version:
+        conn = sqlite3.connect(":memory:")
+        for statement in _schema_ddl(path):
+            try:
+                conn.executescript(statement)
+            except sqlite3.Error:
+                pass  # e.g. a view over a table this build does not have
+        _local.conn, _local.version = conn, version
+    return _local.conn
+
+
+def validate_sql(sql: str):
+    """Error message for sql, or None when it would compile against the schema."""
+    _count("validated")
+    with span("validate"):
+        error = _validate(sql)
+    if error:
+        _count("invalid")
+    return error
+
+
+def _validate(sql: str):
+    sql = sql.strip().rstrip(";").strip()
+    if not sql:
+        return "Empty query"
+    parse_error = None
+    try:
+        if not isinstance(parse(sql), exp.Query):
+            return "Only SELECT queries are allowed"
+    except ParseError as e:
+        first = e.errors[0] if e.errors else {}
+        parse_error = f"{first.get('description', 'Parse error')} (line {first.get('line')}, col {first.get('col')})"
+    try:
+        schema_connection().execute(f"EXPLAIN {sql}")
+    except sqlite3.Error as e:
+        return f"{e}; {parse_error}" if parse_error else str(e)
+    # sqlglot is stricter than SQLite in places; SQLite has the last word
+    return None
+
+
+class FixCache:
+    """Bounded LRU of (failed SQL, error) -> corrected SQL.
+
+    With shared, misses fall through to the cross-worker SharedCache.
+    """
+
+    def __init__(self, max_entries: int = None, shared: bool = False):
+        self.max_entries = max_entries or CONFIG.fix_cache_max_entries
+        self.shared = shared
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(sql: str, error: str) -> str:
+        # The schema version is read here, not from the validating thread's state:
+        # acorrect_sql validates in worker threads but looks fixes up on the loop
+        normalized = " ".join(sql.lower().split()).rstrip(";")
+        return hashlib.sha256(f"{_schema_source()[0]}|{normalized}|{error}".encode()).hexdigest()
+
+    def get(self, sql: str, error: str):
+        key = self.key(sql, error)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        shared = self._shared()
+        value = shared.get(f"fix|{key}") if shared else None
+        if value is None:
+            return None
+        self._store(key, value.decode())
+        return value.decode()
+
+    def put(self, sql: str, error: str, fixed: str):
+        key = self.key(sql, error)
+        self._store(key, fixed)
+        shared = self._shared()
+        if shared:
+            shared.put(f"fix|{key}", fixed.encode())
+
+    def _store(self, key: str, fixed: str):
+        with self._lock:
+            self._entries[key] = fixed
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _shared(self):
+        if not self.shared:
+            return None
+        from src.sql.shared_cache import get_shared_cache
+        return get_shared_cache()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_fixes = FixCache(shared=True)
+
+
+def correction_prompt(question: str, sql: str, error: str) -> str:
+    from src.sql.generator import SCHEMA
+    from src.sql.schema_index import relevant_schema
+    return CORRECTION_PROMPT.format(schema=relevant_schema(question) or SCHEMA, sql=sql, error=error, question=question)
+
+
+def _skip(sql: str) -> bool:
+    # Backend failures are not fixable by asking the backend again
+    return not CONFIG.self_correction_enabled or sql.startswith("ERROR:")
+
+
+def _correction(question: str, sql: str):
+    """The validate-and-retry loop, shared by correct_sql and acorrect_sql.
+
+    Yields ("validate", sql) and ("complete", prompt) steps, is sent back the
+    validation error (None when valid) or the completion, and returns the
+    first valid SQL, or the last attempt.
+    """
+    from src.sql.generator import extract_sql
+    if _skip(sql):
+        return sql
+    original, original_error = sql, (yield "validate", sql)
+    error = original_error
+    if error is None:
+        return sql
+    cached = _fixes.get(sql, error)
+    if cached:
+        _count("fix_cache_hits")
+        return cached
+    for _ in range(CONFIG.max_retries):
+        _count("llm_corrections")
+        sql = extract_sql((yield "complete", correction_prompt(question, sql, error)))
+        if sql.startswith("ERROR:"):
+            break
+        error = yield "validate", sql
+        if error is None:
+            _count("fixed")
+            _fixes.put(original, original_error, sql)
+            return sql
+    _count("unfixed")
+    return sql
+
+
+def correct_sql(question: str, sql: str, complete) -> str:
+    """Validate sql and, up to CONFIG.max_retries times, ask complete(prompt)
+    for a fix. Returns the first valid SQL, or the last attempt.
+    """
+    steps = _correction(question, sql)
+    try:
+        kind, arg = next(steps)
+        while True:
+            kind, arg = steps.send(validate_sql(arg) if kind == "validate" else complete(arg))
+    except StopIteration as done:
+        return done.value
+
+
+async def acorrect_sql(question: str, sql: str, acomplete) -> str:
+    """correct_sql with an async completion function; validation runs in a thread."""
+    steps = _correction(question, sql)
+    try:
+        kind, arg = next(steps)
+        while True:
+            if kind == "validate":
+                result = await asyncio.to_thread(validate_sql, arg)
+            else:
+                result = await acomplete(arg)
+            kind, arg = steps.send(result)
+    except StopIteration as done:
+        return done.value
+
+
+def correction_stats() -> dict:
+    """Validation and self-correction counters."""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["fix_cache_entries"] = len(_fixes)
+    return stats
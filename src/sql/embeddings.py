@@ -0,0 +1,53 @@
+import hashlib
+from functools import lru_cache
+import numpy as np
+from src.config.settings import CONFIG
+
+HASH_DIM = 384
+
+_model = None
+
+
+def _load_model():
+    """Load the sentence-transformers model once, or None if unavailable."""
+    global _model
+    if _model is None:
+        try:
+            from sentence_transformers import SentenceTransformer
+            _model = SentenceTransformer(CONFIG.embedding_model)
+        except Exception:
+            _model = False
+    return _model or None
+
+
+def embedder_id() -> str:
+    """Identify the active embedder so vectors from different ones never mix."""
+    return CONFIG.embedding_model if _load_model() else f"hash-{HASH_DIM}"
+
+
+def _hash_embed(text: str) -> np.ndarray:
+    """Character trigram hashing fallback when no model is installed."""
+    vec = np.zeros(HASH_DIM, dtype=np.float32)
+    text = f"  {' '.join(text.lower().split())}  "
+    for i in range(len(text) - 2):
+        digest = hashlib.md5(text[i:i + 3].encode()).digest()
+        vec[int.from_bytes(digest[:4], "little") % HASH_DIM] += 1.0
+    return vec
+
+
+def embed(texts: list) -> np.ndarray:
+    """Embed texts into L2-normalized float32 rows."""
+    model = _load_model()
+    if model:
+        vectors = np.asarray(model.encode(list(texts)), dtype=np.float32)
+    else:
+        vectors = np.stack([_hash_embed(t) for t in texts]) if texts else np.zeros((0, HASH_DIM), dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+@lru_cache(maxsize=1024)
+def embed_one(text: str) -> np.ndarray:
+    """Embed a single text, memoized for repeated questions."""
+    return embed([text])[0]
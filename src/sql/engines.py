@@ -0,0 +1,306 @@
+import datetime
+import json
+import shutil
+import sqlite3
+import threading
+from pathlib import Path
+import pandas as pd
+from sqlglot import exp
+from sqlglot.optimizer.annotate_types import annotate_types
+from sqlglot.optimizer.qualify import qualify
+from src.config.settings import CONFIG
+from src.sql.guard import QueryRejected
+from src.sql.parsing import DIALECT, db_schema, parse
+from src.sql.result_cache import data_version
+from src.sql.summaries import CHANGES_TABLE, META_TABLE
+
+try:
+    import duckdb
+except ImportError:  # optional: SQLite runs everything without it
+    duckdb = None
+
+ENGINES = ("sqlite", "duckdb", "auto")
+DUCK_TYPES = {"INTEGER": "BIGINT", "REAL": "DOUBLE", "TEXT": "VARCHAR"}
+_PANDAS_TYPES = {"BIGINT": "Int64", "DOUBLE": "Float64"}
+_VERSION_FILE = "_version.json"
+
+
+class TranslationError(Exception):
+    """Raised when a query can't be run on DuckDB with SQLite's semantics."""
+
+
+def duckdb_available() -> bool:
+    return duckdb is not None
+
+
+def _julianday(node):
+    arg = node.expressions[0] if node.expressions else exp.Literal.string("now")
+    if isinstance(arg, exp.Literal) and arg.is_string and arg.this.lower() == "now":
+        timestamp = exp.CurrentTimestamp()
+    else:
+        timestamp = exp.TryCast(this=arg, to=exp.DataType.build("TIMESTAMP"))
+    seconds = exp.Anonymous(this="EPOCH", expressions=[timestamp])
+    days = exp.Div(this=seconds, expression=exp.Literal.number("86400.0"))
+    return exp.paren(exp.Add(this=days, expression=exp.Literal.number("2440587.5")), copy=False)
+
+
+def _rewrite(node):
+    if isinstance(node, exp.Anonymous) and node.name.upper() == "JULIANDAY":
+        return _julianday(node)
+    # SQLite's ROUND always returns REAL, DuckDB's keeps integer input integral
+    if isinstance(node, exp.Round) and not isinstance(node.this, exp.Cast):
+        node.set("this", exp.cast(node.this, exp.DataType.build("DOUBLE")))
+    # SQLite's LIKE ignores ASCII case, DuckDB's doesn't
+    if isinstance(node, exp.Like):
+        return exp.ILike(**node.args)
+    return node
+
+
+def _truncate_casts(node):
+    # SQLite's CAST(x AS INTEGER) is 64-bit and truncates toward zero, DuckDB's rounds
+    if isinstance(node, exp.Cast) and node.to.is_type(*exp.DataType.INTEGER_TYPES):
+        if not node.this.type.is_type(*exp.DataType.INTEGER_TYPES):
+            value = exp.cast(node.this, exp.DataType.build("DOUBLE"))
+            node.set("this", exp.Anonymous(this="TRUNC", expressions=[value]))
+        node.set("to", exp.DataType.build("BIGINT"))
+    return node
+
+
+def translate(sql: str, schema: dict) -> str:
+    """DuckDB SQL with SQLite's semantics for a SQLite SELECT.
+
+    julianday() becomes epoch arithmetic, ROUND gets a REAL argument, LIKE
+    becomes ILIKE and, with column types from the schema, integer
+    division stays integral and integer casts truncate.
+    Output column names are not preserved; callers rename positionally.
+    """
+    try:
+        tree = parse(sql)
+        if not isinstance(tree, exp.Query):
+            raise TranslationError("Only SELECT queries run on DuckDB")
+        tree = qualify(tree.transform(_rewrite), schema=schema, dialect=DIALECT, quote_identifiers=False)
+        return annotate_types(tree, schema=schema, dialect=DIALECT).transform(_truncate_casts).sql("duckdb")
+    except TranslationError:
+        raise
+    except Exception as e:
+        raise TranslationError(f"Cannot translate for DuckDB: {e}") from e
+
+
+def base_tables(conn) -> dict:
+    """Declared column types of the data tables (summaries excluded)."""
+    schema = db_schema(conn)
+    skip = {name.lower() for name in CONFIG.summary_tables} | {META_TABLE.lower(), CHANGES_TABLE.lower()}
+    return {t: cols for t, cols in schema.items() if t not in skip and not t.startswith("sqlite_")}
+
+
+def _chunk_frame(rows: list, columns: dict) -> pd.DataFrame:
+    values = list(zip(*rows)) if rows else [()] * len(columns)
+    data = {}
+    for (name, declared), column in zip(columns.items(), values):
+        kind = _PANDAS_TYPES.get(DUCK_TYPES.get(declared.upper()))
+        data[name] = pd.array(column, dtype=kind) if kind else pd.Series(column, dtype=object)
+    return pd.DataFrame(data)
+
+
+def export_parquet(db_path: Path = None, directory: Path = None) -> Path:
+    """Write every data table to Parquet, one file per chunk of rows.
+
+    Columns get the DuckDB types of their declared SQLite types. The
+    export is built beside the target and swapped in when complete; its
+    _version.json records the data_version it was taken at.
+    """
+    db_path = Path(db_path or CONFIG.db_path)
+    directory = Path(directory or CONFIG.parquet_dir)
+    version = data_version(db_path)
+    staging = directory.with_name(directory.name + ".tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    duck = duckdb.connect()
+    try:
+        for table, columns in base_tables(conn).items():
+            (staging / table).mkdir()
+            select = ", ".join(f'CAST("{c}" AS {DUCK_TYPES.get(t.upper(), "VARCHAR")}) AS "{c}"'
+                               for c, t in columns.items())
+            cursor = conn.execute(f'SELECT * FROM "{table}"')
+            part = 0
+            while True:
+                rows = cursor.fetchmany(CONFIG.ingest_chunk_rows)
+                if rows or part == 0:
+                    duck.register("chunk", _chunk_frame(rows, columns))
+                    target = staging / table / f"part-{part:05d}.parquet"
+                    duck.execute(f"COPY (SELECT {select} FROM chunk) TO '{target}' (FORMAT parquet)")
+                    duck.unregister("chunk")
+                    part += 1
+                if not rows:
+                    break
+        (staging / _VERSION_FILE).write_text(json.dumps(version))
+    finally:
+        duck.close()
+        conn.close()
+    old = directory.with_name(directory.name + ".old")
+    shutil.rmtree(old, ignore_errors=True)
+    if directory.exists():
+        directory.rename(old)
+    staging.rename(directory)
+    shutil.rmtree(old, ignore_errors=True)
+    return directory
+
+
+def _converter(type_name: str):
+    """Python values as sqlite3 would return them for one DuckDB result type."""
+    if type_name == "DATE":
+        return lambda v: v.isoformat() if v is not None else None
+    if type_name.startswith("TIMESTAMP"):
+        return lambda v: v.isoformat(" ") if isinstance(v, datetime.datetime) else v
+    if type_name == "BOOLEAN":
+        return lambda v: int(v) if v is not None else None
+    return None
+
+
+class DuckDBEngine:
+    """Embedded DuckDB over a Parquet export of the database, or the file itself.
+
+    With source "sqlite" the database is attached read-only through
+    DuckDB's sqlite extension and is always current; with "parquet"
+    (the default) views read CONFIG.parquet_dir, which is re-exported
+    when the database changes.
+    """
+
+    def __init__(self, db_path: Path = None, source: str = None, directory: Path = None):
+        self.db_path = Path(db_path or CONFIG.db_path)
+        self.source = source or CONFIG.duckdb_source
+        self.directory = Path(directory or CONFIG.parquet_dir)
+        self._conn = None
+        self._version = None
+        self._lock = threading.Lock()
+        self._users = {}  # connection -> open cursors; a replaced connection closes with its last cursor
+        self._exporting = None
+        self.queries = 0
+        self.exports = 0
+
+    def export_version(self):
+        try:
+            return json.loads((self.directory / _VERSION_FILE).read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def current(self) -> bool:
+        """True when queries would see the database as it is now."""
+        if self.source == "sqlite":
+            return True
+        # Compared in JSON form, as stored
+        return self.export_version() == json.loads(json.dumps(data_version(self.db_path)))
+
+    def refresh(self):
+        """Re-export when stale and (re)create the views; blocks until done."""
+        with self._lock:
+            self._refresh()
+
+    def _refresh(self):
+        # Caller holds self._lock
+        if self.source == "parquet" and not self.current():
+            export_parquet(self.db_path, self.directory)
+            self.exports += 1
+        version = self.export_version() if self.source == "parquet" else self.db_path
+        if self._conn is None or self._version != version:
+            self._open()
+            self._version = version
+
+    def refresh_in_background(self):
+        """Start one refresh thread, unless one is already running."""
+        with self._lock:
+            if self._exporting and self._exporting.is_alive():
+                return
+            self._exporting = threading.Thread(target=self.refresh, daemon=True)
+            self._exporting.start()
+
+    def _open(self):
+        conn = duckdb.connect()
+        if CONFIG.duckdb_threads:
+            conn.execute(f"SET threads = {int(CONFIG.duckdb_threads)}")
+        if self.source == "sqlite":
+            conn.execute("INSTALL sqlite")
+            conn.execute("LOAD sqlite")
+            conn.execute(f"ATTACH '{self.db_path}' AS source (TYPE sqlite, READ_ONLY)")
+            conn.execute("USE source")
+        else:
+            for table in sorted(p.name for p in self.directory.iterdir() if p.is_dir()):
+                conn.execute(f"CREATE OR REPLACE VIEW \"{table}\" AS "
+                             f"SELECT * FROM read_parquet('{self.directory / table}/*.parquet')")
+        old, self._conn = self._conn, conn
+        if old is not None and not self._users.get(old):
+            old.close()
+
+    def _checkout(self):
+        """Refresh, then a cursor on the current connection, under the lock."""
+        with self._lock:
+            self._refresh()
+            conn = self._conn
+            cursor = conn.cursor()
+            self._users[conn] = self._users.get(conn, 0) + 1
+            return conn, cursor
+
+    def _checkin(self, conn, cursor):
+        cursor.close()
+        with self._lock:
+            self._users[conn] -= 1
+            if not self._users[conn]:
+                del self._users[conn]
+                if conn is not self._conn:
+                    conn.close()
+
+    def iter_rows(self, sql: str, schema: dict, batch_size: int, timeout: float = None):
+        """Yield row batches for sql (the first always, even empty).
+
+        Raises TranslationError before running anything when the query
+        can't keep SQLite's semantics, QueryRejected past the time budget.
+        """
+        translated = translate(sql, schema)
+        conn, cursor = self._checkout()
+        timer = threading.Timer(timeout, cursor.interrupt) if timeout else None
+        try:
+            if timer:
+                timer.start()
+            try:
+                cursor.execute(translated)
+            except duckdb.InterruptException as e:
+                raise QueryRejected(f"Query exceeded time budget ({timeout}s)") from e
+            self.queries += 1
+            converters = [(i, f) for i, d in enumerate(cursor.description or [])
+                          if (f := _converter(str(d[1]).upper()))]
+            first = True
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch and not first:
+                    break
+                first = False
+                if converters:
+                    batch = [list(row) for row in batch]
+                    for row in batch:
+                        for i, convert in converters:
+                            row[i] = convert(row[i])
+                    batch = [tuple(row) for row in batch]
+                yield batch
+                if not batch:
+                    break
+        finally:
+            if timer:
+                timer.cancel()
+            self._checkin(conn, cursor)
+
+    def stats(self) -> dict:
+        return {"source": self.source, "current": self.current(), "queries": self.queries, "exports": self.exports}
+
+
+_engine = None
+
+
+def get_duckdb_engine() -> DuckDBEngine:
+    """Process-wide DuckDB engine for CONFIG.db_path, created on first use."""
+    global _engine
+    if duckdb is None:
+        raise ValueError("The duckdb engine needs the duckdb package (pip install duckdb)")
+    if _engine is None or _engine.db_path != Path(CONFIG.db_path) or _engine.source != CONFIG.duckdb_source:
+        _engine = DuckDBEngine()
+    return _engine
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import re
+import threading
+import numpy as np
+from src.config.settings import CONFIG
+from src.sql import embeddings
+from src.sql.cache import normalize_question
+
+_EXAMPLE = re.compile(r"^Q:\s*(.+?)\s*\nSQL:\s*(.+?)\s*$", re.M)
+
+
+def parse_examples(text: str) -> list:
+    """(question, sql) pairs from FEW_SHOT_EXAMPLES-style "Q: / SQL:" text."""
+    return [(q, sql) for q, sql in _EXAMPLE.findall(text)]
+
+
+def seed_pairs() -> list:
+    """Curated examples, the test set and logged production queries, deduplicated."""
+    from src.sql.generator import FEW_SHOT_EXAMPLES
+    from src.sql.query_log import read_query_log
+    pairs = parse_examples(FEW_SHOT_EXAMPLES)
+    questions_path = CONFIG.data_dir / "results" / "test_questions.json"
+    if questions_path.exists():
+        pairs += [(q["question"], " ".join(q["sql"].split())) for q in json.loads(questions_path.read_text())]
+    pairs += [(e["question"], e["sql"]) for e in read_query_log() if e.get("question") and e.get("sql")]
+    seen, unique = set(), []
+    for question, sql in pairs:
+        key = normalize_question(question)
+        if key not in seen:
+            seen.add(key)
+            unique.append((question, sql))
+    return unique
+
+
+def format_examples(pairs: list) -> str:
+    """Render pairs in the FEW_SHOT_EXAMPLES layout."""
+    blocks = [f"Example {i}:\nQ: {q}\nSQL: {sql.rstrip(';')};" for i, (q, sql) in enumerate(pairs, 1)]
+    return "\n" + "\n\n".join(blocks) + "\n"
+
+
+class ExampleBank:
+    """Question/SQL pairs with a memory-mapped embedding matrix.
+
+    The matrix (CONFIG.example_bank_path + ".npy") and the pairs (".json")
+    are rebuilt when the seed pairs or the embedder change.
+    """
+
+    def __init__(self, pairs: list = None, path=None):
+        self.path = path or CONFIG.example_bank_path
+        pairs = seed_pairs() if pairs is None else pairs
+        self.key = hashlib.sha256(json.dumps([embeddings.embedder_id(), pairs]).encode()).hexdigest()
+        if not self._load(self.key):
+            self.pairs = pairs
+            self.matrix = embeddings.embed([q for q, _ in pairs]) if pairs else np.zeros((0, 1), np.float32)
+            self._save(self.key)
+        self.positions = {}
+        for i, (question, _) in enumerate(self.pairs):
+            self.positions.setdefault(normalize_question(question), []).append(i)
+
+    def _files(self) -> tuple:
+        return self.path.with_suffix(".npy"), self.path.with_suffix(".json")
+
+    def _load(self, key: str) -> bool:
+        matrix_path, meta_path = self._files()
+        try:
+            meta = json.loads(meta_path.read_text())
+            if meta["key"] != key:
+                return False
+            self.pairs = [tuple(p) for p in meta["pairs"]]
+            self.matrix = np.load(matrix_path, mmap_mode="r")
+            return len(self.matrix) == len(self.pairs)
+        except (OSError, ValueError, KeyError):
+            return False
+
+    def _save(self, key: str):
+        matrix_path, meta_path = self._files()
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            np.save(matrix_path, self.matrix)
+            meta_path.write_text(json.dumps({"key": key, "pairs": self.pairs}))
+            self.matrix = np.load(matrix_path, mmap_mode="r")
+        except OSError:
+            pass  # read-only data dir: keep the in-memory matrix
+
+    def select_vector(self, vector: np.ndarray, k: int, exclude: str = None) -> list:
+        """Top-k pairs by dot product with an embedded question."""
+        if not self.pairs:
+            return []
+        scores = self.matrix @ vector
+        # Never show the model the answer to the question it is asked
+        scores[self.positions.get(exclude, [])] = -np.inf
+        k = min(k, len(self.pairs))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [self.pairs[i] for i in top if np.isfinite(scores[i])]
+
+    def select(self, question: str, k: int = None) -> list:
+        """The k examples most similar to the question, best first."""
+        k = k or CONFIG.few_shot_k
+        return self.select_vector(embeddings.embed_one(question), k, exclude=normalize_question(question))
+
+
+_bank = None
+_bank_lock = threading.Lock()
+
+
+def get_example_bank() -> ExampleBank:
+    global _bank
+    with _bank_lock:
+        if _bank is None or _bank.path != CONFIG.example_bank_path:
+            _bank = ExampleBank()
+        return _bank
+
+
+def relevant_examples(question: str):
+    """Formatted nearest examples, or None to use FEW_SHOT_EXAMPLES."""
+    if not CONFIG.example_bank_enabled:
+        return None
+    try:
+        pairs = get_example_bank().select(question)
+        return format_examples(pairs) if pairs else None
+    except Exception:
+        return None
+
+
+def examples_key():
+    """Key of the bank relevant_examples draws from, or None when it falls back to FEW_SHOT_EXAMPLES."""
+    if not CONFIG.example_bank_enabled:
+        return None
+    try:
+        bank = get_example_bank()
+        return bank.key if bank.pairs else None
+    except Exception:
+        return None
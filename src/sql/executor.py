@@ -1,6 +1,17 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
 import sqlite3
 import pandas as pd
 from src.config.settings import CONFIG
+from src.sql.engines import ENGINES, base_tables, duckdb_available, get_duckdb_engine
+from src.sql.guard import QueryRejected, guard_sql, query_budget, table_aliases, table_rows
+from src.sql.pool import get_pool
+from src.sql.result_cache import data_version, get_result_cache
+from src.sql.summaries import CHANGES_TABLE, META_TABLE, get_summary_registry
+from src.sql.telemetry import observe, span
 
 
 def get_connection():
@@ -8,33 +19,225 @@ def get_connection():
     return sqlite3.connect(CONFIG.db_path)
 
 
-def execute_sql(sql: str, conn=None) -> tuple:
-    """Execute SQL and return (success, result, error)."""
-    close_conn = False
+class ResultTooLarge(Exception):
+    """Raised when a result exceeds the configured row or byte cap."""
+
+
+def _row_bytes(row) -> int:
+    return sum(len(v) if isinstance(v, (str, bytes)) else 8 for v in row)
+
+
+def _capped(batches, max_rows: int, max_bytes: int):
+    """Pass row batches through, raising ResultTooLarge once a cap is crossed."""
+    rows_seen = bytes_seen = 0
+    for batch in batches:
+        rows_seen += len(batch)
+        bytes_seen += sum(_row_bytes(r) for r in batch)
+        if rows_seen > max_rows:
+            raise ResultTooLarge(f"Result exceeds {max_rows} rows; add a LIMIT or page with limit/cursor")
+        if bytes_seen > max_bytes:
+            raise ResultTooLarge(f"Result exceeds {max_bytes} bytes")
+        yield batch
+
+
+def _fetch(cursor, batch_size: int):
+    """fetchmany batches; the first always, even when empty."""
+    first = True
+    while True:
+        batch = cursor.fetchmany(batch_size) if cursor.description else []
+        if not batch and not first:
+            break
+        first = False
+        yield batch
+        if not batch:
+            break
+
+
+def iter_sql(sql: str, conn=None, batch_size: int = None, max_rows: int = None, max_bytes: int = None,
+             timeout: float = None):
+    """Yield (columns, rows) batches straight from the cursor via fetchmany.
+
+    The first batch is always yielded, even when empty, so callers get the
+    column names. Generated SQL is routed to fresh summary tables when it
+    matches one, then goes through guard_sql and runs under
+    query_budget; raises ResultTooLarge once a cap is crossed and
+    QueryRejected when the guard or the budget stops the query.
+    """
     if conn is None:
-        conn = get_connection()
-        close_conn = True
+        with get_pool().connection() as pooled:
+            yield from iter_sql(sql, pooled, batch_size, max_rows, max_bytes, timeout)
+        return
+    
+    batch_size = batch_size or CONFIG.fetch_batch_size
+    max_rows = max_rows or CONFIG.max_result_rows
+    max_bytes = max_bytes or CONFIG.max_result_bytes
+    if CONFIG.summaries_enabled:
+        sql = get_summary_registry().rewrite(sql, conn)
+    if CONFIG.guard_enabled:
+        sql = guard_sql(sql, conn)
+    with query_budget(conn, timeout) as budget:
+        try:
+            cursor = conn.execute(sql)
+            columns = [d[0] for d in cursor.description or []]
+            for batch in _capped(_fetch(cursor, batch_size), max_rows, max_bytes):
+                yield columns, batch
+            cursor.close()
+        except sqlite3.OperationalError as e:
+            if budget["reason"]:
+                raise QueryRejected(budget["reason"]) from e
+            raise
+
+
+def iter_duckdb(sql: str, conn, batch_size: int = None, max_rows: int = None, max_bytes: int = None,
+                timeout: float = None):
+    """iter_sql on the DuckDB engine; conn (SQLite) supplies column names and types.
+
+    The guard and summaries are skipped: DuckDB hash-joins and scans
+    columns, which is what they work around. Results are capped as on
+    SQLite (ResultTooLarge, never truncated). Raises TranslationError
+    before running when the query can't keep SQLite's semantics.
+    """
+    timeout = CONFIG.query_timeout_seconds if timeout is None else timeout
+    body = sql.strip().rstrip(";")
+    # LIMIT 0 only prepares: SQLite's own column names, at no cost
+    columns = [d[0] for d in conn.execute(f"SELECT * FROM ({body}) LIMIT 0").description]
+    batches = get_duckdb_engine().iter_rows(body, base_tables(conn), batch_size or CONFIG.fetch_batch_size,
+                                            timeout)
+    for batch in _capped(batches, max_rows or CONFIG.max_result_rows, max_bytes or CONFIG.max_result_bytes):
+        yield columns, batch
+
+
+def choose_engine(sql: str, conn, engine: str = None) -> str:
+    """sqlite or duckdb for this query; auto picks DuckDB once the tables it
+    reads hold duckdb_min_scan_rows rows and the export is current."""
+    engine = engine or CONFIG.sql_engine
+    if engine not in ENGINES:
+        raise ValueError(f"engine must be one of {', '.join(ENGINES)}")
+    if engine != "auto":
+        return engine
+    if not duckdb_available():
+        return "sqlite"
+    rows = sum(table_rows(conn, t) for t in set(table_aliases(sql).values()))
+    if rows < CONFIG.duckdb_min_scan_rows:
+        return "sqlite"
+    duck = get_duckdb_engine()
+    if not duck.current():
+        # Serve this one from SQLite while the export catches up
+        duck.refresh_in_background()
+        return "sqlite"
+    return "duckdb"
+
+
+def _rows(batches) -> tuple:
+    columns, rows = [], []
+    for columns, batch in batches:
+        rows.extend(batch)
+    return columns, rows
+
+
+def execute_sql(sql: str, conn=None, engine: str = None) -> tuple:
+    """Execute SQL and return (success, result, error).
+
+    Without a connection, results come from the result cache when the
+    database is unchanged, else one is checked out of the shared pool.
+    engine (default CONFIG.sql_engine) picks SQLite or DuckDB; with auto,
+    queries DuckDB can't run fall back to SQLite.
+    """
+    if conn is None:
+        pool = get_pool()
+        cache = get_result_cache() if CONFIG.result_cache_enabled else None
+        with span("result_cache"):
+            version = data_version() if cache else None
+            cached = cache.get(sql, version) if cache else None
+        if cached is not None:
+            observe("rows_returned", len(cached))
+            return True, cached, None
+        try:
+            with pool.connection() as pooled:
+                success, result, error = execute_sql(sql, pooled, engine)
+        except Exception as e:
+            return False, None, str(e)
+        if cache and success:
+            cache.put(sql, result, version)
+        if success:
+            observe("rows_returned", len(result))
+        return success, result, error
     
     try:
-        result = pd.read_sql(sql, conn)
+        rows = None
+        if choose_engine(sql, conn, engine) == "duckdb":
+            try:
+                with span("duckdb"):
+                    columns, rows = _rows(iter_duckdb(sql, conn))
+            except Exception:
+                # auto falls back to SQLite for anything DuckDB can't run
+                if (engine or CONFIG.sql_engine) != "auto":
+                    raise
+        if rows is None:
+            with span("sqlite"):
+                columns, rows = _rows(iter_sql(sql, conn))
+        with span("dataframe"):
+            result = pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
         return True, result, None
     except Exception as e:
         return False, None, str(e)
-    finally:
-        if close_conn:
-            conn.close()
+
+
+def _signature(payload: bytes) -> str:
+    digest = hmac.new(CONFIG.cursor_secret.encode(), payload, hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).decode()
+
+
+def encode_cursor(sql: str, offset: int, limit: int) -> str:
+    """Continuation token for the next page of sql, HMAC-signed so clients can't swap the SQL."""
+    payload = base64.urlsafe_b64encode(json.dumps({"sql": sql, "offset": offset, "limit": limit}).encode())
+    return f"{payload.decode()}.{_signature(payload)}"
+
+
+def decode_cursor(token: str) -> tuple:
+    """Return (sql, offset, limit) from a continuation token this server signed."""
+    try:
+        payload, signature = token.encode().split(b".")
+        if not hmac.compare_digest(signature.decode(), _signature(payload)):
+            raise ValueError("bad signature")
+        data = json.loads(base64.urlsafe_b64decode(payload))
+        offset, limit = int(data["offset"]), int(data["limit"])
+        if offset < 0 or limit < 1:
+            raise ValueError("bad page")
+        return data["sql"], offset, limit
+    except Exception:
+        raise ValueError("Invalid continuation token")
+
+
+def execute_page(sql: str, limit: int, offset: int = 0, conn=None, engine: str = None) -> tuple:
+    """Execute one page of sql and return (success, result, error, next_cursor)."""
+    paged = f"SELECT * FROM ({sql.strip().rstrip(';')}) LIMIT {int(limit) + 1} OFFSET {int(offset)}"
+    success, result, error = execute_sql(paged, conn, engine)
+    if not success:
+        return False, None, error, None
+    next_cursor = None
+    if len(result) > limit:
+        result = result.iloc[:limit]
+        next_cursor = encode_cursor(sql, offset + limit, limit)
+    return True, result, None, next_cursor
+
+
+async def aexecute_sql(sql: str, engine: str = None) -> tuple:
+    """Run execute_sql in a worker thread so the event loop never blocks."""
+    return await asyncio.to_thread(execute_sql, sql, None, engine)
 
 
 def get_schema(conn=None) -> str:
     """Get database schema."""
-    close_conn = False
     if conn is None:
-        conn = get_connection()
-        close_conn = True
+        with get_pool().connection() as pooled:
+            return get_schema(pooled)
     
     cursor = conn.cursor()
     cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-    tables = [t[0] for t in cursor.fetchall()]
+    # Materialized summaries are an execution detail, not part of the schema
+    hidden = set(CONFIG.summary_tables) | {META_TABLE, CHANGES_TABLE}
+    tables = [t[0] for t in cursor.fetchall() if t[0] not in hidden]
     
     schema_parts = []
     for table in tables:
@@ -42,7 +245,4 @@ def get_schema(conn=None) -> str:
         columns = [col[1] for col in cursor.fetchall()]
         schema_parts.append(f"{table}({', '.join(columns)})")
     
-    if close_conn:
-        conn.close()
-    
     return "\n".join(schema_parts)
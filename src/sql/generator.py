@@ -1,11 +1,18 @@
+import asyncio
+import json
+import time
+from collections import deque
+from contextlib import aclosing
+import httpx
 import requests
 from src.config.settings import CONFIG
+from src.sql.telemetry import observe, span
 
 SCHEMA = """Tables:
 - customers(customer_id, customer_city, customer_state)
 - orders(order_id, customer_id, order_status, order_purchase_timestamp, order_delivered_timestamp)
 - order_items(order_id, order_item_id, product_id, price, freight_value)
-- products(product_id, product_category, product_weight_g)
+- products(product_id, product_category, product_weight_g, product_length_cm, product_height_cm, product_width_cm)
 - payments(order_id, payment_sequential, payment_type, payment_installments, payment_value)
 - reviews(review_id, order_id, review_score, review_comment_title, review_comment_message)"""
 
@@ -39,9 +46,9 @@ Q: Products with average rating below 3?
 SQL: SELECT p.product_id, p.product_category, ROUND(AVG(r.review_score), 2) as avg_score FROM products p JOIN order_items oi ON p.product_id = oi.product_id JOIN reviews r ON oi.order_id = r.order_id GROUP BY p.product_id, p.product_category HAVING AVG(r.review_score) < 3 ORDER BY avg_score;
 """
 
-PROMPT_TEMPLATE = """You are a SQLite expert. Generate SQL for an e-commerce database.
-
-{schema}
+# Static instructions first: every prompt shares this prefix, so Ollama can
+# reuse its KV cache (or the stored context) instead of re-prefilling it
+PROMPT_PREFIX = """You are a SQLite expert. Generate SQL for an e-commerce database.
 
 RULES:
 - Use aliases: c=customers, o=orders, oi=order_items, p=products, r=reviews
@@ -49,6 +56,10 @@ RULES:
 - COUNT(DISTINCT x) for unique values
 - julianday() for date math
 - End with semicolon
+"""
+
+PROMPT_TEMPLATE = PROMPT_PREFIX + """
+{schema}
 
 {examples}
 
@@ -56,24 +67,297 @@ Q: {question}
 SQL:"""
 
 
+_async_client = None
+_prefix_context = None
+_warmup = {}
+_timings = deque(maxlen=1000)
+_first_token = deque(maxlen=1000)  # streamed requests often stop before Ollama's final stats
+
+
+def _payload(prompt: str) -> dict:
+    payload = {
+        "model": CONFIG.model,
+        "prompt": prompt,
+        "stream": False,
+        "keep_alive": CONFIG.llm_keep_alive,
+        "options": {
+            "temperature": CONFIG.temperature,
+            "num_predict": CONFIG.max_tokens
+        }
+    }
+    if CONFIG.llm_reuse_context and _prefix_context and prompt.startswith(PROMPT_PREFIX):
+        # Continue from the prefilled prefix and only send the question part
+        payload.update(prompt=prompt[len(PROMPT_PREFIX):], context=_prefix_context, raw=True)
+    return payload
+
+
+def _timing(data: dict) -> dict:
+    """Ollama's duration fields (nanoseconds) as milliseconds."""
+    return {
+        "prompt_tokens": data.get("prompt_eval_count", 0),
+        "prompt_eval_ms": data.get("prompt_eval_duration", 0) / 1e6,
+        "load_ms": data.get("load_duration", 0) / 1e6,
+        "eval_ms": data.get("eval_duration", 0) / 1e6,
+        "total_ms": data.get("total_duration", 0) / 1e6,
+    }
+
+
+def record_timing(data: dict):
+    """Keep the timings of a finished Ollama response, if it reports any."""
+    if isinstance(data, dict) and "total_duration" in data:
+        _timings.append(_timing(data))
+        tokens, duration = data.get("eval_count", 0), data.get("eval_duration", 0)
+        if tokens:
+            observe("llm_tokens", tokens)
+        if tokens and duration:
+            observe("llm_tokens_per_second", tokens / (duration / 1e9))
+
+
+def llm_timings() -> dict:
+    """Warm-up timings plus averages over recent requests."""
+    recent = list(_timings)
+    averages = {}
+    if recent:
+        averages = {key: sum(t[key] for t in recent) / len(recent) for key in recent[0]}
+    first_token = list(_first_token)
+    return {
+        "warmup": dict(_warmup),
+        "requests": len(recent),
+        "avg": averages,
+        "streams": len(first_token),
+        "avg_first_token_ms": sum(first_token) / len(first_token) if first_token else None,
+        "prefix_context": bool(_prefix_context),
+    }
+
+
+def _warmup_payload() -> dict:
+    return {
+        "model": CONFIG.model,
+        "prompt": PROMPT_PREFIX,
+        "stream": False,
+        "raw": CONFIG.llm_reuse_context,
+        "keep_alive": CONFIG.llm_keep_alive,
+        "options": {"temperature": CONFIG.temperature, "num_predict": 1}
+    }
+
+
+def _finish_warmup(data: dict, elapsed_ms: float) -> dict:
+    global _prefix_context
+    _warmup.clear()
+    _warmup.update(_timing(data), wall_ms=elapsed_ms)
+    context = data.get("context")
+    if CONFIG.llm_reuse_context and context:
+        # Drop the generated token so the context ends exactly at the prefix
+        _prefix_context = context[:len(context) - data.get("eval_count", 0)]
+    return dict(_warmup)
+
+
+def warm_up() -> dict:
+    """Load the model and prefill the static prompt prefix; returns timings."""
+    start = time.perf_counter()
+    response = requests.post(CONFIG.ollama_url, json=_warmup_payload(), timeout=CONFIG.llm_timeout)
+    return _finish_warmup(response.json(), (time.perf_counter() - start) * 1000)
+
+
+async def awarm_up() -> dict:
+    """Async warm_up on the shared client (API startup)."""
+    start = time.perf_counter()
+    response = await get_async_client().post(CONFIG.ollama_url, json=_warmup_payload())
+    return _finish_warmup(response.json(), (time.perf_counter() - start) * 1000)
+
+
+def ollama_complete(prompt: str) -> str:
+    response = requests.post(
+        CONFIG.ollama_url,
+        json=_payload(prompt),
+        timeout=CONFIG.llm_timeout
+    )
+    data = response.json()
+    record_timing(data)
+    return data.get("response", "").strip()
+
+
 def call_llm(prompt: str) -> str:
+    from src.sql.backends import get_backend
     try:
-        response = requests.post(
-            CONFIG.ollama_url,
-            json={
-                "model": CONFIG.model,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": CONFIG.temperature,
-                    "num_predict": CONFIG.max_tokens
-                }
-            },
-            timeout=120
+        with span("llm"):
+            return get_backend().complete(prompt)
+    except Exception as e:
+        return f"ERROR: {e}"
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Shared keep-alive client for Ollama, created on first use."""
+    global _async_client
+    if _async_client is None:
+        _async_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=CONFIG.llm_max_connections,
+                max_keepalive_connections=CONFIG.llm_max_connections
+            ),
+            timeout=CONFIG.llm_timeout
         )
-        return response.json().get("response", "").strip()
+    return _async_client
+
+
+async def close_async_client():
+    """Close the shared client (API shutdown)."""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+
+async def ollama_acomplete(prompt: str) -> str:
+    response = await get_async_client().post(CONFIG.ollama_url, json=_payload(prompt))
+    data = response.json()
+    record_timing(data)
+    return data.get("response", "").strip()
+
+
+async def acall_llm(prompt: str, timeout: float = None) -> str:
+    """Async call_llm; cancelling the awaiting task aborts the HTTP request."""
+    from src.sql.backends import get_backend
+    timeout = timeout or CONFIG.llm_timeout
+    try:
+        with span("llm"):
+            return await asyncio.wait_for(get_backend().acomplete(prompt), timeout)
+    except asyncio.TimeoutError:
+        return f"ERROR: LLM call exceeded {timeout}s deadline"
+    except Exception as e:
+        return f"ERROR: {e}"
+
+
+def ollama_stream(prompt: str):
+    """Yield response tokens from Ollama's NDJSON stream.
+
+    Closing the generator drops the connection, which stops generation.
+    """
+    start = time.perf_counter()
+    with requests.post(
+        CONFIG.ollama_url,
+        json={**_payload(prompt), "stream": True},
+        stream=True,
+        timeout=CONFIG.llm_timeout
+    ) as response:
+        first = True
+        for line in response.iter_lines():
+            if not line:
+                continue
+            chunk = json.loads(line)
+            if first:
+                _first_token.append((time.perf_counter() - start) * 1000)
+                first = False
+            if chunk.get("done"):
+                record_timing(chunk)
+            yield chunk.get("response", "")
+            if chunk.get("done"):
+                break
+
+
+async def ollama_astream(prompt: str):
+    """Async ollama_stream on the shared client."""
+    start = time.perf_counter()
+    async with get_async_client().stream(
+        "POST", CONFIG.ollama_url, json={**_payload(prompt), "stream": True}
+    ) as response:
+        first = True
+        async for line in response.aiter_lines():
+            if not line.strip():
+                continue
+            chunk = json.loads(line)
+            if first:
+                _first_token.append((time.perf_counter() - start) * 1000)
+                first = False
+            if chunk.get("done"):
+                record_timing(chunk)
+            yield chunk.get("response", "")
+            if chunk.get("done"):
+                break
+
+
+async def astream_llm(prompt: str):
+    """Yield response tokens from the configured backend; closing it closes the backend stream."""
+    from src.sql.backends import get_backend
+    async with aclosing(get_backend().astream(prompt)) as tokens:
+        async for token in tokens:
+            yield token
+
+
+async def acall_llm_stream(prompt: str, timeout: float = None) -> str:
+    """acall_llm that stops reading once a complete statement has arrived."""
+    timeout = timeout or CONFIG.llm_timeout
+    extractor = SQLStreamExtractor()
+    
+    async def consume():
+        async with aclosing(astream_llm(prompt)) as tokens:
+            async for token in tokens:
+                if extractor.feed(token):
+                    break
+    
+    try:
+        with span("llm"):
+            await asyncio.wait_for(consume(), timeout)
+    except asyncio.TimeoutError:
+        return f"ERROR: LLM call exceeded {timeout}s deadline"
     except Exception as e:
         return f"ERROR: {e}"
+    return extractor.text.strip()
+
+
+class SQLStreamExtractor:
+    """Incremental extract_sql: detects when the first statement is complete."""
+
+    def __init__(self):
+        self.text = ""
+        self.complete = False
+
+    def feed(self, token: str) -> bool:
+        """Append a token; return True once no further tokens are needed."""
+        self.text += token
+        if not self.complete:
+            self.complete = self._check()
+        return self.complete
+
+    @property
+    def sql(self) -> str:
+        return extract_sql(self.text)
+
+    def _check(self) -> bool:
+        text = self.text
+        fence = text.find("```")
+        if fence >= 0:
+            body = text[fence + 3:]
+            if body.startswith("sql"):
+                body = body[3:]
+            return "```" in body or _has_statement_end(body)
+        lines = [line for line in text.split("\n") if not line.strip().startswith("--")]
+        body = "\n".join(lines).lstrip()
+        if body.lower().startswith(("select", "with")):
+            return _has_statement_end(body)
+        return False
+
+
+def _has_statement_end(sql: str) -> bool:
+    """True if sql contains a ';' outside string literals and comments."""
+    quote = None
+    i = 0
+    while i < len(sql):
+        ch = sql[i]
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in ("'", '"'):
+            quote = ch
+        elif sql.startswith("--", i):
+            end = sql.find("\n", i)
+            if end < 0:
+                return False
+            i = end
+        elif ch == ";":
+            return True
+        i += 1
+    return False
 
 
 def extract_sql(response: str) -> str:
@@ -89,11 +373,69 @@ def extract_sql(response: str) -> str:
     return sql
 
 
+def build_prompt(question: str) -> str:
+    from src.sql.examples import relevant_examples
+    from src.sql.schema_index import relevant_schema
+    with span("prompt_build"):
+        return PROMPT_TEMPLATE.format(
+            schema=relevant_schema(question) or SCHEMA,
+            examples=relevant_examples(question) or FEW_SHOT_EXAMPLES,
+            question=question
+        )
+
+
+def _extract(response: str) -> str:
+    with span("extract_sql"):
+        return extract_sql(response)
+
+
 def generate_sql(question: str) -> str:
-    prompt = PROMPT_TEMPLATE.format(
-        schema=SCHEMA,
-        examples=FEW_SHOT_EXAMPLES,
-        question=question
-    )
-    response = call_llm(prompt)
-    return extract_sql(response)
+    from src.sql.correction import correct_sql
+    response = call_llm(build_prompt(question))
+    return correct_sql(question, _extract(response), call_llm)
+
+
+async def acomplete(prompt: str, timeout: float = None) -> str:
+    """One completion, streamed when CONFIG.llm_stream."""
+    if CONFIG.llm_stream:
+        return await acall_llm_stream(prompt, timeout)
+    return await acall_llm(prompt, timeout)
+
+
+async def adraft_sql(question: str, timeout: float = None) -> str:
+    """Generated SQL before validation and self-correction."""
+    return _extract(await acomplete(build_prompt(question), timeout))
+
+
+async def agenerate_sql(question: str, timeout: float = None) -> str:
+    from src.sql.correction import acorrect_sql
+    sql = await adraft_sql(question, timeout)
+    return await acorrect_sql(question, sql, lambda prompt: acomplete(prompt, timeout))
+
+
+async def astream_sql(question: str, timeout: float = None):
+    """Yield the partial SQL as tokens arrive, ending at the first full statement.
+
+    The stream gets the same deadline as an agenerate_sql call
+    (CONFIG.llm_timeout) and raises TimeoutError past it.
+    """
+    timeout = timeout or CONFIG.llm_timeout
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    extractor = SQLStreamExtractor()
+    async with aclosing(astream_llm(build_prompt(question))) as tokens:
+        while True:
+            try:
+                token = await asyncio.wait_for(anext(tokens), max(deadline - loop.time(), 0))
+            except StopAsyncIteration:
+                break
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"LLM call exceeded {timeout}s deadline") from None
+            done = extractor.feed(token)
+            yield extractor.sql
+            if done:
+                break
+    from src.sql.correction import acorrect_sql
+    corrected = await acorrect_sql(question, extractor.sql, lambda prompt: acomplete(prompt, timeout))
+    if corrected != extractor.sql:
+        yield corrected
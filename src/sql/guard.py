@@ -0,0 +1,105 @@
+import re
+import time
+from contextlib import contextmanager
+from src.config.settings import CONFIG
+
+PROGRESS_INTERVAL = 10_000
+
+_TABLE_REF = re.compile(r"\b(?:from|join)\s+([A-Za-z_]\w*)(?:\s+(?:as\s+)?([A-Za-z_]\w*))?", re.IGNORECASE)
+_KEYWORDS = {
+    "where", "join", "on", "inner", "left", "right", "full", "cross", "outer", "natural",
+    "group", "order", "limit", "having", "union", "using", "as", "select", "window",
+}
+
+
+class QueryRejected(Exception):
+    """Raised when generated SQL is too expensive to run."""
+
+
+def table_aliases(sql: str) -> dict:
+    """Map FROM/JOIN aliases (and bare names) to table names."""
+    aliases = {}
+    for table, alias in _TABLE_REF.findall(sql):
+        aliases[table.lower()] = table.lower()
+        if alias and alias.lower() not in _KEYWORDS:
+            aliases[alias.lower()] = table.lower()
+    return aliases
+
+
+def table_rows(conn, table: str) -> int:
+    """Cheap row estimate: MAX(rowid) is a single b-tree seek."""
+    try:
+        return conn.execute(f'SELECT MAX(rowid) FROM "{table}"').fetchone()[0] or 0
+    except Exception:
+        return 0
+
+
+def analyze_query(sql: str, conn) -> dict:
+    """Run EXPLAIN QUERY PLAN and flag full scans and unindexed joins."""
+    plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    aliases = table_aliases(sql)
+    tables = {r[0].lower() for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    report = {"plan": [row[3] for row in plan], "full_scans": [], "unindexed_joins": [], "estimated_cost": 1}
+    loops = {}
+    for _, parent, _, detail in plan:
+        words = detail.split()
+        if len(words) < 2 or words[0] not in ("SCAN", "SEARCH"):
+            continue
+        name = words[1].lower()
+        table = aliases.get(name, name if name in tables else None)
+        if table is None:
+            continue
+        rows = table_rows(conn, table)
+        if words[0] == "SCAN":
+            if rows >= CONFIG.guard_large_table_rows:
+                report["full_scans"].append(table)
+            loops[parent] = loops.get(parent, 1) * max(rows, 1)
+        elif "AUTOMATIC" in detail:
+            report["unindexed_joins"].append(table)
+    if loops:
+        report["estimated_cost"] = max(loops.values())
+    return report
+
+
+def guard_sql(sql: str, conn) -> str:
+    """Reject SQL too expensive to run.
+
+    Nested full scans whose row product exceeds CONFIG.guard_max_scan_cost
+    are rejected. Unbounded scans are left alone: results past
+    max_result_rows fail with ResultTooLarge rather than being cut short.
+    """
+    report = analyze_query(sql, conn)
+    if report["estimated_cost"] > CONFIG.guard_max_scan_cost:
+        raise QueryRejected(
+            f"Query rejected: nested full scans of {', '.join(report['full_scans']) or 'tables'} "
+            f"(~{report['estimated_cost']:.2e} row combinations)"
+        )
+    return sql
+
+
+@contextmanager
+def query_budget(conn, seconds: float = None, max_steps: int = None):
+    """Abort the running statement past a wall-clock or VM-step budget.
+
+    Yields a dict whose "reason" is set when the budget interrupted the query.
+    """
+    seconds = CONFIG.query_timeout_seconds if seconds is None else seconds
+    max_steps = CONFIG.query_max_vm_steps if max_steps is None else max_steps
+    deadline = time.monotonic() + seconds if seconds else None
+    state = {"steps": 0, "reason": None}
+    
+    def handler():
+        state["steps"] += PROGRESS_INTERVAL
+        if max_steps and state["steps"] > max_steps:
+            state["reason"] = f"Query exceeded VM step budget ({max_steps} steps)"
+            return 1
+        if deadline and time.monotonic() > deadline:
+            state["reason"] = f"Query exceeded time budget ({seconds}s)"
+            return 1
+        return 0
+    
+    conn.set_progress_handler(handler, PROGRESS_INTERVAL)
+    try:
+        yield state
+    finally:
+        conn.set_progress_handler(None, PROGRESS_INTERVAL)
@@ -0,0 +1,160 @@
+import re
+import statistics
+import time
+from collections import Counter
+from src.sql.guard import table_aliases
+
+MAX_INDEX_COLUMNS = 5
+
+_QUALIFIED = re.compile(r"\b([A-Za-z_]\w*)\.([A-Za-z_]\w*)\b")
+_IDENTIFIER = re.compile(r"\b([A-Za-z_]\w*)\b")
+_AUTOMATIC = re.compile(r"SEARCH (\w+) USING AUTOMATIC (?:COVERING |PARTIAL )*INDEX \(([^)]*)\)")
+_WHERE = re.compile(r"\bwhere\b(.*?)(?=\bgroup\s+by\b|\border\s+by\b|\blimit\b|\bhaving\b|$)", re.I | re.S)
+_GROUP_BY = re.compile(r"\bgroup\s+by\b(.*?)(?=\bhaving\b|\border\s+by\b|\blimit\b|$)", re.I | re.S)
+_EQUALITY = re.compile(r"([A-Za-z_]\w*(?:\.[A-Za-z_]\w*)?)\s*(?:=|\bin\b)", re.I)
+
+
+def _table_columns(conn) -> dict:
+    tables = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")]
+    return {t.lower(): [c[1].lower() for c in conn.execute(f'PRAGMA table_info("{t}")')] for t in tables}
+
+
+def _resolve(ref: str, aliases: dict, columns: dict, tables: set):
+    """Map 'alias.col' or a bare column name to (table, column)."""
+    if "." in ref:
+        alias, column = ref.lower().split(".", 1)
+        table = aliases.get(alias)
+        return (table, column) if table in columns and column in columns[table] else None
+    owners = [t for t in tables if ref.lower() in columns.get(t, [])]
+    return (owners[0], ref.lower()) if len(owners) == 1 else None
+
+
+def _refs(text: str, aliases: dict, columns: dict, tables: set) -> list:
+    found = []
+    for alias, column in _QUALIFIED.findall(text):
+        resolved = _resolve(f"{alias}.{column}", aliases, columns, tables)
+        if resolved:
+            found.append(resolved)
+    bare = _QUALIFIED.sub(" ", text)
+    for name in _IDENTIFIER.findall(bare):
+        resolved = _resolve(name, aliases, columns, tables)
+        if resolved:
+            found.append(resolved)
+    return found
+
+
+def query_columns(sql: str, conn, columns: dict = None) -> dict:
+    """Columns a query uses per table: join keys (from EXPLAIN QUERY PLAN
+    automatic indexes), WHERE equality filters, GROUP BY and all references,
+    plus whether the plan scans the table or already searches an index.
+    """
+    columns = columns or _table_columns(conn)
+    aliases = {a: t for a, t in table_aliases(sql).items() if t in columns}
+    tables = set(aliases.values())
+    usage = {t: {"join": [], "where": [], "group": [], "all": set(), "scanned": False, "indexed": False}
+             for t in tables}
+
+    for _, _, _, detail in conn.execute(f"EXPLAIN QUERY PLAN {sql}"):
+        words = detail.split()
+        table = aliases.get(words[1].lower()) if len(words) > 1 else None
+        if table in usage and words[0] == "SCAN":
+            usage[table]["scanned"] = True
+        elif table in usage and words[0] == "SEARCH" and "AUTOMATIC" not in detail:
+            usage[table]["indexed"] = True
+        match = _AUTOMATIC.search(detail)
+        if match:
+            table = aliases.get(match.group(1).lower())
+            if table in usage:
+                keys = [k.split("=")[0].strip().lower() for k in match.group(2).split(" AND ")]
+                usage[table]["join"].extend(k for k in keys if k not in usage[table]["join"])
+
+    where = _WHERE.search(sql)
+    if where:
+        for ref in _EQUALITY.findall(where.group(1)):
+            resolved = _resolve(ref, aliases, columns, tables)
+            if resolved and resolved[1] not in usage[resolved[0]]["where"]:
+                usage[resolved[0]]["where"].append(resolved[1])
+    group = _GROUP_BY.search(sql)
+    if group:
+        for table, column in _refs(group.group(1), aliases, columns, tables):
+            if column not in usage[table]["group"]:
+                usage[table]["group"].append(column)
+    for table, column in _refs(sql, aliases, columns, tables):
+        usage[table]["all"].add(column)
+    return usage
+
+
+def existing_indexes(conn) -> dict:
+    """Map table -> list of indexed column tuples."""
+    indexes = {}
+    for table in _table_columns(conn):
+        for idx in conn.execute(f'PRAGMA index_list("{table}")').fetchall():
+            cols = tuple(c[2].lower() for c in conn.execute(f'PRAGMA index_info("{idx[1]}")') if c[2])
+            indexes.setdefault(table, []).append(cols)
+    return indexes
+
+
+def _covered(table: str, cols: tuple, indexes: dict) -> bool:
+    return any(existing[:len(cols)] == cols for existing in indexes.get(table, []))
+
+
+def recommend_indexes(queries: list, conn) -> list:
+    """Recommend covering indexes for the tables and columns the queries use.
+
+    Each recommendation is a dict with table, columns, the number of
+    queries that benefit and the CREATE INDEX statement.
+    """
+    columns = _table_columns(conn)
+    indexes = existing_indexes(conn)
+    counts = Counter()
+    for sql in queries:
+        try:
+            usage = query_columns(sql, conn, columns)
+        except Exception:
+            continue
+        for table, used in usage.items():
+            if used["indexed"]:
+                continue
+            keys = used["where"] + [c for c in used["join"] if c not in used["where"]]
+            if not keys and used["scanned"]:
+                keys = used["group"]
+            if not keys:
+                continue
+            extra = sorted(used["all"] - set(keys))
+            cols = tuple(keys + extra) if len(keys) + len(extra) <= MAX_INDEX_COLUMNS else tuple(keys)
+            counts[(table, cols)] += 1
+
+    recommendations = []
+    for (table, cols), count in counts.most_common():
+        if _covered(table, cols, indexes):
+            continue
+        name = f"idx_{table}_{'_'.join(cols)}"
+        recommendations.append({
+            "table": table,
+            "columns": list(cols),
+            "queries": count,
+            "sql": f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" ({", ".join(cols)})'
+        })
+        indexes.setdefault(table, []).append(cols)
+    return recommendations
+
+
+def apply_indexes(recommendations: list, conn):
+    """Create the recommended indexes and refresh planner statistics."""
+    for rec in recommendations:
+        conn.execute(rec["sql"])
+    conn.execute("ANALYZE")
+    conn.commit()
+
+
+def time_queries(queries: list, conn, repeat: int = 3) -> list:
+    """Median wall-clock milliseconds per query."""
+    timings = []
+    for sql in queries:
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            conn.execute(sql).fetchall()
+            runs.append((time.perf_counter() - start) * 1000)
+        timings.append(statistics.median(runs))
+    return timings
@@ -0,0 +1,182 @@
+import os
+import sqlite3
+import time
+import urllib.request
+from pathlib import Path
+import pandas as pd
+from src.config.settings import CONFIG
+
+BASE_URL = "https://raw.githubusercontent.com/olist/work-at-olist-data/master/datasets/"
+
+# Load order follows the foreign keys
+RAW_FILES = {
+    "customers": "olist_customers_dataset.csv",
+    "products": "olist_products_dataset.csv",
+    "orders": "olist_orders_dataset.csv",
+    "order_items": "olist_order_items_dataset.csv",
+    "payments": "olist_order_payments_dataset.csv",
+    "reviews": "olist_order_reviews_dataset.csv",
+}
+RENAMES = {
+    "product_category_name": "product_category",
+    "order_delivered_customer_date": "order_delivered_timestamp",
+}
+# Foreign-key lookups the primary keys don't cover; built once the rows are in
+INDEXES = {
+    "idx_orders_customer_id": ("orders", ("customer_id",)),
+    "idx_order_items_product_id": ("order_items", ("product_id",)),
+    "idx_reviews_order_id": ("reviews", ("order_id",)),
+}
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def download_raw(raw_dir: Path = None) -> list:
+    """Fetch the Olist CSVs that are not in raw_dir yet; returns the new paths."""
+    raw_dir = Path(raw_dir or CONFIG.raw_data_dir)
+    raw_dir.mkdir(parents=True, exist_ok=True)
+    fetched = []
+    for name in RAW_FILES.values():
+        path = raw_dir / name
+        if not path.exists():
+            urllib.request.urlretrieve(BASE_URL + name, path.with_suffix(".part"))
+            os.replace(path.with_suffix(".part"), path)
+            fetched.append(path)
+    return fetched
+
+
+def table_columns(conn, table: str) -> dict:
+    """Declared column types, in table order."""
+    return {c[1]: c[2].upper() for c in conn.execute(f'PRAGMA table_info("{table}")')}
+
+
+def primary_key(conn, table: str) -> list:
+    keys = sorted((c[5], c[1]) for c in conn.execute(f'PRAGMA table_info("{table}")') if c[5])
+    return [name for _, name in keys]
+
+
+def coerce(frame: pd.DataFrame, columns: dict, keys: list = ()) -> tuple:
+    """Cast a raw chunk to the declared column types.
+
+    Values that don't parse become NULL and rows missing a key are
+    dropped; returns (frame, nulled values, dropped rows).
+    """
+    frame = frame.rename(columns=RENAMES)
+    out = {}
+    nulled = 0
+    for name, kind in columns.items():
+        raw = frame[name] if name in frame else pd.Series(None, index=frame.index, dtype=object)
+        if name.endswith("_timestamp"):
+            parsed = pd.to_datetime(raw, format="ISO8601", errors="coerce")
+            value = parsed.dt.strftime(TIMESTAMP_FORMAT).astype(object).where(parsed.notna(), None)
+        elif kind == "INTEGER":
+            numbers = pd.to_numeric(raw, errors="coerce")
+            value = numbers.where(numbers % 1 == 0).astype("Int64")
+        elif kind == "REAL":
+            value = pd.to_numeric(raw, errors="coerce").astype(float)
+        else:
+            value = raw.astype(object).where(raw.notna(), None)
+        nulled += int((raw.notna() & value.isna()).sum())
+        out[name] = value
+    frame = pd.DataFrame(out)
+    complete = frame[list(keys)].notna().all(axis=1) if keys else None
+    if complete is None or complete.all():
+        return frame, nulled, 0
+    return frame[complete], nulled, int((~complete).sum())
+
+
+def insert_frame(conn, table: str, frame: pd.DataFrame, keys: list = ()):
+    """executemany one frame; with keys, rows already present are updated in place."""
+    names = ", ".join(frame.columns)
+    sql = f"INSERT INTO {table} ({names}) VALUES ({', '.join('?' * frame.shape[1])})"
+    updates = [c for c in frame.columns if c not in keys]
+    if keys:
+        sql += f" ON CONFLICT ({', '.join(keys)}) DO "
+        sql += f"UPDATE SET {', '.join(f'{c} = excluded.{c}' for c in updates)}" if updates else "NOTHING"
+    rows = frame.astype(object).where(frame.notna(), None).itertuples(index=False, name=None)
+    conn.executemany(sql, rows)
+
+
+def load_csv(conn, table: str, path: Path, chunk_rows: int = None) -> dict:
+    """Stream one CSV into its table in chunks; the caller owns the transaction."""
+    columns = table_columns(conn, table)
+    keys = primary_key(conn, table)
+
+    def wanted(name):
+        return RENAMES.get(name, name) in columns
+
+    stats = {"rows": 0, "nulled": 0, "dropped": 0}
+    chunks = pd.read_csv(path, usecols=wanted, dtype=str, chunksize=chunk_rows or CONFIG.ingest_chunk_rows)
+    for chunk in chunks:
+        frame, nulled, dropped = coerce(chunk, columns, keys)
+        insert_frame(conn, table, frame, keys)
+        stats["rows"] += len(frame)
+        stats["nulled"] += nulled
+        stats["dropped"] += dropped
+    return stats
+
+
+def finalize(conn):
+    """Build the secondary indexes and refresh planner statistics."""
+    for name, (table, cols) in INDEXES.items():
+        conn.execute(f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" ({", ".join(cols)})')
+    conn.execute("ANALYZE")
+    conn.commit()
+
+
+def ingest(raw_dir: Path = None, db_path: Path = None, append: bool = False,
+           chunk_rows: int = None, schema_path: Path = None) -> dict:
+    """Load the Olist CSVs into SQLite; returns per-table row and rejection counts.
+
+    A full load builds a fresh database from schema.sql under a temporary
+    name, with journaling and fsync off, and swaps it in when complete.
+    With append, the CSVs present in raw_dir are upserted into the existing
+    database (new orders added, changed ones updated), one transaction per
+    table. Both end with the secondary indexes, ANALYZE and, when enabled,
+    a summary refresh.
+    """
+    raw_dir = Path(raw_dir or CONFIG.raw_data_dir)
+    db_path = Path(db_path or CONFIG.db_path)
+    schema_path = Path(schema_path or CONFIG.db_path.parent / "schema.sql")
+    files = {t: raw_dir / name for t, name in RAW_FILES.items() if (raw_dir / name).exists()}
+    if append:
+        if not db_path.exists():
+            raise FileNotFoundError(f"{db_path} does not exist; run a full ingest first")
+        target = db_path
+    else:
+        missing = sorted(set(RAW_FILES.values()) - {p.name for p in files.values()})
+        if missing:
+            raise FileNotFoundError(f"missing in {raw_dir}: {', '.join(missing)}")
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        target = db_path.with_suffix(".tmp")
+        target.unlink(missing_ok=True)
+
+    conn = sqlite3.connect(target)
+    stats = {}
+    try:
+        if append:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        else:
+            conn.execute("PRAGMA journal_mode=OFF")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.executescript(schema_path.read_text())
+        conn.execute(f"PRAGMA cache_size=-{CONFIG.sqlite_cache_size_kib}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        for table, path in files.items():
+            start = time.perf_counter()
+            stats[table] = load_csv(conn, table, path, chunk_rows)
+            conn.commit()
+            stats[table]["seconds"] = time.perf_counter() - start
+        finalize(conn)
+        if CONFIG.summaries_enabled:
+            from src.sql.summaries import get_summary_registry
+            get_summary_registry().refresh(conn)
+    finally:
+        conn.close()
+
+    if not append:
+        # A WAL left by the old file would be replayed into the new one
+        for suffix in ("-wal", "-shm"):
+            Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+        os.replace(target, db_path)
+    return stats
@@ -0,0 +1,53 @@
+import sqlglot
+from sqlglot import exp
+from sqlglot.optimizer.qualify import qualify
+
+DIALECT = "sqlite"
+
+
+def parse(sql: str) -> exp.Expression:
+    """Parse one SQLite statement (raises sqlglot.errors.ParseError)."""
+    return sqlglot.parse_one(sql.strip().rstrip(";"), read=DIALECT)
+
+
+def db_schema(conn) -> dict:
+    """{table: {column: type}} for sqlglot's qualifier."""
+    tables = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")]
+    return {
+        t.lower(): {c[1].lower(): c[2] or "TEXT" for c in conn.execute(f'PRAGMA table_info("{t}")')}
+        for t in tables
+    }
+
+
+def from_clause(select: exp.Select):
+    # sqlglot renamed the "from" arg to "from_" in newer releases
+    return select.args.get("from_") or select.args.get("from")
+
+
+def qualify_select(sql: str, schema: dict) -> tuple:
+    """Parse and fully qualify a plain SELECT.
+
+    Returns (original, qualified, aliases) where aliases maps every table
+    alias to its table name, or None when sql is not a single SELECT over
+    base tables.
+    """
+    original = parse(sql)
+    if not isinstance(original, exp.Select) or original.args.get("with"):
+        return None
+    qualified = qualify(original.copy(), schema=schema, dialect=DIALECT, quote_identifiers=False)
+    aliases = {}
+    sources = [from_clause(qualified)] + list(qualified.args.get("joins") or [])
+    for source in sources:
+        if source is None or not isinstance(source.this, exp.Table):
+            return None
+        aliases[source.this.alias_or_name.lower()] = source.this.name.lower()
+    return original, qualified, aliases
+
+
+def canonical(expression: exp.Expression, aliases: dict) -> str:
+    """Alias-independent SQL text: table aliases become table names."""
+    def unalias(node):
+        if isinstance(node, exp.Column) and node.table:
+            return exp.column(node.name, table=aliases.get(node.table.lower(), node.table))
+        return node
+    return expression.copy().transform(unalias).sql(dialect=DIALECT, normalize=True).lower()
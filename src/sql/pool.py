@@ -0,0 +1,177 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from src.config.settings import CONFIG
+
+
+def enable_wal(db_path):
+    """Switch the database to WAL (persistent) so readers never block writers."""
+    try:
+        conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+
+def file_id(path):
+    """(device, inode) of path, or None if it doesn't exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+
+class ConnectionPool:
+    """Thread-safe pool of read-only, tuned SQLite connections."""
+
+    def __init__(self, db_path=None, size=None, timeout=None, health_check_seconds=None):
+        self.db_path = db_path or CONFIG.db_path
+        self.size = size or CONFIG.pool_size
+        self.timeout = timeout or CONFIG.pool_timeout
+        self.health_check_seconds = (
+            CONFIG.pool_health_check_seconds if health_check_seconds is None else health_check_seconds
+        )
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._last_used = {}
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+        self.recycled = 0
+        self.closed = False
+        if self.db_path.exists():
+            enable_wal(self.db_path)
+        self.file_id = file_id(self.db_path)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False
+        )
+        conn.execute(f"PRAGMA cache_size=-{CONFIG.sqlite_cache_size_kib}")
+        conn.execute(f"PRAGMA mmap_size={CONFIG.sqlite_mmap_size}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    def _healthy(self, conn) -> bool:
+        idle = time.monotonic() - self._last_used.get(id(conn), 0.0)
+        if idle < self.health_check_seconds:
+            return True
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def acquire(self) -> sqlite3.Connection:
+        """Check out a connection, waiting up to timeout for one to be released."""
+        start = time.perf_counter()
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._lock:
+                if self._created < self.size:
+                    self._created += 1
+                    create = True
+                else:
+                    create = False
+            if create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    self.timeouts += 1
+                    raise TimeoutError(f"No SQLite connection available after {self.timeout}s")
+        if not self._healthy(conn):
+            self.recycled += 1
+            self._discard(conn)
+            conn = self._connect()
+            with self._lock:
+                self._created += 1
+        wait = time.perf_counter() - start
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+        return conn
+
+    def release(self, conn: sqlite3.Connection):
+        """Return a connection to the pool."""
+        if self.closed:
+            self._discard(conn)  # the pool was replaced while this was checked out
+            return
+        if conn.in_transaction:
+            conn.rollback()
+        self._last_used[id(conn)] = time.monotonic()
+        self._idle.put(conn)
+
+    def _discard(self, conn):
+        self._last_used.pop(id(conn), None)
+        with self._lock:
+            self._created -= 1
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Close every idle connection; ones checked out close on release."""
+        self.closed = True
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+    def stats(self) -> dict:
+        """Checkout counts and wait times."""
+        return {
+            "size": self.size,
+            "open": self._created,
+            "idle": self._idle.qsize(),
+            "checkouts": self.checkouts,
+            "wait_avg_ms": 1000 * self.wait_total / self.checkouts if self.checkouts else 0.0,
+            "wait_max_ms": 1000 * self.wait_max,
+            "timeouts": self.timeouts,
+            "recycled": self.recycled,
+        }
+
+
+_pool = None
+
+
+def get_pool() -> ConnectionPool:
+    """Shared pool for CONFIG.db_path.
+
+    Rebuilt if the path changes or the file at it is replaced (a full
+    ingest swaps in a new file with os.replace; connections opened before
+    would keep reading the old one).
+    """
+    global _pool
+    if _pool is None or _pool.db_path != CONFIG.db_path or _pool.file_id != file_id(CONFIG.db_path):
+        if _pool is not None:
+            _pool.close()
+        _pool = ConnectionPool()
+    return _pool
@@ -0,0 +1,49 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from src.config.settings import CONFIG
+
+_lock = threading.Lock()
+
+
+def _backup(path) -> Path:
+    return Path(f"{path}.1")
+
+
+def log_query(question: str, sql: str, elapsed_ms: float = None):
+    """Append a successfully executed query to the query log.
+
+    Past CONFIG.query_log_max_bytes the log moves to query_log.jsonl.1
+    (replacing the previous one), so the two files stay bounded.
+    """
+    entry = {"ts": time.time(), "question": question, "sql": sql, "elapsed_ms": elapsed_ms}
+    path = CONFIG.query_log_path
+    with _lock:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+            size = f.tell()
+        if size > CONFIG.query_log_max_bytes:
+            os.replace(path, _backup(path))
+
+
+def read_query_log(path=None) -> list:
+    """Return logged entries, oldest first (missing log -> empty list).
+
+    Reads the rotated file and then the current one, never more than about
+    twice CONFIG.query_log_max_bytes.
+    """
+    path = path or CONFIG.query_log_path
+    entries = []
+    for part in (_backup(path), path):
+        if not part.exists():
+            continue
+        with open(part) as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return entries
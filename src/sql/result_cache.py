@@ -0,0 +1,167 @@
+import os
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+import pandas as pd
+from src.config.settings import CONFIG
+from src.evaluation.metrics import canonical_sql
+
+
+def data_version(db_path=None) -> tuple:
+    """Path plus (mtime_ns, size) of the database and its WAL; changes on every commit."""
+    db_path = db_path or CONFIG.db_path
+    version = [str(db_path)]
+    for path in (str(db_path), f"{db_path}-wal"):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            stat = None
+        # Readers create an empty WAL file; only its content marks a change
+        version.append((stat.st_mtime_ns, stat.st_size) if stat and stat.st_size else None)
+    return tuple(version)
+
+
+class ColumnarResult:
+    """Read-only column arrays of a result; compact to hold and to size."""
+
+    def __init__(self, df: pd.DataFrame):
+        self._set(list(df.columns), [df.iloc[:, i].to_numpy(copy=True) for i in range(df.shape[1])])
+
+    @classmethod
+    def from_arrays(cls, columns: list, arrays: list) -> "ColumnarResult":
+        columnar = cls.__new__(cls)
+        columnar._set(columns, arrays)
+        return columnar
+
+    def _set(self, columns, arrays):
+        self.columns = columns
+        self.arrays = arrays
+        self.nbytes = 0
+        for array in arrays:
+            array.flags.writeable = False
+            self.nbytes += array.nbytes
+            if array.dtype == object:
+                self.nbytes += sum(sys.getsizeof(v) for v in array)
+
+    def to_frame(self) -> pd.DataFrame:
+        # Copy out so callers can mutate their frame without touching the cache
+        df = pd.DataFrame(dict(enumerate(self.arrays)), copy=True)
+        df.columns = self.columns
+        return df
+
+
+class ResultCache:
+    """Byte-budgeted LRU of query results keyed on canonical SQL.
+
+    Entries remember the data version they were computed at and are
+    dropped on lookup once the database has changed. With shared, misses
+    fall through to the cross-worker SharedCache (keyed on the version
+    too) and local results are written through to it.
+    """
+
+    def __init__(self, max_bytes: int = None, shared: bool = False):
+        self.max_bytes = max_bytes or CONFIG.result_cache_max_bytes
+        self.shared = shared
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+        self.invalidations = 0
+
+    def get(self, sql: str, version: tuple = None):
+        """Cached DataFrame for sql at the current data version, or None."""
+        key = canonical_sql(sql)
+        version = version or data_version()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] != version:
+                self._drop(key)
+                self.invalidations += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1].to_frame()
+        columnar = self._shared_get(key, version)
+        with self._lock:
+            if columnar is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.shared_hits += 1
+            self._store(key, version, columnar)
+        return columnar.to_frame()
+
+    def put(self, sql: str, result: pd.DataFrame, version: tuple = None):
+        """Store a result; results larger than the whole budget are skipped."""
+        columnar = ColumnarResult(result)
+        if columnar.nbytes > self.max_bytes:
+            return
+        key = canonical_sql(sql)
+        version = version or data_version()
+        with self._lock:
+            self._store(key, version, columnar)
+        self._shared_put(key, version, columnar)
+
+    def _store(self, key, version, columnar):
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (version, columnar)
+        self.bytes += columnar.nbytes
+        while self.bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+
+    def _shared(self):
+        if not self.shared:
+            return None
+        from src.sql.shared_cache import get_shared_cache
+        return get_shared_cache()
+
+    def _shared_get(self, key, version):
+        shared = self._shared()
+        value = shared.get(f"result|{version}|{key}") if shared else None
+        if value is None:
+            return None
+        # Only our own workers write this local file, so unpickling it is safe
+        return ColumnarResult.from_arrays(*pickle.loads(value))
+
+    def _shared_put(self, key, version, columnar):
+        shared = self._shared()
+        if shared:
+            value = pickle.dumps((columnar.columns, columnar.arrays), protocol=5)
+            shared.put(f"result|{version}|{key}", value)
+
+    def _drop(self, key):
+        _, columnar = self._entries.pop(key)
+        self.bytes -= columnar.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared_hits": self.shared_hits,
+            "invalidations": self.invalidations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_cache = None
+
+
+def get_result_cache() -> ResultCache:
+    global _cache
+    if _cache is None:
+        _cache = ResultCache(shared=True)
+    return _cache
@@ -0,0 +1,163 @@
+import asyncio
+from contextlib import asynccontextmanager
+from src.config.settings import CONFIG
+from src.sql.cache import normalize_question
+
+
+class Overloaded(Exception):
+    """The LLM backlog is too deep (429) or no slot freed up in time (503)."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class _Flight:
+    """One generation shared by every request asking the same question."""
+
+    def __init__(self, key: str, question: str, future: asyncio.Future):
+        self.key = key
+        self.question = question
+        self.future = future
+        self.waiters = 0
+        self.task = None
+        self.started = False
+
+
+class GenerationScheduler:
+    """Admission control for SQL generation.
+
+    Identical in-flight questions share one generation (single-flight);
+    at most max_concurrent generations run at once. Beyond max_queue
+    waiting generations new work is shed with 429, and work that cannot get
+    a slot within queue_timeout fails with 503.
+    """
+
+    def __init__(self, generate=None, max_concurrent: int = None, max_queue: int = None,
+                 queue_timeout: float = None):
+        self.generate = generate or self._agenerate_sql
+        self.max_concurrent = max_concurrent or CONFIG.scheduler_max_concurrent
+        self.max_queue = max_queue or CONFIG.scheduler_max_queue
+        self.queue_timeout = queue_timeout or CONFIG.scheduler_queue_timeout
+        self.loop = asyncio.get_running_loop()
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self._inflight = {}
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.deduplicated = 0
+        self.shed_429 = 0
+        self.shed_503 = 0
+
+    @staticmethod
+    async def _agenerate_sql(question: str) -> str:
+        from src.sql import generator
+        return await generator.agenerate_sql(question)
+
+    async def submit(self, question: str) -> str:
+        """Generate SQL for question, sharing any identical in-flight generation."""
+        key = normalize_question(question)
+        flight = self._inflight.get(key)
+        if flight is not None:
+            self.deduplicated += 1
+        else:
+            self._enqueue()
+            flight = _Flight(key, question, self.loop.create_future())
+            self._inflight[key] = flight
+            # The task copies this context, so its spans land in this request's trace
+            flight.task = asyncio.create_task(self._run(flight))
+        flight.waiters += 1
+        try:
+            # Shielded so one waiter going away does not cancel the others
+            return await asyncio.shield(flight.future)
+        except asyncio.CancelledError:
+            flight.waiters -= 1
+            if flight.waiters == 0:
+                # Nobody is left: later askers must not join a cancelled flight
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+                if flight.started:
+                    flight.task.cancel()  # else _run sees no waiters and stops
+            raise
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one of the max_concurrent LLM slots for a call made outside submit.
+
+        Batch generation and streaming share the cap, backlog and shedding
+        with /query this way.
+        """
+        self._enqueue()
+        await self._acquire()
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _enqueue(self):
+        if self.queued >= self.max_queue:
+            self.shed_429 += 1
+            raise Overloaded(429, f"LLM backlog full ({self.queued} queued)")
+        self.queued += 1
+
+    async def _acquire(self):
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.shed_503 += 1
+            raise Overloaded(503, f"No LLM slot within {self.queue_timeout}s")
+        finally:
+            self.queued -= 1
+        self.running += 1
+
+    def _release(self):
+        self.running -= 1
+        self._semaphore.release()
+
+    async def _run(self, flight: _Flight):
+        try:
+            flight.started = True
+            if flight.waiters == 0:
+                self.queued -= 1
+                raise asyncio.CancelledError()
+            await self._acquire()
+            try:
+                result = await self.generate(flight.question)
+            finally:
+                self._release()
+            self.completed += 1
+            flight.future.set_result(result)
+        except asyncio.CancelledError:
+            flight.future.cancel()
+        except Exception as e:
+            flight.future.set_exception(e)
+            flight.future.exception()  # retrieved: waiters may all be gone
+        finally:
+            if self._inflight.get(flight.key) is flight:
+                del self._inflight[flight.key]
+
+    def stats(self) -> dict:
+        """Queue depth, concurrency and shedding counters."""
+        return {
+            "queue_depth": self.queued,
+            "running": self.running,
+            "in_flight": len(self._inflight),
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "deduplicated": self.deduplicated,
+            "shed_429": self.shed_429,
+            "shed_503": self.shed_503,
+        }
+
+
+_scheduler = None
+
+
+def get_scheduler() -> GenerationScheduler:
+    """Scheduler for the running event loop (recreated if the loop changes)."""
+    global _scheduler
+    if _scheduler is None or _scheduler.loop is not asyncio.get_running_loop():
+        _scheduler = GenerationScheduler()
+    return _scheduler
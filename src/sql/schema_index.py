@@ -0,0 +1,222 @@
+import hashlib
+import json
+import re
+import threading
+from collections import deque
+import numpy as np
+from src.config.settings import CONFIG
+from src.sql import embeddings
+
+# Bilingual descriptions so French questions find English table names
+TABLE_HINTS = {
+    "customers": "customers clients city ville state état region",
+    "orders": "orders commandes status statut purchase achat date delivery livraison délai delay",
+    "order_items": "order items articles price prix revenue chiffre d'affaires panier basket freight frais",
+    "products": "products produits category catégorie weight poids dimensions length height width",
+    "payments": "payments paiements payment method méthode type installments versements value montant",
+    "reviews": "reviews avis note score rating commentaire comment",
+}
+
+_TABLE_LINE = re.compile(r"^(\w+)\((.*)\)$")
+KEYWORD_BONUS = 0.25
+
+
+def _tokens(text: str) -> set:
+    """Lowercase words with a plural 's' dropped, for keyword matching."""
+    words = re.findall(r"\w+", text.lower().replace("_", " "))
+    return {w[:-1] if len(w) > 3 and w.endswith("s") else w for w in words}
+
+
+def introspect(conn) -> dict:
+    """{table: {"columns": [...], "samples": {column: [values]}}} from the live DB.
+
+    Tables and columns come from executor.get_schema, so summary tables
+    stay hidden; text columns (other than ids) get a few sample values.
+    """
+    from src.sql.executor import get_schema
+    tables = {}
+    for line in get_schema(conn).splitlines():
+        match = _TABLE_LINE.match(line.strip())
+        if not match:
+            continue
+        table, columns = match.group(1), [c.strip() for c in match.group(2).split(",") if c.strip()]
+        types = {c[1]: (c[2] or "TEXT").upper() for c in conn.execute(f'PRAGMA table_info("{table}")')}
+        samples = {}
+        for column in columns:
+            if "TEXT" not in types.get(column, "TEXT") or column.endswith("_id"):
+                continue
+            rows = conn.execute(
+                f'SELECT DISTINCT "{column}" FROM "{table}" WHERE "{column}" IS NOT NULL LIMIT ?',
+                (CONFIG.schema_sample_values,)
+            ).fetchall()
+            samples[column] = [str(r[0])[:30] for r in rows]
+        tables[table] = {"columns": columns, "samples": samples}
+    return tables
+
+
+def join_graph(tables: dict) -> dict:
+    """Tables are adjacent when they share an *_id column."""
+    graph = {t: set() for t in tables}
+    for a in tables:
+        for b in tables:
+            shared = set(tables[a]["columns"]) & set(tables[b]["columns"])
+            if a != b and any(c.endswith("_id") for c in shared):
+                graph[a].add(b)
+    return graph
+
+
+def _path(graph: dict, start: str, goal: str) -> list:
+    """Shortest table path from start to goal (BFS), or [] if unreachable."""
+    previous = {start: None}
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        if node == goal:
+            path = []
+            while node is not None:
+                path.append(node)
+                node = previous[node]
+            return path[::-1]
+        for neighbour in sorted(graph[node]):
+            if neighbour not in previous:
+                previous[neighbour] = node
+                queue.append(neighbour)
+    return []
+
+
+def with_bridges(selected: list, graph: dict) -> list:
+    """Add the intermediate tables needed to join every selected table."""
+    result = list(selected)
+    for table in selected[1:]:
+        for node in _path(graph, selected[0], table):
+            if node not in result:
+                result.append(node)
+    return result
+
+
+def _documents(tables: dict) -> tuple:
+    """One text per table and per column, with the table each belongs to."""
+    texts, owners = [], []
+    for table, info in tables.items():
+        texts.append(f"{table.replace('_', ' ')}: {TABLE_HINTS.get(table, '')} {' '.join(info['columns'])}")
+        owners.append(table)
+        for column in info["columns"]:
+            text = f"{table.replace('_', ' ')} {column.replace('_', ' ')}"
+            if info["samples"].get(column):
+                text += f" e.g. {', '.join(info['samples'][column])}"
+            texts.append(text)
+            owners.append(table)
+    return texts, owners
+
+
+class SchemaIndex:
+    """Embedding index over tables, columns and sample values.
+
+    Vectors are persisted to CONFIG.schema_index_path and rebuilt when the
+    schema, sample values or embedder change.
+    """
+
+    def __init__(self, conn, path=None):
+        self.path = path or CONFIG.schema_index_path
+        self.db_path = CONFIG.db_path
+        from src.sql.pool import file_id
+        self.file_id = file_id(self.db_path)
+        self.tables = introspect(conn)
+        self.graph = join_graph(self.tables)
+        texts, owners = _documents(self.tables)
+        self.owners = owners
+        self.keywords = {
+            t: _tokens(f"{t} {TABLE_HINTS.get(t, '')} {' '.join(info['columns'])}")
+            for t, info in self.tables.items()
+        }
+        self.key = hashlib.sha256(
+            json.dumps([embeddings.embedder_id(), texts], sort_keys=True).encode()
+        ).hexdigest()
+        self.vectors = self._load(self.key)
+        if self.vectors is None:
+            self.vectors = embeddings.embed(texts)
+            self._save(self.key)
+
+    def _load(self, key: str):
+        try:
+            with np.load(self.path) as stored:
+                if str(stored["key"]) == key:
+                    return stored["vectors"]
+        except (OSError, KeyError, ValueError):
+            pass
+        return None
+
+    def _save(self, key: str):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "wb") as f:
+                np.savez(f, key=np.array(key), vectors=self.vectors)
+        except OSError:
+            pass  # read-only data dir: keep the in-memory index
+
+    def select(self, question: str, k: int = None) -> list:
+        """Top-k tables for the question plus any tables needed to join them.
+
+        A table scores its best-matching document, plus a bonus per question
+        word found in its name, hints or columns.
+        """
+        k = k or CONFIG.schema_top_k
+        scores = self.vectors @ embeddings.embed_one(question)
+        best = {}
+        for table, score in zip(self.owners, scores):
+            best[table] = max(best.get(table, -1.0), float(score))
+        words = _tokens(question)
+        for table in best:
+            best[table] += KEYWORD_BONUS * len(words & self.keywords[table])
+        ranked = sorted(best, key=best.get, reverse=True)[:k]
+        return with_bridges(ranked, self.graph)
+
+    def schema_text(self, tables: list) -> str:
+        """Format tables like generator.SCHEMA, in database order."""
+        lines = [f"- {t}({', '.join(info['columns'])})" for t, info in self.tables.items() if t in tables]
+        return "Tables:\n" + "\n".join(lines)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_schema_index():
+    """Shared index for CONFIG.db_path, or None when there is no database.
+
+    Rebuilt when the path changes or a new file is swapped in (full ingest).
+    """
+    from src.sql.pool import file_id
+    global _index
+    with _index_lock:
+        if _index is None or _index.db_path != CONFIG.db_path or _index.file_id != file_id(CONFIG.db_path):
+            if not CONFIG.db_path.exists():
+                return None
+            from src.sql.pool import get_pool
+            with get_pool().connection() as conn:
+                _index = SchemaIndex(conn)
+        return _index
+
+
+def relevant_schema(question: str):
+    """Schema text limited to the question's tables, or None to use the full SCHEMA."""
+    if not CONFIG.schema_rag_enabled:
+        return None
+    try:
+        index = get_schema_index()
+        if index is None or not index.tables:
+            return None
+        return index.schema_text(index.select(question))
+    except Exception:
+        return None
+
+
+def schema_key():
+    """Key of what relevant_schema builds prompts from, or None when it falls back to SCHEMA."""
+    if not CONFIG.schema_rag_enabled:
+        return None
+    try:
+        index = get_schema_index()
+        return index.key if index is not None and index.tables else None
+    except Exception:
+        return None
@@ -0,0 +1,119 @@
+import os
+import sqlite3
+import threading
+import time
+from src.config.settings import CONFIG
+
+
+class SharedCache:
+    """Key -> bytes store in one SQLite file that every worker process opens.
+
+    The second tier behind the per-process caches: what one worker
+    computed, the others find. WAL lets readers run beside the single
+    writer; past max_bytes the oldest entries are dropped. Connections are
+    reopened after a fork, so an instance created before fork is safe.
+    """
+
+    def __init__(self, path=None, max_bytes: int = None):
+        self.path = path or CONFIG.shared_cache_path
+        self.max_bytes = max_bytes or CONFIG.shared_cache_max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._unchecked = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries "
+                "(key TEXT PRIMARY KEY, value BLOB, size INTEGER, stored_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_stored ON entries(stored_at)")
+            conn.commit()
+            # The parent's connection belongs to the parent; never close it here
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def get(self, key: str):
+        """Stored bytes for key, or None."""
+        try:
+            with self._lock:
+                row = self._connection().execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error:
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def put(self, key: str, value: bytes):
+        """Store value; values over a tenth of the budget are not shared."""
+        if len(value) > self.max_bytes // 10:
+            return
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                             (key, value, len(value), time.time()))
+                # Sum the sizes once a tenth of the budget was written since the last check
+                self._unchecked += len(value)
+                if self._unchecked >= self.max_bytes // 10:
+                    self._evict(conn)
+                    self._unchecked = 0
+                conn.commit()
+        except sqlite3.Error:
+            pass  # busy or read-only: the local tier still has it
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Oldest first, down to 80% of the budget
+        excess = total - int(self.max_bytes * 0.8)
+        conn.execute(
+            "DELETE FROM entries WHERE key IN (SELECT key FROM ("
+            "SELECT key, SUM(size) OVER (ORDER BY stored_at) AS running FROM entries"
+            ") WHERE running <= ?)",
+            (excess,)
+        )
+
+    def clear(self):
+        with self._lock:
+            self._connection().execute("DELETE FROM entries")
+            self._conn.commit()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_shared = None
+
+
+def get_shared_cache():
+    """Process-wide SharedCache for CONFIG.shared_cache_path, or None when disabled."""
+    global _shared
+    if not CONFIG.shared_cache_enabled:
+        return None
+    if _shared is None or _shared.path != CONFIG.shared_cache_path:
+        _shared = SharedCache()
+    return _shared
@@ -0,0 +1,368 @@
+import json
+import sqlite3
+import threading
+import time
+import sqlglot
+from sqlglot import exp
+from src.config.settings import CONFIG
+from src.sql.parsing import DIALECT, canonical, db_schema, qualify_select
+
+META_TABLE = "_summary_meta"
+# UPDATE/DELETE counts per source table, kept by triggers refresh() installs
+CHANGES_TABLE = "_summary_changes"
+# How a stored column is re-aggregated when merging a delta into it
+_MERGE = {exp.Count: "SUM", exp.Sum: "SUM", exp.Min: "MIN", exp.Max: "MAX"}
+
+
+def describe(sql: str, schema: dict):
+    """Structural signature of an aggregate SELECT: tables, equi-join pairs,
+    WHERE and GROUP BY, all alias-independent. None if sql is out of scope.
+    """
+    parsed = qualify_select(sql, schema)
+    if parsed is None:
+        return None
+    original, qualified, aliases = parsed
+    if len(set(aliases.values())) != len(aliases) or qualified.args.get("distinct"):
+        return None
+    joins = set()
+    for join in qualified.args.get("joins") or []:
+        if join.args.get("side") or join.args.get("kind") not in (None, "", "INNER"):
+            return None
+        condition = join.args.get("on")
+        conjuncts = list(condition.flatten()) if isinstance(condition, exp.And) else [condition]
+        for eq in conjuncts:
+            if not isinstance(eq, exp.EQ) or not all(isinstance(s, exp.Column) for s in (eq.left, eq.right)):
+                return None
+            joins.add(frozenset((canonical(eq.left, aliases), canonical(eq.right, aliases))))
+    where = qualified.args.get("where")
+    group = qualified.args.get("group")
+    return {
+        "original": original,
+        "qualified": qualified,
+        "aliases": aliases,
+        "tables": frozenset(aliases.values()),
+        "joins": frozenset(joins),
+        "where": canonical(where.this, aliases) if where else None,
+        "group": [canonical(g, aliases) for g in group.expressions] if group else [],
+    }
+
+
+def build_summary(name: str, sql: str, schema: dict) -> dict:
+    """Parse a declared summary into dimension and measure columns.
+
+    AVG is stored as a SUM and a COUNT so refresh() can merge deltas;
+    measures maps each aggregate to the expression over stored columns.
+    """
+    info = describe(sql, schema)
+    if info is None or not info["group"]:
+        raise ValueError(f"Summary {name} must be a GROUP BY over inner-joined tables")
+    qualified, aliases = info["qualified"], info["aliases"]
+    dims, measures, merges, select = {}, {}, {}, []
+    for expr in qualified.args["group"].expressions:
+        if not isinstance(expr, exp.Column):
+            raise ValueError(f"Summary {name}: GROUP BY must list plain columns")
+        dims[canonical(expr, aliases)] = expr.name.lower()
+        select.append(expr.copy().as_(expr.name.lower()))
+    for projection in qualified.expressions:
+        for agg in projection.find_all(exp.AggFunc):
+            key = canonical(agg, aliases)
+            if key in measures:
+                continue
+            column = f"m{len(measures)}"
+            if isinstance(agg, exp.Avg) and not agg.find(exp.Distinct):
+                parts = {f"{column}_sum": exp.Sum(this=agg.this.copy()), f"{column}_count": exp.Count(this=agg.this.copy())}
+                measures[key] = sqlglot.parse_one(f"CAST({column}_sum AS REAL) / {column}_count", read=DIALECT)
+            else:
+                parts = {column: agg.copy()}
+                measures[key] = exp.column(column)
+            for part, part_agg in parts.items():
+                merges[part] = None if part_agg.find(exp.Distinct) else _MERGE.get(type(part_agg))
+                select.append(part_agg.as_(part))
+    materialize = qualified.copy()
+    materialize.set("expressions", select)
+    materialize.set("order", None)
+    materialize.set("limit", None)
+    return {
+        **info,
+        "name": name,
+        "definition": sql,
+        "dims": dims,
+        "measures": measures,
+        "merges": merges,
+        "materialize": materialize,
+        "materialize_sql": materialize.sql(dialect=DIALECT),
+    }
+
+
+def fingerprint(conn, tables) -> str:
+    """UPDATE/DELETE count, row count and max rowid per source table.
+
+    The first changes on any UPDATE or DELETE, the others on inserts.
+    """
+    parts = {}
+    for table in sorted(tables):
+        try:
+            row = conn.execute(f"SELECT mutations FROM {CHANGES_TABLE} WHERE name = ?", (table,)).fetchone()
+        except sqlite3.OperationalError:
+            row = None  # not tracked yet: never fresh until refreshed
+        count, max_rowid = conn.execute(f'SELECT COUNT(*), MAX(rowid) FROM "{table}"').fetchone()
+        parts[table] = [row[0] if row else None, count, max_rowid or 0]
+    return json.dumps(parts)
+
+
+def _track(conn, table: str):
+    """Count UPDATEs and DELETEs on table (inserts show in its count and rowid)."""
+    conn.execute(f"INSERT OR IGNORE INTO {CHANGES_TABLE} VALUES (?, 0)", (table,))
+    for event in ("UPDATE", "DELETE"):
+        conn.execute(
+            f'CREATE TRIGGER IF NOT EXISTS "{CHANGES_TABLE}_{table}_{event.lower()}" AFTER {event} ON "{table}" '
+            f"BEGIN UPDATE {CHANGES_TABLE} SET mutations = mutations + 1 WHERE name = '{table}'; END"
+        )
+
+
+def delta_sql(conn, summary: dict, stored: str):
+    """SQL aggregating only the rows inserted since the stored fingerprint.
+
+    None when that isn't enough: rows were updated or deleted, or inserted
+    below the old max rowid. For an inner join, the delta is the sum over
+    each grown table of its new rows joined with the tables before it in
+    full and the tables after it as they were.
+    """
+    old, new = json.loads(stored), json.loads(fingerprint(conn, summary["tables"]))
+    if old.keys() != new.keys() or any(len(parts) != 3 for parts in old.values()):
+        return None
+    alias = {table: name for name, table in summary["aliases"].items()}
+    grown = []
+    for table in sorted(old):
+        (old_mutations, old_count, old_max), (mutations, count, _) = old[table], new[table]
+        if old_mutations is None or mutations != old_mutations:
+            return None
+        if count != old_count:
+            above = conn.execute(f'SELECT COUNT(*) FROM "{table}" WHERE rowid > ?', (old_max,)).fetchone()[0]
+            if above != count - old_count:
+                return None
+            grown.append((table, old_max))
+    parts = []
+    for i, (table, old_max) in enumerate(grown):
+        query = summary["materialize"].copy().where(f"{alias[table]}.rowid > {old_max}", dialect=DIALECT)
+        for later, later_max in grown[i + 1:]:
+            query = query.where(f"{alias[later]}.rowid <= {later_max}", dialect=DIALECT)
+        parts.append(query.sql(dialect=DIALECT))
+    return " UNION ALL ".join(parts) or None
+
+
+def _merge(conn, summary: dict, delta: str):
+    """Fold delta's rows into the summary table, re-aggregating by group."""
+    name = summary["name"]
+    dims = ", ".join(f'"{d}"' for d in summary["dims"].values())
+    if all(summary["merges"].values()):
+        measures = ", ".join(f'{fn}("{c}") AS "{c}"' for c, fn in summary["merges"].items())
+        conn.execute(
+            f'CREATE TABLE "{name}__merge" AS SELECT {dims}, {measures} '
+            f'FROM (SELECT * FROM "{name}" UNION ALL {delta}) GROUP BY {dims}'
+        )
+        conn.execute(f'DROP TABLE "{name}"')
+        conn.execute(f'ALTER TABLE "{name}__merge" RENAME TO "{name}"')
+        return
+    # COUNT(DISTINCT) and friends can't be merged: recompute the groups the delta touched
+    names = list(summary["dims"].values())
+    sources = [g.sql(dialect=DIALECT) for g in summary["materialize"].args["group"].expressions]
+
+    def in_groups(columns):
+        condition = " AND ".join(f'g."{d}" IS {c}' for d, c in zip(names, columns))
+        return f"EXISTS (SELECT 1 FROM temp._summary_groups g WHERE {condition})"
+
+    conn.execute("DROP TABLE IF EXISTS temp._summary_groups")
+    conn.execute(f"CREATE TEMP TABLE _summary_groups AS SELECT DISTINCT {dims} FROM ({delta})")
+    conn.execute(f'DELETE FROM "{name}" WHERE ' + in_groups([f'"{name}"."{d}"' for d in names]))
+    query = summary["materialize"].copy().where(in_groups(sources), dialect=DIALECT)
+    conn.execute(f'INSERT INTO "{name}" {query.sql(dialect=DIALECT)}')
+    conn.execute("DROP TABLE temp._summary_groups")
+
+
+def rewrite_query(sql: str, summary: dict, schema: dict):
+    """Rewrite sql against summary if it has the same shape, else None.
+
+    The tables, join pairs, WHERE and GROUP BY must match exactly, and every
+    aggregate and grouped column in SELECT/HAVING/ORDER BY must map to a
+    summary column. Output column names are preserved.
+    """
+    info = describe(sql, schema)
+    if info is None or not info["group"]:
+        return None
+    if (info["tables"], info["joins"], info["where"]) != (summary["tables"], summary["joins"], summary["where"]):
+        return None
+    if sorted(info["group"]) != sorted(summary["group"]):
+        return None
+    for projection in info["original"].expressions:
+        if not isinstance(projection, (exp.Alias, exp.Column)):
+            return None
+
+    aliases = info["aliases"]
+    mapping = {**{key: exp.column(name) for key, name in summary["dims"].items()}, **summary["measures"]}
+    qualified = info["qualified"]
+    outputs = {p.alias_or_name.lower() for p in qualified.expressions}
+    allowed = set(summary["dims"].values()) | set(summary["merges"])
+
+    def substitute(node):
+        if isinstance(node, (exp.AggFunc, exp.Column)):
+            key = canonical(node, aliases)
+            if key in mapping:
+                return mapping[key].copy()
+        return node
+
+    def mapped(expression, extra=()):
+        result = expression.copy().transform(substitute)
+        if any(True for _ in result.find_all(exp.AggFunc)):
+            return None
+        for column in result.find_all(exp.Column):
+            if column.table or column.name.lower() not in allowed | set(extra):
+                return None
+        return result
+
+    select = []
+    for projection in qualified.expressions:
+        inner = mapped(projection.this if isinstance(projection, exp.Alias) else projection)
+        if inner is None:
+            return None
+        select.append(inner.as_(projection.alias_or_name))
+    rewritten = exp.select(*select).from_(summary["name"])
+    having = qualified.args.get("having")
+    if having:
+        condition = mapped(having.this, outputs)
+        if condition is None:
+            return None
+        rewritten = rewritten.where(condition)
+    order = qualified.args.get("order")
+    if order:
+        ordered = []
+        for item in order.expressions:
+            key = mapped(item.this, outputs)
+            if key is None:
+                return None
+            item = item.copy()
+            item.set("this", key)
+            ordered.append(item)
+        rewritten = rewritten.order_by(*ordered)
+    for arg in ("limit", "offset"):
+        if qualified.args.get(arg):
+            rewritten.set(arg, qualified.args[arg].copy())
+    return rewritten.sql(dialect=DIALECT)
+
+
+class SummaryRegistry:
+    """Materialized summary tables declared in CONFIG.summary_tables."""
+
+    def __init__(self, definitions: dict = None):
+        self.definitions = CONFIG.summary_tables if definitions is None else definitions
+        self._lock = threading.Lock()
+        self._summaries = {}
+        self._fresh = {}
+
+    def summaries(self, conn) -> list:
+        schema = db_schema(conn)
+        key = json.dumps(schema, sort_keys=True)
+        if key not in self._summaries:
+            built = []
+            for name, sql in self.definitions.items():
+                try:
+                    built.append(build_summary(name, sql, schema))
+                except Exception:
+                    continue  # source tables missing from this database
+            self._summaries[key] = built
+        return self._summaries[key]
+
+    def refresh(self, conn, force: bool = False) -> list:
+        """Bring summaries whose definition or source tables changed up to date.
+
+        Rows only appended since the last refresh are aggregated on their
+        own and merged in; any UPDATE or DELETE on a source table, or a
+        changed definition, rebuilds the summary. Needs a writable
+        connection; returns the names that were refreshed.
+        """
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")  # no writes between fingerprint and materialize
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {META_TABLE} "
+            "(name TEXT PRIMARY KEY, definition TEXT, fingerprint TEXT, refreshed_at REAL)"
+        )
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {CHANGES_TABLE} (name TEXT PRIMARY KEY, mutations INTEGER)")
+        refreshed = []
+        for summary in self.summaries(conn):
+            for table in summary["tables"]:
+                _track(conn, table)
+            current = fingerprint(conn, summary["tables"])
+            row = conn.execute(
+                f"SELECT definition, fingerprint FROM {META_TABLE} WHERE name = ?", (summary["name"],)
+            ).fetchone()
+            if not force and row == (summary["definition"], current):
+                continue
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name = ?", (summary["name"],)
+            ).fetchone()
+            delta = None
+            if not force and exists and row and row[0] == summary["definition"]:
+                delta = delta_sql(conn, summary, row[1])
+            if delta:
+                _merge(conn, summary, delta)
+            else:
+                conn.execute(f'DROP TABLE IF EXISTS "{summary["name"]}"')
+                conn.execute(f'CREATE TABLE "{summary["name"]}" AS {summary["materialize_sql"]}')
+            conn.execute(
+                f"INSERT OR REPLACE INTO {META_TABLE} VALUES (?, ?, ?, ?)",
+                (summary["name"], summary["definition"], current, time.time())
+            )
+            refreshed.append(summary["name"])
+        conn.commit()
+        return refreshed
+
+    def fresh(self, conn) -> list:
+        """Summaries whose stored fingerprint matches the source tables.
+
+        Re-checked only when the connection sees a new data version.
+        """
+        version = (conn.execute("PRAGMA data_version").fetchone()[0], conn.total_changes)
+        with self._lock:
+            cached = self._fresh.get(id(conn))
+            if cached and cached[0] == version:
+                return cached[1]
+        has_meta = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name = ?", (META_TABLE,)
+        ).fetchone()
+        fresh = []
+        if has_meta:
+            stored = dict(
+                (name, (definition, fp)) for name, definition, fp
+                in conn.execute(f"SELECT name, definition, fingerprint FROM {META_TABLE}")
+            )
+            for summary in self.summaries(conn):
+                if stored.get(summary["name"]) == (summary["definition"], fingerprint(conn, summary["tables"])):
+                    fresh.append(summary)
+        with self._lock:
+            self._fresh[id(conn)] = (version, fresh)
+        return fresh
+
+    def rewrite(self, sql: str, conn) -> str:
+        """Route sql to a fresh matching summary, or return it unchanged."""
+        try:
+            summaries = self.fresh(conn)
+            if not summaries:
+                return sql
+            schema = db_schema(conn)
+            for summary in summaries:
+                rewritten = rewrite_query(sql, summary, schema)
+                if rewritten:
+                    return rewritten
+        except Exception:
+            pass
+        return sql
+
+
+_registry = None
+
+
+def get_summary_registry() -> SummaryRegistry:
+    global _registry
+    if _registry is None:
+        _registry = SummaryRegistry()
+    return _registry
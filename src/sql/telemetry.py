@@ -0,0 +1,157 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from src.config.settings import CONFIG
+
+PREFIX = "texttosql"
+QUANTILES = (0.5, 0.95, 0.99)
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COUNT_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+
+# name -> (help, buckets, label)
+FAMILIES = {
+    "stage_seconds": ("Time spent in each stage of a query.", SECONDS_BUCKETS, "stage"),
+    "llm_tokens": ("Tokens generated per LLM response.", COUNT_BUCKETS, None),
+    "llm_tokens_per_second": ("LLM generation rate per response.", (1, 5, 10, 20, 50, 100, 200, 500), None),
+    "rows_returned": ("Rows returned per executed query.", COUNT_BUCKETS, None),
+}
+
+# The current request's breakdown (stage -> ms); None outside a trace
+_trace = ContextVar("trace", default=None)
+
+
+class Histogram:
+    """Cumulative Prometheus buckets plus a sliding window for quantiles."""
+
+    def __init__(self, buckets: tuple, window: int):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+        self.recent.append(value)
+
+    def quantile(self, q: float) -> float:
+        values = sorted(self.recent)
+        if not values:
+            return 0.0
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def _labels(pairs: list) -> str:
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}" if pairs else ""
+
+
+class Registry:
+    """Histograms by family and label, rendered in the Prometheus text format."""
+
+    def __init__(self, window: int = None):
+        self.window = window or CONFIG.metrics_window
+        self._histograms = {name: {} for name in FAMILIES}
+        self._lock = threading.Lock()
+
+    def observe(self, family: str, value: float, label: str = ""):
+        with self._lock:
+            histogram = self._histograms[family].get(label)
+            if histogram is None:
+                histogram = self._histograms[family][label] = Histogram(FAMILIES[family][1], self.window)
+            histogram.observe(value)
+
+    def get(self, family: str, label: str = ""):
+        return self._histograms[family].get(label)
+
+    def render(self, gauges: dict = None) -> str:
+        lines = []
+        with self._lock:
+            for family, (help_text, _, label_name) in FAMILIES.items():
+                name = f"{PREFIX}_{family}"
+                histograms = sorted(self._histograms[family].items())
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for label, h in histograms:
+                    base = [(label_name, label)] if label_name else []
+                    for bound, count in zip(h.buckets, h.counts):
+                        lines.append(f"{name}_bucket{_labels(base + [('le', bound)])} {count}")
+                    lines.append(f"{name}_bucket{_labels(base + [('le', '+Inf')])} {h.count}")
+                    lines.append(f"{name}_sum{_labels(base)} {h.sum}")
+                    lines.append(f"{name}_count{_labels(base)} {h.count}")
+                # Quantiles over the recent window, as a summary
+                lines += [f"# HELP {name}_recent {help_text} Quantiles over the last {self.window} values.",
+                          f"# TYPE {name}_recent summary"]
+                for label, h in histograms:
+                    base = [(label_name, label)] if label_name else []
+                    for q in QUANTILES:
+                        lines.append(f"{name}_recent{_labels(base + [('quantile', q)])} {h.quantile(q)}")
+                    lines.append(f"{name}_recent_sum{_labels(base)} {sum(h.recent)}")
+                    lines.append(f"{name}_recent_count{_labels(base)} {len(h.recent)}")
+        for name, (help_text, value) in (gauges or {}).items():
+            lines += [f"# HELP {PREFIX}_{name} {help_text}", f"# TYPE {PREFIX}_{name} gauge",
+                      f"{PREFIX}_{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self._lock:
+            self._histograms = {name: {} for name in FAMILIES}
+
+
+REGISTRY = Registry()
+
+
+def observe(family: str, value: float, label: str = ""):
+    """Record one value, if metrics are enabled."""
+    if CONFIG.metrics_enabled:
+        REGISTRY.observe(family, value, label)
+
+
+@contextmanager
+def span(stage: str):
+    """Time a stage into the stage histogram and the current request's trace."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        observe("stage_seconds", elapsed, stage)
+        trace = _trace.get()
+        if trace is not None:
+            trace[stage] = trace.get(stage, 0.0) + elapsed * 1000
+
+
+@contextmanager
+def request_trace():
+    """Collect the spans of this request (and its threads/tasks) into a dict."""
+    trace = {}
+    token = _trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _trace.reset(token)
+
+
+def server_timing(trace: dict) -> str:
+    """A trace as a Server-Timing header value."""
+    return ", ".join(f"{stage};dur={ms:.2f}" for stage, ms in trace.items())
+
+
+def cache_gauges() -> dict:
+    """Hit ratios of the caches that exist in this process."""
+    from src.sql import cache, result_cache
+    gauges = {}
+    if cache._cache is not None:
+        gauges["query_cache_hit_ratio"] = ("Question cache hit ratio.", cache._cache.stats()["hit_ratio"])
+    if result_cache._cache is not None:
+        gauges["result_cache_hit_ratio"] = ("Result cache hit ratio.", result_cache._cache.stats()["hit_ratio"])
+    return gauges
+
+
+def render_metrics() -> str:
+    """Everything /metrics serves."""
+    return REGISTRY.render(cache_gauges())
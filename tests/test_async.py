@@ -0,0 +1,71 @@
+import asyncio
+import sqlite3
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from src.config.settings import CONFIG
+from src.sql import generator
+from src.sql.executor import aexecute_sql
+
+
+@pytest.fixture
+def mock_ollama(monkeypatch):
+    """Route the shared async client to an in-process Ollama stub."""
+    def handler(request):
+        return httpx.Response(200, json={"response": "SELECT COUNT(*) FROM orders;"})
+    monkeypatch.setattr(generator, "_async_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    yield
+    monkeypatch.setattr(generator, "_async_client", None)
+
+
+def test_acall_llm(mock_ollama):
+    """Test async LLM call on the shared client."""
+    result = asyncio.run(generator.acall_llm("test prompt"))
+    assert result == "SELECT COUNT(*) FROM orders;"
+
+
+def test_agenerate_sql(mock_ollama):
+    """Test async SQL generation."""
+    sql = asyncio.run(generator.agenerate_sql("How many orders?"))
+    assert sql == "SELECT COUNT(*) FROM orders;"
+
+
+def test_acall_llm_deadline(monkeypatch):
+    """Test per-request deadline."""
+    async def slow(request):
+        await asyncio.sleep(1)
+        return httpx.Response(200, json={"response": "SELECT 1;"})
+    monkeypatch.setattr(generator, "_async_client", httpx.AsyncClient(transport=httpx.MockTransport(slow)))
+    result = asyncio.run(generator.acall_llm("test prompt", timeout=0.05))
+    monkeypatch.setattr(generator, "_async_client", None)
+    assert "deadline" in result
+
+
+def test_aexecute_sql(tmp_path, monkeypatch):
+    """Test async execution off the event loop."""
+    db = tmp_path / "test.db"
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE orders (order_id TEXT)")
+    conn.execute("INSERT INTO orders VALUES ('o1'), ('o2')")
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(CONFIG, "db_path", db)
+    success, result, error = asyncio.run(aexecute_sql("SELECT COUNT(*) as total FROM orders"))
+    assert success is True
+    assert result.iloc[0]["total"] == 2
+
+
+def test_query_endpoint(tmp_path, monkeypatch):
+    """Test async /query end to end."""
+    from src.api.app import app
+    
+    async def fake_generate(question, timeout=None):
+        return "SELECT 1 as one;"
+    monkeypatch.setattr(generator, "agenerate_sql", fake_generate)
+    monkeypatch.setattr(CONFIG, "cache_enabled", False)
+    monkeypatch.setattr(CONFIG, "db_path", tmp_path / "test.db")
+    sqlite3.connect(CONFIG.db_path).close()
+    
+    response = TestClient(app).post("/query", json={"question": "One?"})
+    assert response.status_code == 200
+    assert response.json()["result"] == [{"one": 1}]
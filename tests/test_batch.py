@@ -0,0 +1,135 @@
+import asyncio
+import json
+import time
+import pytest
+from fastapi.testclient import TestClient
+from src.api.app import app
+from src.config.settings import CONFIG
+from src.evaluation.benchmark import configured
+from src.evaluation.synthetic import build_database
+from src.sql import executor, generator
+from src.sql.batch import run_batch
+
+# question -> (seconds to generate, SQL the "LLM" writes)
+ANSWERS = {
+    "slow": (0.2, "SELECT COUNT(*) AS n FROM orders;"),
+    "orders": (0.05, "SELECT COUNT(*) AS n FROM orders;"),
+    "customers": (0.05, "SELECT COUNT(*) AS n FROM customers;"),
+    "bad column": (0.0, "SELECT nope FROM orders;"),
+    "llm down": (0.0, "ERROR: connection refused"),
+}
+
+
+@pytest.fixture(scope="module")
+def shop_db(tmp_path_factory):
+    """A 200-order synthetic database."""
+    return build_database(tmp_path_factory.mktemp("batch") / "olist.db", 200)
+
+
+@pytest.fixture
+def pipeline(shop_db, monkeypatch):
+    """Fake LLM with per-question latency; an event log of stage starts."""
+    events = []
+
+    async def draft(question, timeout=None):
+        events.append(("generate", question, time.perf_counter()))
+        delay, sql = ANSWERS[question]
+        await asyncio.sleep(delay)
+        return sql
+
+    async def complete(prompt, timeout=None):
+        return "SELECT still_nope FROM orders;"
+
+    real_execute = executor.execute_sql
+
+    def execute(sql, conn=None, engine=None):
+        events.append(("execute", sql, time.perf_counter()))
+        return real_execute(sql, conn, engine)
+
+    monkeypatch.setattr(generator, "adraft_sql", draft)
+    monkeypatch.setattr(generator, "acomplete", complete)
+    monkeypatch.setattr(executor, "execute_sql", execute)
+    with configured(db_path=shop_db, cache_enabled=False, result_cache_enabled=False, max_retries=1):
+        yield events
+
+
+def collect(questions, **kwargs):
+    async def run():
+        return [record async for record in run_batch(questions, **kwargs)]
+    return asyncio.run(run())
+
+
+def test_stages_overlap(pipeline, monkeypatch):
+    """Test the first question's SQL runs while later ones still generate."""
+    monkeypatch.setattr(CONFIG, "batch_generate_workers", 1)
+    records = collect(["orders"] * 6)
+    assert all(r["success"] for r in records)
+    first_execute = min(t for stage, _, t in pipeline if stage == "execute")
+    last_generate = max(t for stage, _, t in pipeline if stage == "generate")
+    assert first_execute < last_generate
+
+
+def test_completion_order_with_index(pipeline):
+    """Test records stream as they finish, each with its input index."""
+    records = collect(["slow", "orders", "customers"])
+    assert [r["index"] for r in records][-1] == 0
+    by_index = {r["index"]: r for r in records}
+    assert by_index[0]["result"] == [{"n": 200}]
+    assert by_index[2]["result"] == [{"n": 100}]
+    assert set(by_index[1]["ms"]) == {"generate", "validate", "execute"}
+
+
+def test_failures_are_records(pipeline):
+    """Test unfixable SQL and LLM errors come back as failed records."""
+    records = {r["question"]: r for r in collect(["bad column", "llm down", "orders"], limit=0)}
+    assert records["bad column"]["success"] is False and "still_nope" in records["bad column"]["error"]
+    assert records["llm down"]["error"] == "ERROR: connection refused"
+    assert records["orders"]["result"] == [] and records["orders"]["row_count"] == 1
+
+
+def test_generation_shares_scheduler_cap(pipeline, monkeypatch):
+    """Test batch LLM calls wait for the scheduler's slots like /query."""
+    peak = {"now": 0, "max": 0}
+
+    async def draft(question, timeout=None):
+        peak["now"] += 1
+        peak["max"] = max(peak["max"], peak["now"])
+        await asyncio.sleep(0.01)
+        peak["now"] -= 1
+        return ANSWERS[question][1]
+
+    monkeypatch.setattr(generator, "adraft_sql", draft)
+    with configured(scheduler_max_concurrent=1, batch_generate_workers=4):
+        records = collect(["orders", "customers"] * 4)
+    assert all(r["success"] for r in records)
+    assert peak["max"] == 1
+
+
+def test_duplicates_share_one_generation(pipeline):
+    """Test repeated questions are single-flighted through the scheduler, not drafted per record."""
+    records = collect(["slow"] * 4)
+    assert all(r["success"] for r in records)
+    assert sum(stage == "generate" for stage, _, _ in pipeline) == 1
+    with configured(scheduler_enabled=False):
+        assert all(r["success"] for r in collect(["slow"] * 4))
+    assert sum(stage == "generate" for stage, _, _ in pipeline) == 5
+
+
+def test_overload_fails_records(pipeline):
+    """Test questions shed by the scheduler come back as failed records."""
+    with configured(scheduler_max_concurrent=1, scheduler_max_queue=1, batch_generate_workers=4):
+        records = collect(["slow", "orders", "customers", "bad column"])
+    shed = [r for r in records if not r["success"]]
+    assert shed and all("LLM backlog full" in r["error"] for r in shed)
+
+
+def test_batch_endpoint(pipeline):
+    """Test /query/batch streams JSONL and rejects oversized batches."""
+    client = TestClient(app)
+    response = client.post("/query/batch", json={"questions": ["customers", "orders"]})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(r["index"] for r in lines) == [0, 1] and all(r["success"] for r in lines)
+    with configured(batch_max_questions=1):
+        assert client.post("/query/batch", json={"questions": ["a", "b"]}).status_code == 400
+    assert client.post("/query/batch", json={"questions": ["orders"], "limit": -1}).status_code == 422
@@ -0,0 +1,84 @@
+import sqlite3
+import pytest
+from src.evaluation.benchmark import bench_execute, compare_reports, configured, gold_queries, time_call
+from src.evaluation.synthetic import build_database, synthetic_db, table_sizes
+
+
+@pytest.fixture(scope="module")
+def small_db(tmp_path_factory):
+    """A 2,000-order synthetic database."""
+    return build_database(tmp_path_factory.mktemp("bench") / "olist.db", 2_000)
+
+
+def test_synthetic_shape(small_db):
+    """Test Olist-like row ratios and referential integrity."""
+    conn = sqlite3.connect(small_db)
+
+    def count(sql):
+        return conn.execute(sql).fetchone()[0]
+
+    assert count("SELECT COUNT(*) FROM orders") == 2_000
+    assert count("SELECT COUNT(*) FROM customers") == table_sizes(2_000)["customers"]
+    assert 1.3 < count("SELECT COUNT(*) FROM order_items") / 2_000 < 1.7
+    assert count("SELECT COUNT(*) FROM orders o LEFT JOIN customers c USING (customer_id) "
+                 "WHERE c.customer_id IS NULL") == 0
+    assert count("SELECT COUNT(*) FROM order_items oi LEFT JOIN products p USING (product_id) "
+                 "WHERE p.product_id IS NULL") == 0
+    assert count("SELECT COUNT(*) FROM orders WHERE order_status = 'delivered' "
+                 "AND order_delivered_timestamp IS NULL") == 0
+    assert count("SELECT COUNT(DISTINCT order_id) FROM orders") == 2_000
+    conn.close()
+
+
+def test_synthetic_deterministic(small_db, tmp_path):
+    """Test the same seed builds the same data."""
+    other = build_database(tmp_path / "again.db", 2_000)
+    sql = "SELECT SUM(price), MIN(order_id) FROM order_items"
+    assert sqlite3.connect(small_db).execute(sql).fetchone() == sqlite3.connect(other).execute(sql).fetchone()
+
+
+def test_synthetic_db_cached(tmp_path):
+    """Test databases are built once per scale."""
+    path = synthetic_db(500, tmp_path)
+    mtime = path.stat().st_mtime_ns
+    assert synthetic_db(500, tmp_path) == path
+    assert path.stat().st_mtime_ns == mtime
+
+
+def test_gold_queries_run_on_synthetic(small_db):
+    """Test every gold query executes on the synthetic schema."""
+    results = bench_execute(small_db, gold_queries(), repeat=1)
+    assert all(r["success"] for r in results.values()), results
+
+
+def test_time_call():
+    """Test timing statistics."""
+    calls = []
+    timing = time_call(lambda: calls.append(1), repeat=3, warmup=2)
+    assert len(calls) == 5
+    assert timing["rounds"] == 3
+    assert timing["min_ms"] <= timing["median_ms"] <= timing["max_ms"]
+
+
+def test_configured_restores():
+    """Test CONFIG overrides are undone."""
+    from src.config.settings import CONFIG
+    before = CONFIG.cache_enabled
+    with configured(cache_enabled=not before):
+        assert CONFIG.cache_enabled is not before
+    assert CONFIG.cache_enabled is before
+
+
+def test_compare_reports():
+    """Test regressions are flagged past the threshold."""
+    def report(q0, api):
+        return {"scales": {"10000": {
+            "execute_sql": {"q00": {"min_ms": q0}},
+            "get_schema": {"min_ms": 1.0},
+            "api": {"p50_ms": api},
+        }}}
+    rows = {key: (change, regressed) for key, _, _, change, regressed in
+            compare_reports(report(10.0, 100.0), report(13.0, 90.0), threshold=0.2)}
+    assert rows["10000/execute_sql/q00"] == (pytest.approx(0.3), True)
+    assert rows["10000/api/p50"] == (pytest.approx(-0.1), False)
+    assert rows["10000/get_schema"] == (0.0, False)
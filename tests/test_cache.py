@@ -0,0 +1,88 @@
+import pytest
+from src.sql.cache import QueryCache, normalize_question
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Cache backed by a temporary SQLite file."""
+    return QueryCache(path=tmp_path / "cache.db", similarity_threshold=0.8)
+
+
+def test_normalize_question():
+    """Test question normalization."""
+    assert normalize_question("  How many   ORDERS? ") == "how many orders"
+
+
+def test_cache_miss_then_exact_hit(cache):
+    """Test exact-match tier."""
+    assert cache.get("How many orders?") is None
+    cache.put("How many orders?", "SELECT COUNT(*) FROM orders;")
+    assert cache.get("how many orders") == ("SELECT COUNT(*) FROM orders;", "exact")
+    stats = cache.stats()
+    assert stats["hits_exact"] == 1
+    assert stats["misses"] == 1
+
+
+def test_cache_semantic_hit(cache):
+    """Test nearest-neighbour tier."""
+    cache.put("How many delivered orders?", "SELECT COUNT(*) FROM orders WHERE order_status = 'delivered';")
+    hit = cache.get("How many orders were delivered?")
+    assert hit is not None
+    assert hit[1] == "semantic"
+    assert cache.get("Average basket by city?") is None
+
+
+def test_cache_persists(tmp_path):
+    """Test warm state survives a new instance."""
+    QueryCache(path=tmp_path / "cache.db").put("How many orders?", "SELECT 1;")
+    assert QueryCache(path=tmp_path / "cache.db").get("How many orders?") is not None
+
+
+def test_cache_lru_eviction(tmp_path):
+    """Test least recently used entries are evicted."""
+    cache = QueryCache(path=tmp_path / "cache.db", max_entries=2, similarity_threshold=0)
+    cache.put("first question", "SELECT 1;")
+    cache.put("second question", "SELECT 2;")
+    cache.get("first question")
+    cache.put("third question", "SELECT 3;")
+    assert cache.get("second question") is None
+    assert cache.get("first question") is not None
+    assert cache.stats()["entries"] == 2
+
+
+def test_cache_ttl(tmp_path):
+    """Test expired entries are ignored."""
+    cache = QueryCache(path=tmp_path / "cache.db", ttl_seconds=1, similarity_threshold=0)
+    cache.put("How many orders?", "SELECT 1;")
+    cache.ttl_seconds = -1
+    assert cache.get("How many orders?") is None
+
+
+def test_cache_ttl_zero(tmp_path):
+    """Test a TTL of 0 is honoured rather than replaced by the default."""
+    cache = QueryCache(path=tmp_path / "cache.db", ttl_seconds=0, similarity_threshold=0)
+    cache.put("How many orders?", "SELECT 1;")
+    assert cache.get("How many orders?") is None
+
+
+def test_cache_semantic_needs_same_literals(cache):
+    """Test a semantic hit never swaps a year, count or quoted value."""
+    cache.put("How many orders in 2017?", "SELECT COUNT(*) FROM orders WHERE strftime('%Y', t) = '2017';")
+    cache.put("Top 5 cities by orders", "SELECT city FROM c LIMIT 5;")
+    assert cache.get("How many orders in 2018?") is None
+    assert cache.get("Top 10 cities by orders") is None
+    assert cache.get("Top 5 cities by order count")[1] == "semantic"
+
+
+def test_cache_keyed_by_live_prompt_context(cache, monkeypatch):
+    """Test a new schema index or example bank invalidates cached SQL."""
+    from src.sql import examples, schema_index
+    monkeypatch.setattr(schema_index, "schema_key", lambda: "schema-v1")
+    monkeypatch.setattr(examples, "examples_key", lambda: "bank-v1")
+    cache.put("How many orders?", "SELECT 1;")
+    assert cache.get("How many orders?") is not None
+    monkeypatch.setattr(schema_index, "schema_key", lambda: "schema-v2")
+    assert cache.get("How many orders?") is None
+    monkeypatch.setattr(schema_index, "schema_key", lambda: "schema-v1")
+    monkeypatch.setattr(examples, "examples_key", lambda: "bank-v2")
+    assert cache.get("How many orders?") is None
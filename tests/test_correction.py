@@ -0,0 +1,150 @@
+import asyncio
+import sqlite3
+from unittest.mock import MagicMock
+import pytest
+from src.config.settings import CONFIG
+from src.sql import correction, generator
+from src.sql.correction import FixCache, correct_sql, validate_sql
+
+
+@pytest.fixture(autouse=True)
+def schema_db(tmp_path, monkeypatch):
+    """A live database with rows, plus a fresh fix cache."""
+    db = tmp_path / "ecommerce.db"
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE orders (order_id TEXT, order_status TEXT)")
+    conn.execute("INSERT INTO orders VALUES ('o1', 'delivered')")
+    conn.execute("CREATE VIEW delivered AS SELECT * FROM orders WHERE order_status = 'delivered'")
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(CONFIG, "db_path", db)
+    monkeypatch.setattr(CONFIG, "schema_rag_enabled", False)
+    monkeypatch.setattr(correction, "_fixes", FixCache(10))
+    return db
+
+
+def test_validate_sql_accepts_valid():
+    """Test valid SELECTs (including views) pass."""
+    assert validate_sql("SELECT COUNT(*) FROM orders;") is None
+    assert validate_sql("SELECT order_id FROM delivered") is None
+
+
+def test_validate_sql_reports_errors():
+    """Test precise errors for names, syntax and statement type."""
+    assert "no such column: order_date" in validate_sql("SELECT order_date FROM orders")
+    assert "no such table: order" in validate_sql("SELECT * FROM order_list")
+    assert "Expecting )" in validate_sql("SELECT COUNT(* FROM orders")
+    assert validate_sql("DELETE FROM orders") == "Only SELECT queries are allowed"
+    assert validate_sql("") == "Empty query"
+
+
+def test_schema_copy_has_no_rows(schema_db):
+    """Test the validation copy holds the schema only."""
+    conn = correction.schema_connection()
+    assert conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0] == 0
+
+
+def test_schema_copy_follows_live_schema(schema_db):
+    """Test schema changes are picked up."""
+    assert validate_sql("SELECT total FROM orders") is not None
+    conn = sqlite3.connect(schema_db)
+    conn.execute("ALTER TABLE orders ADD COLUMN total REAL")
+    conn.commit()
+    conn.close()
+    assert validate_sql("SELECT total FROM orders") is None
+
+
+def test_schema_fallback_without_database(tmp_path, monkeypatch):
+    """Test the prompt SCHEMA is used when there is no database."""
+    monkeypatch.setattr(CONFIG, "db_path", tmp_path / "missing" / "ecommerce.db")
+    assert validate_sql("SELECT review_score FROM reviews") is None
+    assert validate_sql("SELECT review_stars FROM reviews") is not None
+
+
+def test_correct_sql_retries_with_error():
+    """Test the error is fed back and the fix returned."""
+    complete = MagicMock(return_value="SELECT order_status FROM orders;")
+    sql = correct_sql("Order statuses?", "SELECT status FROM orders;", complete)
+    assert sql == "SELECT order_status FROM orders;"
+    prompt = complete.call_args.args[0]
+    assert "no such column: status" in prompt
+    assert prompt.endswith("Q: Order statuses?\nSQL:")
+
+
+def test_correct_sql_valid_skips_llm():
+    """Test valid SQL costs no extra generation."""
+    complete = MagicMock()
+    assert correct_sql("q", "SELECT 1;", complete) == "SELECT 1;"
+    complete.assert_not_called()
+
+
+def test_correct_sql_gives_up_after_max_retries(monkeypatch):
+    """Test at most max_retries corrections are requested."""
+    monkeypatch.setattr(CONFIG, "max_retries", 2)
+    complete = MagicMock(return_value="SELECT nope FROM orders;")
+    assert correct_sql("q", "SELECT status FROM orders;", complete) == "SELECT nope FROM orders;"
+    assert complete.call_count == 2
+
+
+def test_fix_cache_reuses_known_fix():
+    """Test a known error -> fix pair skips the LLM."""
+    complete = MagicMock(return_value="SELECT order_status FROM orders;")
+    correct_sql("q", "SELECT status FROM orders;", complete)
+    complete.reset_mock()
+    assert correct_sql("other", "select status  from orders", complete) == "SELECT order_status FROM orders;"
+    complete.assert_not_called()
+
+
+def test_backend_errors_not_corrected():
+    """Test LLM failures are returned without retrying."""
+    complete = MagicMock()
+    assert correct_sql("q", "ERROR: timeout", complete) == "ERROR: timeout"
+    complete.assert_not_called()
+
+
+def test_generate_sql_self_corrects(monkeypatch):
+    """Test generate_sql spends one extra call on an invalid query."""
+    call_llm = MagicMock(side_effect=["SELECT status FROM orders;", "SELECT order_status FROM orders;"])
+    monkeypatch.setattr(generator, "call_llm", call_llm)
+    assert generator.generate_sql("Order statuses?") == "SELECT order_status FROM orders;"
+    assert call_llm.call_count == 2
+
+
+def test_agenerate_sql_self_corrects(monkeypatch):
+    """Test the async path corrects too."""
+    responses = iter(["SELECT status FROM orders;", "SELECT order_status FROM orders;"])
+
+    async def acall_llm(prompt, timeout=None):
+        return next(responses)
+    monkeypatch.setattr(CONFIG, "llm_stream", False)
+    monkeypatch.setattr(generator, "acall_llm", acall_llm)
+    assert asyncio.run(generator.agenerate_sql("Order statuses?")) == "SELECT order_status FROM orders;"
+
+
+def test_acorrect_sql_validates_off_the_loop(monkeypatch):
+    """Test acorrect_sql matches correct_sql and runs validate_sql in a worker thread."""
+    import threading
+    threads = []
+    real_validate = correction.validate_sql
+
+    def validate(sql):
+        threads.append(threading.current_thread())
+        return real_validate(sql)
+
+    async def acomplete(prompt):
+        return "SELECT order_status FROM orders;"
+
+    monkeypatch.setattr(correction, "validate_sql", validate)
+    monkeypatch.setattr(correction, "_fixes", FixCache())
+    sql = asyncio.run(correction.acorrect_sql("q", "SELECT status FROM orders;", acomplete))
+    assert sql == "SELECT order_status FROM orders;"
+    assert len(threads) == 2 and threading.main_thread() not in threads
+
+
+def test_fix_cache_key_has_schema_version(monkeypatch):
+    """Test fix keys carry the schema version on any thread, so schema changes miss."""
+    monkeypatch.setattr(correction, "_schema_source", lambda: ("v1", None))
+    key = FixCache.key("SELECT status FROM orders", "no such column: status")
+    assert asyncio.run(asyncio.to_thread(FixCache.key, "SELECT status FROM orders", "no such column: status")) == key
+    monkeypatch.setattr(correction, "_schema_source", lambda: ("v2", None))
+    assert FixCache.key("SELECT status FROM orders", "no such column: status") != key
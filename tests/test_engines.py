@@ -0,0 +1,155 @@
+import shutil
+import sqlite3
+import pandas as pd
+import pytest
+
+pytest.importorskip("duckdb")
+
+from src.config.settings import CONFIG
+from src.evaluation.benchmark import configured, gold_queries
+from src.evaluation.synthetic import build_database
+from src.sql.engines import base_tables, get_duckdb_engine, translate
+from src.sql.executor import choose_engine, execute_sql
+
+SCHEMA = {"t": {"a": "INTEGER", "b": "INTEGER", "r": "REAL", "s": "TEXT"}}
+
+# SQLite idioms whose DuckDB equivalents differ in type or semantics
+IDIOMS = [
+    "SELECT order_item_id / 2, -order_item_id / 2, price / 3, COUNT(*) FROM order_items GROUP BY 1, 2, 3",
+    "SELECT ROUND(SUM(order_item_id), 1), ROUND(AVG(price)), ROUND(MAX(price), 2) AS top FROM order_items",
+    "SELECT date(order_purchase_timestamp) AS day, strftime('%Y-%m', order_purchase_timestamp), "
+    "COUNT(*) > 1 FROM orders GROUP BY 1, 2 ORDER BY day LIMIT 20",
+    "SELECT AVG(julianday(order_delivered_timestamp) - julianday(order_purchase_timestamp)) FROM orders",
+    "SELECT order_delivered_timestamp FROM orders ORDER BY order_delivered_timestamp LIMIT 5",
+    "SELECT * FROM payments WHERE payment_type = 'boleto' AND payment_installments = '1' ORDER BY order_id LIMIT 50",
+    "SELECT COUNT(*), SUM(order_status NOT LIKE 'SHIP%') FROM orders WHERE order_status LIKE '%Deliv%'",
+    "SELECT CAST(AVG(price) AS INTEGER), CAST(-AVG(price) AS INTEGER), CAST(MAX(order_item_id) AS INTEGER) "
+    "FROM order_items",
+]
+
+
+@pytest.fixture(scope="module")
+def shop_db(tmp_path_factory):
+    """A 2,000-order synthetic database."""
+    return build_database(tmp_path_factory.mktemp("engines") / "olist.db", 2_000)
+
+
+@pytest.fixture
+def engine_db(shop_db, tmp_path):
+    """A private copy of the database, caches off."""
+    path = tmp_path / "olist.db"
+    shutil.copy(shop_db, path)
+    with configured(db_path=path, result_cache_enabled=False, summaries_enabled=False, guard_enabled=False):
+        yield path
+
+
+def test_translate():
+    """Test julianday, ROUND, LIKE, casts and integer division keep SQLite's semantics."""
+    sql = translate("SELECT julianday(s), ROUND(a, 1), a / b, r / a, CAST(r AS INTEGER) FROM t "
+                    "WHERE s NOT LIKE 'A%'", SCHEMA)
+    assert "EPOCH(TRY_CAST(t.s AS TIMESTAMP)) / 86400.0 + 2440587.5" in sql
+    assert "ROUND(CAST(t.a AS DOUBLE), 1)" in sql
+    assert "CAST(TRUNC(t.a / t.b) AS BIGINT)" in sql
+    assert "t.r / NULLIF(t.a, 0)" in sql
+    assert "CAST(TRUNC(CAST(t.r AS DOUBLE)) AS BIGINT)" in sql
+    assert "t.s NOT ILIKE 'A%'" in sql
+
+
+QUERIES = [sql for _, sql in gold_queries()] + IDIOMS
+
+
+@pytest.mark.parametrize("sql", QUERIES, ids=[f"q{i:02d}" for i in range(len(QUERIES))])
+def test_duckdb_matches_sqlite(engine_db, sql):
+    """Test DuckDB returns the same columns, values and dtypes as SQLite."""
+    ok_sqlite, expected, error = execute_sql(sql, engine="sqlite")
+    ok_duckdb, result, duck_error = execute_sql(sql, engine="duckdb")
+    assert ok_sqlite and ok_duckdb, (error, duck_error)
+    assert list(result.columns) == list(expected.columns)
+    assert result.dtypes.tolist() == expected.dtypes.tolist()
+    # Row order may differ among ties, float sums in the last bits
+    key = list(expected.columns)
+    pd.testing.assert_frame_equal(
+        result.sort_values(key, ignore_index=True), expected.sort_values(key, ignore_index=True),
+        rtol=1e-9, atol=0
+    )
+
+
+def test_engines_share_row_cap(engine_db):
+    """Test an oversized result fails the same way on both engines."""
+    with configured(max_result_rows=100):
+        for engine in ("sqlite", "duckdb"):
+            success, _, error = execute_sql("SELECT * FROM order_items", engine=engine)
+            assert not success and "100 rows" in error
+
+
+def test_auto_engine(engine_db):
+    """Test auto picks DuckDB for large scans once the export is current."""
+    sql = "SELECT COUNT(*) FROM order_items"
+    conn = sqlite3.connect(engine_db)
+    with configured(duckdb_min_scan_rows=10 ** 9):
+        assert choose_engine(sql, conn, "auto") == "sqlite"
+    with configured(duckdb_min_scan_rows=1):
+        assert choose_engine(sql, conn, "auto") == "sqlite"  # no export yet: built in the background
+        get_duckdb_engine()._exporting.join()
+        assert choose_engine(sql, conn, "auto") == "duckdb"
+    assert choose_engine(sql, conn, "sqlite") == "sqlite"
+    with pytest.raises(ValueError):
+        choose_engine(sql, conn, "postgres")
+    conn.close()
+
+
+def test_export_follows_writes(engine_db):
+    """Test the Parquet export is refreshed when the database changes."""
+    count = "SELECT COUNT(*) AS n FROM customers"
+    assert execute_sql(count, engine="duckdb")[1]["n"][0] == 1_000
+    conn = sqlite3.connect(engine_db)
+    conn.execute("INSERT INTO customers VALUES ('new', 'recife', 'PE')")
+    conn.commit()
+    conn.close()
+    assert not get_duckdb_engine().current()
+    assert execute_sql(count, engine="duckdb")[1]["n"][0] == 1_001
+    assert get_duckdb_engine().exports == 2
+
+
+def test_fallback(engine_db):
+    """Test auto runs untranslatable or failing queries on SQLite."""
+    sql = "SELECT total(price) AS t FROM order_items"
+    get_duckdb_engine().refresh()
+    with configured(duckdb_min_scan_rows=1):
+        success, result, _ = execute_sql(sql, engine="auto")
+    assert success and result["t"][0] > 0
+    success, _, error = execute_sql(sql, engine="duckdb")
+    assert not success and error
+
+
+def test_query_engine_field(engine_db, monkeypatch):
+    """Test /query runs on the requested engine and rejects unknown ones."""
+    from fastapi.testclient import TestClient
+    from src.api.app import app
+    from src.sql import generator
+
+    async def fake_generate(question, timeout=None):
+        return "SELECT COUNT(*) AS n FROM orders;"
+    monkeypatch.setattr(generator, "agenerate_sql", fake_generate)
+    monkeypatch.setattr(CONFIG, "cache_enabled", False)
+    client = TestClient(app)
+    response = client.post("/query", json={"question": "Orders?", "engine": "duckdb"})
+    assert response.json()["result"] == [{"n": 2_000}]
+    assert get_duckdb_engine().queries == 1
+    assert client.post("/query", json={"question": "Orders?", "engine": "oracle"}).status_code == 400
+
+
+def test_refresh_keeps_open_cursors(engine_db):
+    """Test a refresh mid-query leaves the running cursor's connection open until it finishes."""
+    engine = get_duckdb_engine()
+    conn = sqlite3.connect(engine_db)
+    batches = engine.iter_rows("SELECT order_id FROM orders", base_tables(conn), 500)
+    conn.close()
+    first = next(batches)
+    old = engine._conn
+    engine._version = None  # force the next refresh to swap connections
+    engine.refresh()
+    assert engine._conn is not old
+    assert len(first) + sum(len(b) for b in batches) == 2_000
+    with pytest.raises(Exception):
+        old.execute("SELECT 1")
@@ -0,0 +1,82 @@
+import time
+import numpy as np
+import pytest
+from src.config.settings import CONFIG
+from src.sql import embeddings, examples
+from src.sql.examples import ExampleBank, parse_examples, seed_pairs
+from src.sql.generator import FEW_SHOT_EXAMPLES, build_prompt
+
+PAIRS = [
+    ("How many orders are there?", "SELECT COUNT(*) FROM orders"),
+    ("How many delivered orders?", "SELECT COUNT(*) FROM orders WHERE order_status = 'delivered'"),
+    ("Revenue by product category?", "SELECT p.product_category, SUM(oi.price) FROM order_items oi "
+                                     "JOIN products p ON oi.product_id = p.product_id GROUP BY 1"),
+    ("Average review score?", "SELECT AVG(review_score) FROM reviews"),
+]
+
+
+@pytest.fixture
+def bank_path(tmp_path, monkeypatch):
+    """Example bank files under tmp_path."""
+    monkeypatch.setattr(CONFIG, "db_path", tmp_path / "shop.db")
+    monkeypatch.setattr(examples, "_bank", None)
+    return CONFIG.example_bank_path
+
+
+def test_parse_few_shot_examples():
+    """Test the curated examples parse into question/SQL pairs."""
+    pairs = parse_examples(FEW_SHOT_EXAMPLES)
+    assert len(pairs) == 7
+    assert pairs[0] == ("How many orders are there?", "SELECT COUNT(*) as total FROM orders;")
+
+
+def test_seed_pairs_include_test_set(bank_path):
+    """Test the bank is seeded from the examples and the test set."""
+    questions = [q for q, _ in seed_pairs()]
+    assert "How many orders are there?" in questions
+    assert "Combien de commandes au total ?" in questions
+
+
+def test_select_nearest(bank_path):
+    """Test the most similar example comes first."""
+    bank = ExampleBank(PAIRS)
+    assert bank.select("Total revenue per product category", k=1)[0] == PAIRS[2]
+
+
+def test_select_excludes_same_question(bank_path):
+    """Test the question being asked is never its own example."""
+    bank = ExampleBank(PAIRS)
+    selected = bank.select("how many orders are there", k=4)
+    assert PAIRS[0] not in selected
+    assert len(selected) == 3
+
+
+def test_bank_memory_mapped(bank_path, monkeypatch):
+    """Test the matrix is persisted and reloaded memory-mapped."""
+    ExampleBank(PAIRS)
+    monkeypatch.setattr(embeddings, "embed", lambda texts: pytest.fail("re-embedded"))
+    bank = ExampleBank(PAIRS)
+    assert isinstance(bank.matrix, np.memmap)
+
+
+def test_selection_under_a_millisecond(bank_path):
+    """Test top-k selection over hundreds of examples stays sub-millisecond."""
+    pairs = [(f"question number {i} about orders", f"SELECT {i}") for i in range(500)]
+    bank = ExampleBank(pairs)
+    vector = embeddings.embed_one("question about orders")
+    bank.select_vector(vector, 4)
+    start = time.perf_counter()
+    for _ in range(100):
+        bank.select_vector(vector, 4)
+    assert (time.perf_counter() - start) / 100 < 0.001
+
+
+def test_prompt_uses_selected_examples(bank_path, monkeypatch):
+    """Test the prompt carries the nearest examples in the usual layout."""
+    monkeypatch.setattr(examples, "_bank", ExampleBank(PAIRS))
+    monkeypatch.setattr(CONFIG, "few_shot_k", 2)
+    prompt = build_prompt("How many orders are there in total?")
+    assert "Example 2:" in prompt
+    assert "Example 3:" not in prompt
+    assert "Q: How many orders are there?" in prompt
+    assert "Q: Average review score?" not in prompt
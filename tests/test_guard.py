@@ -0,0 +1,69 @@
+import sqlite3
+import pytest
+from src.config.settings import CONFIG
+from src.sql.executor import execute_sql
+from src.sql.guard import QueryRejected, analyze_query, guard_sql, query_budget
+
+
+@pytest.fixture
+def big_db():
+    """Two 2000-row tables without indexes."""
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE orders (order_id INTEGER, customer_id INTEGER)")
+    conn.execute("CREATE TABLE order_items (order_id INTEGER, price REAL)")
+    conn.executemany("INSERT INTO orders VALUES (?, ?)", [(i, i % 50) for i in range(2000)])
+    conn.executemany("INSERT INTO order_items VALUES (?, ?)", [(i, 1.0) for i in range(2000)])
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def test_analyze_query_flags_scans(big_db, monkeypatch):
+    """Test full scans and unindexed joins are reported."""
+    monkeypatch.setattr(CONFIG, "guard_large_table_rows", 1000)
+    report = analyze_query(
+        "SELECT SUM(oi.price) FROM orders o JOIN order_items oi ON o.order_id = oi.order_id", big_db
+    )
+    assert report["full_scans"] == ["orders"]
+    assert report["unindexed_joins"] == ["order_items"]
+
+
+def test_guard_rejects_cartesian(big_db, monkeypatch):
+    """Test nested full scans over the cost budget are rejected."""
+    monkeypatch.setattr(CONFIG, "guard_max_scan_cost", 1_000_000)
+    with pytest.raises(QueryRejected):
+        guard_sql("SELECT COUNT(*) FROM orders, order_items", big_db)
+
+
+def test_guard_never_truncates(big_db, monkeypatch):
+    """Test oversized results fail instead of being silently cut to a LIMIT."""
+    monkeypatch.setattr(CONFIG, "guard_large_table_rows", 1000)
+    monkeypatch.setattr(CONFIG, "max_result_rows", 100)
+    assert guard_sql("SELECT * FROM orders;", big_db) == "SELECT * FROM orders;"
+    for sql in ("SELECT * FROM orders", "SELECT * FROM (SELECT * FROM orders LIMIT 1000)"):
+        success, result, error = execute_sql(sql, big_db)
+        assert success is False and "100 rows" in error
+    success, result, _ = execute_sql("SELECT * FROM orders LIMIT 100", big_db)
+    assert success is True and len(result) == 100
+
+
+def test_guard_keeps_small_queries(big_db):
+    """Test cheap queries pass through unchanged."""
+    sql = "SELECT COUNT(*) FROM orders"
+    assert guard_sql(sql, big_db) == sql
+
+
+def test_query_budget_steps(big_db, monkeypatch):
+    """Test the VM-step budget aborts the query with its reason."""
+    monkeypatch.setattr(CONFIG, "guard_enabled", False)
+    monkeypatch.setattr(CONFIG, "query_max_vm_steps", 50_000)
+    success, result, error = execute_sql("SELECT COUNT(*) FROM orders, order_items", big_db)
+    assert success is False
+    assert "VM step budget" in error
+
+
+def test_query_budget_removed(big_db):
+    """Test the progress handler is uninstalled afterwards."""
+    with query_budget(big_db, seconds=0, max_steps=1):
+        pass
+    assert big_db.execute("SELECT COUNT(*) FROM orders, order_items").fetchone()[0] == 4_000_000
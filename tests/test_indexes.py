@@ -0,0 +1,61 @@
+import sqlite3
+import pytest
+from src.sql.indexes import apply_indexes, existing_indexes, query_columns, recommend_indexes
+
+# schema.sql declares primary keys, which already serve the joins below
+BARE_SCHEMA = """
+CREATE TABLE customers (customer_id TEXT, customer_city TEXT, customer_state TEXT);
+CREATE TABLE orders (order_id TEXT, customer_id TEXT, order_status TEXT,
+                     order_purchase_timestamp TEXT, order_delivered_timestamp TEXT);
+CREATE TABLE order_items (order_id TEXT, order_item_id INTEGER, product_id TEXT, price REAL, freight_value REAL);
+"""
+
+
+@pytest.fixture
+def shop_db():
+    """Project tables without keys or indexes, with a few rows."""
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(BARE_SCHEMA)
+    conn.executemany("INSERT INTO customers VALUES (?, ?, ?)", [(f"c{i}", "Paris", "FR") for i in range(50)])
+    conn.executemany(
+        "INSERT INTO orders VALUES (?, ?, 'delivered', '2024-01-01', NULL)", [(f"o{i}", f"c{i % 50}") for i in range(200)]
+    )
+    conn.executemany(
+        "INSERT INTO order_items VALUES (?, 1, 'p1', 10.0, 1.0)", [(f"o{i}",) for i in range(200)]
+    )
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+JOIN_SQL = (
+    "SELECT c.customer_city, SUM(oi.price) as revenue FROM customers c "
+    "JOIN orders o ON c.customer_id = o.customer_id "
+    "JOIN order_items oi ON o.order_id = oi.order_id "
+    "WHERE o.order_status = 'delivered' GROUP BY c.customer_city"
+)
+
+
+def test_query_columns(shop_db):
+    """Test join, filter and group columns are mined per table."""
+    usage = query_columns(JOIN_SQL, shop_db)
+    assert usage["orders"]["where"] == ["order_status"]
+    assert usage["customers"]["group"] == ["customer_city"]
+    assert "price" in usage["order_items"]["all"]
+
+
+def test_recommend_indexes(shop_db):
+    """Test covering index recommendations."""
+    recs = recommend_indexes([JOIN_SQL, JOIN_SQL], shop_db)
+    tables = {rec["table"]: rec for rec in recs}
+    assert tables["order_items"]["columns"][0] == "order_id"
+    assert "price" in tables["order_items"]["columns"]
+    assert tables["order_items"]["queries"] == 2
+
+
+def test_apply_indexes_skips_existing(shop_db):
+    """Test applied indexes are not recommended again."""
+    recs = recommend_indexes([JOIN_SQL], shop_db)
+    apply_indexes(recs, shop_db)
+    assert existing_indexes(shop_db)["order_items"]
+    assert recommend_indexes([JOIN_SQL], shop_db) == []
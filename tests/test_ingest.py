@@ -0,0 +1,100 @@
+import sqlite3
+import pytest
+from src.config.settings import CONFIG
+from src.sql.ingest import INDEXES, RAW_FILES, ingest
+
+SCHEMA = "data/database/schema.sql"
+
+# Olist headers (original names, extra columns) with a few bad values
+CSVS = {
+    "customers": "customer_id,customer_unique_id,customer_city,customer_state\n"
+                 "c1,u1,sao paulo,SP\nc2,u2,curitiba,PR\n",
+    "products": "product_id,product_category_name,product_weight_g,product_length_cm,"
+                "product_height_cm,product_width_cm\np1,bebes,500,10,10,10\np2,,heavy,20,20,20\n",
+    "orders": "order_id,customer_id,order_status,order_purchase_timestamp,order_approved_at,"
+              "order_delivered_customer_date\n"
+              "o1,c1,delivered,2017-10-02 10:56:33,2017-10-02 11:07:15,2017-10-10 21:25:13\n"
+              "o2,c2,shipped,2018-07-24 20:41:37,,\n"
+              ",c2,shipped,2018-07-24 20:41:37,,\n",
+    "order_items": "order_id,order_item_id,product_id,seller_id,price,freight_value\n"
+                   "o1,1,p1,s1,29.99,8.72\no1,2,p2,s1,10.00,1.5\no2,1,p1,s2,118.70,22.76\n",
+    "payments": "order_id,payment_sequential,payment_type,payment_installments,payment_value\n"
+                "o1,1,credit_card,1,38.71\no2,1,boleto,x,141.46\n",
+    "reviews": "review_id,order_id,review_score,review_comment_title,review_comment_message\n"
+               "r1,o1,4,,Bom\n",
+}
+
+
+def write_csvs(directory, csvs):
+    directory.mkdir(exist_ok=True)
+    for table, text in csvs.items():
+        (directory / RAW_FILES[table]).write_text(text)
+    return directory
+
+
+@pytest.fixture
+def loaded(tmp_path, monkeypatch):
+    """A database built from the CSVs above."""
+    monkeypatch.setattr(CONFIG, "summaries_enabled", False)
+    db = tmp_path / "ecommerce.db"
+    stats = ingest(write_csvs(tmp_path / "raw", CSVS), db, chunk_rows=1, schema_path=SCHEMA)
+    return db, stats
+
+
+def test_full_load(loaded):
+    """Test renames, row counts and secondary indexes."""
+    db, stats = loaded
+    conn = sqlite3.connect(db)
+    assert conn.execute("SELECT order_delivered_timestamp FROM orders WHERE order_id = 'o1'").fetchone() == (
+        "2017-10-10 21:25:13",)
+    assert conn.execute("SELECT product_category FROM products WHERE product_id = 'p1'").fetchone() == ("bebes",)
+    assert stats["order_items"]["rows"] == 3
+    indexes = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert set(INDEXES) <= indexes
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_stat1").fetchone()[0] > 0
+    conn.close()
+
+
+def test_types_enforced(loaded):
+    """Test bad values become NULL and keyless rows are dropped."""
+    db, stats = loaded
+    conn = sqlite3.connect(db)
+    assert conn.execute("SELECT typeof(order_item_id), typeof(price) FROM order_items LIMIT 1").fetchone() == (
+        "integer", "real")
+    assert conn.execute("SELECT product_weight_g FROM products WHERE product_id = 'p2'").fetchone() == (None,)
+    assert conn.execute("SELECT payment_installments FROM payments WHERE order_id = 'o2'").fetchone() == (None,)
+    assert stats["products"]["nulled"] == 1
+    assert stats["orders"]["dropped"] == 1
+    assert conn.execute("SELECT COUNT(*) FROM orders").fetchone() == (2,)
+    conn.close()
+
+
+def test_append_upserts(loaded, tmp_path):
+    """Test appends add new orders and update changed ones, idempotently."""
+    db, _ = loaded
+    new = {
+        "orders": "order_id,customer_id,order_status,order_purchase_timestamp,order_delivered_customer_date\n"
+                  "o2,c2,delivered,2018-07-24 20:41:37,2018-08-01 09:00:00\n"
+                  "o3,c1,created,2018-09-01T08:00:00,\n",
+        "order_items": "order_id,order_item_id,product_id,price,freight_value\no3,1,p2,5.5,1\n",
+    }
+    raw = write_csvs(tmp_path / "new", new)
+    for _ in range(2):
+        stats = ingest(raw, db, append=True)
+    assert set(stats) == {"orders", "order_items"}
+    conn = sqlite3.connect(db)
+    assert conn.execute("SELECT COUNT(*) FROM orders").fetchone() == (3,)
+    assert conn.execute("SELECT order_status FROM orders WHERE order_id = 'o2'").fetchone() == ("delivered",)
+    assert conn.execute("SELECT order_purchase_timestamp FROM orders WHERE order_id = 'o3'").fetchone() == (
+        "2018-09-01 08:00:00",)
+    assert conn.execute("SELECT COUNT(*) FROM order_items").fetchone() == (4,)
+    conn.close()
+
+
+def test_missing_inputs(tmp_path):
+    """Test a full load needs every CSV and an append needs a database."""
+    raw = write_csvs(tmp_path / "raw", {"orders": CSVS["orders"]})
+    with pytest.raises(FileNotFoundError, match="olist_customers_dataset.csv"):
+        ingest(raw, tmp_path / "db.sqlite", schema_path=SCHEMA)
+    with pytest.raises(FileNotFoundError):
+        ingest(raw, tmp_path / "db.sqlite", append=True)
@@ -1,6 +1,6 @@
 import pytest
 import pandas as pd
-from src.evaluation.metrics import compare_results, normalize_sql, exact_match
+from src.evaluation.metrics import compare_frames, compare_results, normalize_sql, exact_match
 
 
 def test_compare_results_numeric_tolerance():
@@ -10,6 +10,12 @@ def test_compare_results_numeric_tolerance():
     assert compare_results(df1, df2) is True
 
 
+def test_compare_results_off_by_one_differs():
+    """Test values exactly 1 apart don't match (the absolute bound is strict)."""
+    assert compare_results(pd.DataFrame({'n': [5]}), pd.DataFrame({'n': [6]})) is False
+    assert compare_results(pd.DataFrame({'v': [100.0]}), pd.DataFrame({'v': [101.0]})) is False
+
+
 def test_compare_results_string_numbers():
     """Test comparing string representations of numbers."""
     df1 = pd.DataFrame({'count': ['10']})
@@ -50,3 +56,52 @@ def test_exact_match_whitespace():
     sql1 = "SELECT  *  FROM  table"
     sql2 = "SELECT * FROM table"
     assert exact_match(sql1, sql2) is True
+
+
+def test_compare_results_all_columns():
+    """Test every column is compared, not just the last one."""
+    df1 = pd.DataFrame({'city': ['A', 'B'], 'n': [10, 20]})
+    df2 = pd.DataFrame({'city': ['B', 'A'], 'n': [10, 20]})
+    assert compare_results(df1, df2) is False
+
+
+def test_compare_results_column_permutation():
+    """Test columns align by value regardless of order and names."""
+    df1 = pd.DataFrame({'city': ['A', 'B', 'C'], 'n': [1, 2, 3]})
+    df2 = pd.DataFrame({'total': [3, 1, 2], 'customer_city': ['C', 'A', 'B']})
+    assert compare_results(df1, df2) is True
+
+
+def test_compare_results_nulls():
+    """Test NULLs match NULLs only."""
+    df1 = pd.DataFrame({'v': [None, 1.0]})
+    assert compare_results(df1, pd.DataFrame({'v': [1.0, None]})) is True
+    assert compare_results(df1, pd.DataFrame({'v': [1.0, 0.0]})) is False
+
+
+def test_compare_results_configurable_tolerance():
+    """Test rtol/atol override the default tolerance."""
+    df1 = pd.DataFrame({'value': [100.0]})
+    df2 = pd.DataFrame({'value': [100.5]})
+    assert compare_results(df1, df2, atol=0.0) is False
+    assert compare_results(df1, df2, rtol=0.01, atol=0.0) is True
+
+
+def test_compare_frames_reports_differences():
+    """Test the diff report names the differing column and rows."""
+    df1 = pd.DataFrame({'city': ['A', 'B', 'C'], 'n': [1, 2, 3]})
+    df2 = pd.DataFrame({'city': ['C', 'A', 'B'], 'n': [3, 1, 50]})
+    report = compare_frames(df1, df2)
+    assert report["equal"] is False
+    assert report["columns"] == {'city': 'city', 'n': 'n'}
+    assert report["differing_columns"] == ['n']
+    assert report["differing_rows"] == [(1, 2)]
+
+
+def test_compare_frames_chunked():
+    """Test chunked comparison matches the single-pass result."""
+    df1 = pd.DataFrame({'k': [str(i % 7) for i in range(100)], 'v': [i * 0.5 for i in range(100)]})
+    df2 = df1.sample(frac=1.0, random_state=0).reset_index(drop=True)
+    df2.loc[0, 'v'] += 0.25
+    assert compare_frames(df1, df2, atol=1e-6, chunk_rows=16)["equal"] is False
+    assert compare_frames(df1, df2, atol=0.5, chunk_rows=16)["equal"] is True
@@ -0,0 +1,151 @@
+import base64
+import json
+import sqlite3
+import pytest
+from fastapi.testclient import TestClient
+from src.config.settings import CONFIG
+from src.evaluation.benchmark import configured
+from src.sql import generator
+from src.sql.executor import (
+    ResultTooLarge,
+    decode_cursor,
+    encode_cursor,
+    execute_page,
+    execute_sql,
+    iter_sql
+)
+
+
+@pytest.fixture
+def numbers_db(tmp_path, monkeypatch):
+    """File database with 25 rows, wired into CONFIG."""
+    path = tmp_path / "numbers.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE numbers (n INTEGER, label TEXT)")
+    conn.executemany("INSERT INTO numbers VALUES (?, ?)", [(i, f"n{i}") for i in range(25)])
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(CONFIG, "db_path", path)
+    monkeypatch.setattr(CONFIG, "cache_enabled", False)
+    return path
+
+
+def test_iter_sql_batches(numbers_db):
+    """Test fetchmany batching."""
+    batches = list(iter_sql("SELECT * FROM numbers", batch_size=10))
+    assert [len(rows) for _, rows in batches] == [10, 10, 5]
+    assert batches[0][0] == ["n", "label"]
+
+
+def test_iter_sql_empty_yields_columns(numbers_db):
+    """Test empty results still report columns."""
+    batches = list(iter_sql("SELECT * FROM numbers WHERE n < 0"))
+    assert batches == [(["n", "label"], [])]
+
+
+def test_iter_sql_row_cap(numbers_db):
+    """Test the hard row cap."""
+    with pytest.raises(ResultTooLarge):
+        list(iter_sql("SELECT * FROM numbers", batch_size=10, max_rows=20))
+
+
+def test_execute_sql_row_cap(numbers_db, monkeypatch):
+    """Test execute_sql reports the cap as an error."""
+    monkeypatch.setattr(CONFIG, "max_result_rows", 5)
+    success, result, error = execute_sql("SELECT * FROM numbers")
+    assert success is False
+    assert "5 rows" in error
+
+
+def test_execute_page(numbers_db):
+    """Test limit plus continuation token."""
+    success, page, error, cursor = execute_page("SELECT * FROM numbers ORDER BY n;", 10)
+    assert success is True
+    assert page["n"].tolist() == list(range(10))
+    sql, offset, limit = decode_cursor(cursor)
+    assert (offset, limit) == (10, 10)
+    *_, last_cursor = execute_page(sql, 10, 20)
+    assert last_cursor is None
+
+
+def test_decode_cursor_invalid():
+    """Test malformed and forged tokens are rejected."""
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-token")
+    _, signature = encode_cursor("SELECT 1", 10, 10).split(".")
+    forged = base64.urlsafe_b64encode(
+        json.dumps({"sql": "DELETE FROM orders", "offset": 10, "limit": 10}).encode()
+    ).decode()
+    with pytest.raises(ValueError):
+        decode_cursor(f"{forged}.{signature}")
+
+
+def test_query_pagination_endpoint(numbers_db, monkeypatch):
+    """Test /query pages through a result."""
+    from src.api.app import app
+    
+    async def fake_generate(question, timeout=None):
+        return "SELECT n FROM numbers ORDER BY n;"
+    monkeypatch.setattr(generator, "agenerate_sql", fake_generate)
+    client = TestClient(app)
+    
+    first = client.post("/query", json={"question": "Numbers?", "limit": 20}).json()
+    assert len(first["result"]) == 20
+    second = client.post("/query", json={"question": "Numbers?", "limit": 20, "cursor": first["next_cursor"]}).json()
+    assert [r["n"] for r in second["result"]] == list(range(20, 25))
+    assert second["next_cursor"] is None
+    assert client.post("/query", json={"question": "Numbers?", "limit": -1}).status_code == 422
+    # Without limit, the page size comes from the token rather than the whole result from row 0
+    resumed = client.post("/query", json={"question": "Numbers?", "cursor": first["next_cursor"]}).json()
+    assert [r["n"] for r in resumed["result"]] == list(range(20, 25))
+
+
+def test_export_has_time_budget(numbers_db, monkeypatch):
+    """Test exports run under export_timeout_seconds, not an unlimited budget."""
+    from src.api import app as app_module
+    from src.sql import executor
+    seen = {}
+
+    def fake_iter(sql, **kwargs):
+        seen.update(kwargs)
+        yield ["n"], [(1,)]
+
+    monkeypatch.setattr(executor, "iter_sql", fake_iter)
+    with configured(export_timeout_seconds=5.0):
+        list(app_module._export_lines("SELECT 1", "ndjson"))
+    assert seen["timeout"] == 5.0
+
+
+def test_query_export_endpoint(numbers_db, monkeypatch):
+    """Test NDJSON and CSV exports."""
+    from src.api.app import app
+    
+    async def fake_generate(question, timeout=None):
+        return "SELECT n, label FROM numbers ORDER BY n;"
+    monkeypatch.setattr(generator, "agenerate_sql", fake_generate)
+    client = TestClient(app)
+    
+    ndjson = client.post("/query/export", json={"question": "Numbers?"})
+    assert ndjson.headers["content-type"].startswith("application/x-ndjson")
+    assert len(ndjson.text.splitlines()) == 25
+    csv = client.post("/query/export", json={"question": "Numbers?", "format": "csv"})
+    assert csv.text.splitlines()[0] == "n,label"
+    assert len(csv.text.splitlines()) == 26
+
+
+def test_export_over_cap_ends_in_error(numbers_db, monkeypatch):
+    """Test an export past its byte cap fails loudly instead of truncating."""
+    from src.api.app import app
+    
+    async def fake_generate(question, timeout=None):
+        return "SELECT n, label FROM numbers ORDER BY n;"
+    monkeypatch.setattr(generator, "agenerate_sql", fake_generate)
+    monkeypatch.setattr(CONFIG, "fetch_batch_size", 5)
+    monkeypatch.setattr(CONFIG, "export_max_bytes", 100)
+    monkeypatch.setattr(CONFIG, "max_result_bytes", 10)  # the API cap does not apply
+    client = TestClient(app)
+    
+    lines = client.post("/query/export", json={"question": "Numbers?"}).text.splitlines()
+    assert 0 < len(lines) < 25 and "100 bytes" in lines[-1]
+    with pytest.raises(ResultTooLarge):
+        client.post("/query/export", json={"question": "Numbers?", "format": "csv"})
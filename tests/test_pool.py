@@ -0,0 +1,94 @@
+import os
+import sqlite3
+import threading
+import pytest
+from src.evaluation.benchmark import configured
+from src.sql.pool import ConnectionPool, get_pool
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """File database with one table."""
+    path = tmp_path / "test.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE test (id INTEGER)")
+    conn.execute("INSERT INTO test VALUES (1), (2)")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_pool_reuses_connections(db_path):
+    """Test connections are recycled, not reopened."""
+    pool = ConnectionPool(db_path, size=2)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        assert second is first
+    assert pool.stats()["checkouts"] == 2
+    assert pool.stats()["open"] == 1
+
+
+def test_pool_is_read_only(db_path):
+    """Test writes are rejected."""
+    pool = ConnectionPool(db_path)
+    with pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM test").fetchone()[0] == 2
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM test")
+
+
+def test_pool_wal_enabled(db_path):
+    """Test pool switches the database to WAL."""
+    ConnectionPool(db_path)
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    conn.close()
+
+
+def test_pool_timeout(db_path):
+    """Test checkout times out when the pool is exhausted."""
+    pool = ConnectionPool(db_path, size=1, timeout=0.05)
+    conn = pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire()
+    pool.release(conn)
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_pool_concurrent(db_path):
+    """Test the pool across threads."""
+    pool = ConnectionPool(db_path, size=2)
+    results = []
+    
+    def worker():
+        with pool.connection() as conn:
+            results.append(conn.execute("SELECT COUNT(*) FROM test").fetchone()[0])
+    
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == [2] * 8
+    assert pool.stats()["open"] <= 2
+
+
+def test_pool_follows_replaced_file(db_path):
+    """Test get_pool reopens on a file swapped in by os.replace, even mid-checkout."""
+    with configured(db_path=db_path):
+        old = get_pool()
+        held = old.acquire()
+        replacement = db_path.with_name("new.db")
+        conn = sqlite3.connect(replacement)
+        conn.execute("CREATE TABLE test (id INTEGER)")
+        conn.execute("INSERT INTO test VALUES (3)")
+        conn.commit()
+        conn.close()
+        os.replace(replacement, db_path)
+        pool = get_pool()
+        assert pool is not old
+        with pool.connection() as fresh:
+            assert fresh.execute("SELECT id FROM test").fetchall() == [(3,)]
+        old.release(held)
+        assert old.stats()["open"] == 0
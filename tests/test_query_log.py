@@ -0,0 +1,22 @@
+from src.evaluation.benchmark import configured
+from src.sql.query_log import log_query, read_query_log
+
+
+def test_log_round_trip(tmp_path):
+    """Test logged queries read back oldest first."""
+    with configured(db_path=tmp_path / "db.sqlite"):
+        log_query("q1", "SELECT 1")
+        log_query("q2", "SELECT 2")
+        assert [e["question"] for e in read_query_log()] == ["q1", "q2"]
+
+
+def test_log_rotates_by_size(tmp_path):
+    """Test the log rotates past its size cap and reads stay bounded."""
+    with configured(db_path=tmp_path / "db.sqlite", query_log_max_bytes=300):
+        for i in range(20):
+            log_query(f"q{i}", "SELECT 1")
+        assert (tmp_path / "query_log.jsonl.1").stat().st_size <= 400
+        entries = read_query_log()
+        assert 2 <= len(entries) < 10
+        assert entries[-1]["question"] == "q19"
+        assert [e["question"] for e in entries] == sorted((e["question"] for e in entries), key=lambda q: int(q[1:]))
@@ -0,0 +1,80 @@
+import sqlite3
+import time
+import pandas as pd
+import pytest
+from src.config.settings import CONFIG
+from src.evaluation.metrics import canonical_sql
+from src.sql import result_cache
+from src.sql.executor import execute_sql
+from src.sql.result_cache import ResultCache, data_version
+
+
+@pytest.fixture
+def file_db(tmp_path, monkeypatch):
+    """File database wired into CONFIG with a fresh result cache."""
+    path = tmp_path / "test.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE sales (category TEXT, amount REAL)")
+    conn.execute("INSERT INTO sales VALUES ('A', 10), ('B', 20)")
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(CONFIG, "db_path", path)
+    monkeypatch.setattr(result_cache, "_cache", ResultCache())
+    return path
+
+
+def test_canonical_sql_collapses_aliases():
+    """Test alias and whitespace differences collapse."""
+    a = canonical_sql("SELECT s.category FROM sales s WHERE s.amount > 1;")
+    b = canonical_sql("select  sales.category\nfrom sales where sales.amount>1")
+    assert a == b
+
+
+def test_canonical_sql_fallback():
+    """Test unparseable SQL falls back to normalize_sql."""
+    assert canonical_sql("NOT SQL (((") == "not sql ((("
+
+
+def test_result_cache_hit(file_db):
+    """Test second execution is served from the cache."""
+    execute_sql("SELECT * FROM sales s")
+    success, result, _ = execute_sql("select * from sales")
+    assert success is True
+    assert len(result) == 2
+    assert result_cache.get_result_cache().stats()["hits"] == 1
+
+
+def test_result_cache_invalidated_on_write(file_db):
+    """Test a database change invalidates entries."""
+    execute_sql("SELECT COUNT(*) as n FROM sales")
+    time.sleep(0.01)
+    conn = sqlite3.connect(file_db)
+    conn.execute("INSERT INTO sales VALUES ('C', 30)")
+    conn.commit()
+    conn.close()
+    _, result, _ = execute_sql("SELECT COUNT(*) as n FROM sales")
+    assert result.iloc[0]["n"] == 3
+    assert result_cache.get_result_cache().stats()["invalidations"] == 1
+
+
+def test_result_cache_byte_budget():
+    """Test LRU eviction under the byte budget."""
+    cache = ResultCache(max_bytes=2000)
+    version = ("db", None, None)
+    frame = pd.DataFrame({"x": range(100)})
+    cache.put("SELECT 1", frame, version)
+    cache.put("SELECT 2", frame, version)
+    cache.put("SELECT 3", frame, version)
+    assert cache.get("SELECT 1", version) is None
+    assert cache.get("SELECT 3", version)["x"].tolist() == list(range(100))
+    assert cache.bytes <= 2000
+
+
+def test_cached_result_is_read_only(file_db):
+    """Test mutating a returned frame does not corrupt the cache."""
+    cache = ResultCache()
+    version = data_version()
+    cache.put("SELECT 1", pd.DataFrame({"x": [1, 2]}), version)
+    first = cache.get("SELECT 1", version)
+    first.loc[0, "x"] = 99
+    assert cache.get("SELECT 1", version)["x"].tolist() == [1, 2]
@@ -0,0 +1,98 @@
+import json
+import sqlite3
+import pytest
+from src.config.settings import CONFIG
+from src.evaluation import runner
+from src.evaluation.runner import GoldCache, completed_indices, run_evaluation
+from src.sql import generator
+
+QUESTIONS = [
+    {"question": "How many sales?", "sql": "SELECT COUNT(*) AS n FROM sales", "difficulty": "simple"},
+    {"question": "Total amount?", "sql": "SELECT SUM(amount) AS total FROM sales", "difficulty": "simple"},
+    {"question": "Broken?", "sql": "SELECT category FROM sales", "difficulty": "medium"},
+]
+
+GENERATED = {
+    "How many sales?": "SELECT COUNT(*) AS n FROM sales",
+    "Total amount?": "SELECT SUM(amount) * 2 AS total FROM sales",
+    "Broken?": "SELECT nope FROM sales",
+}
+
+
+@pytest.fixture
+def eval_db(tmp_path, monkeypatch):
+    """File database, results dir and a deterministic generator."""
+    path = tmp_path / "eval.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE sales (category TEXT, amount REAL)")
+    conn.execute("INSERT INTO sales VALUES ('A', 10), ('B', 20)")
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(CONFIG, "db_path", path)
+    monkeypatch.setattr(CONFIG, "data_dir", tmp_path)
+    monkeypatch.setattr(generator, "generate_sql", lambda question: GENERATED[question])
+    return tmp_path
+
+
+def test_run_evaluation_records(eval_db):
+    """Test one JSONL record per question with accuracy and timings."""
+    output = eval_db / "results" / "run.jsonl"
+    records = run_evaluation(QUESTIONS, output, llm_workers=2, sql_workers=2)
+    by_index = {r["index"]: r for r in records}
+    assert sorted(by_index) == [0, 1, 2]
+    assert by_index[0]["execution_accuracy"] is True
+    assert by_index[1]["execution_accuracy"] is False
+    assert by_index[2]["execution_success"] is False
+    assert {"llm_ms", "exec_ms"} <= set(by_index[0]["timings"])
+    assert len(output.read_text().splitlines()) == 3
+
+
+def test_run_evaluation_resume(eval_db, monkeypatch):
+    """Test --resume only evaluates questions missing from the output."""
+    output = eval_db / "run.jsonl"
+    output.write_text(json.dumps({"index": 0, "difficulty": "simple", "execution_accuracy": True}) + "\n")
+    asked = []
+    monkeypatch.setattr(generator, "generate_sql", lambda q: asked.append(q) or GENERATED[q])
+    records = run_evaluation(QUESTIONS, output, llm_workers=1, sql_workers=1, resume=True)
+    assert "How many sales?" not in asked
+    assert len(records) == 3
+    assert completed_indices(output) == {0, 1, 2}
+
+
+def test_gold_cache_persisted(eval_db):
+    """Test gold results are reused from disk for the same database version."""
+    run_evaluation(QUESTIONS, eval_db / "run.jsonl", llm_workers=1, sql_workers=1)
+    cache = GoldCache()
+    assert cache.path.exists()
+    success, frame, _ = cache.get("SELECT SUM(amount) AS total FROM sales")
+    assert success is True
+    assert frame["total"].tolist() == [30.0]
+
+
+def test_gold_cache_saved_as_it_goes(eval_db):
+    """Test gold results computed before an interrupted run are kept."""
+    def crash(record):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        run_evaluation(QUESTIONS, eval_db / "run.jsonl", llm_workers=1, sql_workers=1, on_record=crash)
+    with open(GoldCache().path, "a") as f:
+        f.write('{"sql": "torn')
+    assert GoldCache().get(QUESTIONS[0]["sql"]) is not None
+
+
+def test_gold_cache_keyed_by_version(eval_db):
+    """Test a database change starts a new gold cache file."""
+    before = GoldCache().path
+    conn = sqlite3.connect(CONFIG.db_path)
+    conn.execute("INSERT INTO sales VALUES ('C', 5)")
+    conn.commit()
+    conn.close()
+    assert GoldCache().path != before
+
+
+def test_execute_worker_reports_time(eval_db):
+    """Test the process-pool worker returns execution time."""
+    success, result, error, ms = runner._execute_timed("SELECT 1 AS x", str(CONFIG.db_path))
+    assert success is True
+    assert ms >= 0
@@ -0,0 +1,164 @@
+import asyncio
+import contextvars
+import sqlite3
+from fastapi.testclient import TestClient
+from src.api.app import app
+from src.config.settings import CONFIG
+from src.sql import scheduler
+from src.sql.scheduler import GenerationScheduler, Overloaded
+
+
+def _counting_generate(calls, delay=0.05):
+    async def generate(question):
+        calls.append(question)
+        await asyncio.sleep(delay)
+        return f"SELECT '{question}';"
+    return generate
+
+
+def test_single_flight():
+    """Test identical concurrent questions share one generation."""
+    calls = []
+
+    async def main():
+        sched = GenerationScheduler(_counting_generate(calls))
+        results = await asyncio.gather(*(sched.submit("How many orders?") for _ in range(5)),
+                                       sched.submit("how many orders"))
+        return sched, results
+
+    sched, results = asyncio.run(main())
+    assert len(calls) == 1
+    assert len(set(results)) == 1
+    assert sched.stats()["deduplicated"] == 5
+
+
+def test_generation_runs_in_submitter_context():
+    """Test the generation sees the submitting request's context variables."""
+    request_id = contextvars.ContextVar("request_id", default=None)
+    seen = []
+
+    async def generate(question):
+        seen.append(request_id.get())
+        return question
+
+    async def ask(sched, rid):
+        request_id.set(rid)
+        return await sched.submit(f"q{rid}")
+
+    async def main():
+        sched = GenerationScheduler(generate)
+        await asyncio.gather(ask(sched, 1), ask(sched, 2))
+
+    asyncio.run(main())
+    assert sorted(seen) == [1, 2]
+
+
+def test_dispatch_is_immediate():
+    """Test a lone request starts generating without waiting for others."""
+    calls = []
+
+    async def main():
+        sched = GenerationScheduler(_counting_generate(calls, delay=0.5))
+        task = asyncio.create_task(sched.submit("q"))
+        await asyncio.sleep(0.01)
+        assert calls == ["q"] and sched.stats()["running"] == 1
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(main())
+
+
+def test_concurrency_cap():
+    """Test no more than max_concurrent generations run at once."""
+    peak = {"now": 0, "max": 0}
+
+    async def generate(question):
+        peak["now"] += 1
+        peak["max"] = max(peak["max"], peak["now"])
+        await asyncio.sleep(0.01)
+        peak["now"] -= 1
+        return question
+
+    async def main():
+        sched = GenerationScheduler(generate, max_concurrent=2)
+        await asyncio.gather(*(sched.submit(f"q{i}") for i in range(8)))
+
+    asyncio.run(main())
+    assert peak["max"] == 2
+
+
+def test_shed_429_when_queue_full():
+    """Test new work is rejected once the backlog exceeds max_queue."""
+    async def main():
+        sched = GenerationScheduler(_counting_generate([], delay=0.2), max_concurrent=1, max_queue=2)
+        results = await asyncio.gather(*(sched.submit(f"q{i}") for i in range(4)), return_exceptions=True)
+        return sched, results
+
+    sched, results = asyncio.run(main())
+    shed = [r for r in results if isinstance(r, Overloaded)]
+    assert [r.status_code for r in shed] == [429, 429]
+    assert sched.stats()["shed_429"] == 2
+
+
+def test_shed_503_on_queue_timeout():
+    """Test work that never gets a slot fails with 503."""
+    async def main():
+        sched = GenerationScheduler(_counting_generate([], delay=0.3), max_concurrent=1,
+                                    queue_timeout=0.05)
+        return await asyncio.gather(sched.submit("a"), sched.submit("b"), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert isinstance(results[1], Overloaded)
+    assert results[1].status_code == 503
+
+
+def test_cancelled_waiters_cancel_generation():
+    """Test a generation nobody waits for any more is cancelled."""
+    calls = []
+
+    async def main():
+        sched = GenerationScheduler(_counting_generate(calls, delay=1.0))
+        task = asyncio.create_task(sched.submit("slow"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.sleep(0.01)
+        return sched.stats()
+
+    stats = asyncio.run(main())
+    assert stats["running"] == 0
+    assert stats["in_flight"] == 0
+
+
+def test_cancelled_flight_is_not_joined():
+    """Test asking again after every waiter left starts a new generation."""
+    calls = []
+
+    async def main():
+        sched = GenerationScheduler(_counting_generate(calls, delay=0.1))
+        task = asyncio.create_task(sched.submit("q"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return await sched.submit("q"), sched.stats()
+
+    result, stats = asyncio.run(main())
+    assert result == "SELECT 'q';"
+    assert calls == ["q", "q"]
+    assert stats["deduplicated"] == 0 and stats["queue_depth"] == 0
+
+
+def test_query_endpoint_sheds_with_429(tmp_path, monkeypatch):
+    """Test the API maps a full backlog to HTTP 429."""
+    path = tmp_path / "test.db"
+    sqlite3.connect(path).close()
+    monkeypatch.setattr(CONFIG, "db_path", path)
+    monkeypatch.setattr(CONFIG, "cache_enabled", False)
+
+    class Full:
+        async def submit(self, question):
+            raise Overloaded(429, "LLM backlog full")
+
+    monkeypatch.setattr(scheduler, "get_scheduler", lambda: Full())
+    response = TestClient(app).post("/query", json={"question": "How many orders?"})
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "1"
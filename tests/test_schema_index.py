@@ -0,0 +1,67 @@
+import sqlite3
+import pytest
+from src.config.settings import CONFIG
+from src.sql import schema_index
+from src.sql.generator import SCHEMA, build_prompt
+from src.sql.schema_index import SchemaIndex, join_graph, relevant_schema, with_bridges
+
+
+@pytest.fixture
+def schema_db(tmp_path, monkeypatch):
+    """Project schema in a file database wired into CONFIG."""
+    path = tmp_path / "shop.db"
+    conn = sqlite3.connect(path)
+    with open("data/database/schema.sql") as f:
+        conn.executescript(f.read())
+    conn.execute("INSERT INTO payments VALUES ('o1', 1, 'credit_card', 1, 10.0)")
+    conn.commit()
+    monkeypatch.setattr(CONFIG, "db_path", path)
+    monkeypatch.setattr(schema_index, "_index", None)
+    yield conn
+    conn.close()
+
+
+def test_schema_matches_schema_sql():
+    """Test the hard-coded SCHEMA lists every column in schema.sql."""
+    conn = sqlite3.connect(":memory:")
+    with open("data/database/schema.sql") as f:
+        conn.executescript(f.read())
+    for (table,) in conn.execute("SELECT name FROM sqlite_master WHERE type='table'"):
+        for column in conn.execute(f"PRAGMA table_info({table})"):
+            assert column[1] in SCHEMA
+
+
+def test_bridge_tables(schema_db):
+    """Test tables needed to join the selection are added."""
+    graph = join_graph(SchemaIndex(schema_db).tables)
+    assert with_bridges(["customers", "products"], graph) == ["customers", "products", "orders", "order_items"]
+
+
+def test_select_relevant_tables(schema_db):
+    """Test a payment question retrieves the payments table."""
+    tables = SchemaIndex(schema_db).select("Combien de commandes par méthode de paiement ?", k=1)
+    assert tables == ["payments"]
+
+
+def test_index_persisted(schema_db, monkeypatch):
+    """Test vectors are reloaded from disk instead of re-embedded."""
+    SchemaIndex(schema_db)
+    assert CONFIG.schema_index_path.exists()
+    monkeypatch.setattr(schema_index.embeddings, "embed", lambda texts: pytest.fail("re-embedded"))
+    SchemaIndex(schema_db)
+
+
+def test_relevant_schema_in_prompt(schema_db, monkeypatch):
+    """Test the prompt only lists the retrieved tables."""
+    monkeypatch.setattr(CONFIG, "schema_top_k", 1)
+    prompt = build_prompt("Quelle est la note moyenne des avis ?")
+    assert "- reviews(" in prompt
+    assert "- payments(" not in prompt
+
+
+def test_fallback_without_database(tmp_path, monkeypatch):
+    """Test the full SCHEMA is used when there is no database."""
+    monkeypatch.setattr(CONFIG, "db_path", tmp_path / "missing.db")
+    monkeypatch.setattr(schema_index, "_index", None)
+    assert relevant_schema("How many orders?") is None
+    assert SCHEMA in build_prompt("How many orders?")
@@ -0,0 +1,114 @@
+import json
+import sqlite3
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from src.api import serialization
+from src.api.serialization import ARROW, COLUMNAR, json_body, negotiate
+from src.config.settings import CONFIG
+from src.sql import generator
+
+FRAME = pd.DataFrame({"city": ["sao paulo", None], "n": [1, 2], "v": [1.5, np.nan]})
+ENVELOPE = {"question": "q", "sql": "SELECT 1;", "success": True}
+
+
+def test_negotiate():
+    """Test format selection from the name and the Accept header."""
+    assert negotiate() == "records"
+    assert negotiate("*/*") == "records"
+    assert negotiate(f"{ARROW}, application/json;q=0.5") == "arrow"
+    assert negotiate(f"application/json;q=0.5, {COLUMNAR}") == "columnar"
+    assert negotiate(f"{ARROW};q=0", "columnar") == "columnar"
+    assert negotiate("text/html") is None
+    with pytest.raises(ValueError):
+        negotiate(fmt="xml")
+
+
+def test_records_body():
+    """Test records match to_dict, with NaN/None as null."""
+    body = json.loads(json_body(ENVELOPE, FRAME))
+    assert body["result"] == [{"city": "sao paulo", "n": 1, "v": 1.5}, {"city": None, "n": 2, "v": None}]
+    assert body["sql"] == "SELECT 1;"
+
+
+def test_columnar_body():
+    """Test column names plus one array per column."""
+    body = json.loads(json_body(ENVELOPE, FRAME, "columnar"))
+    assert body["columns"] == ["city", "n", "v"]
+    assert body["data"] == [["sao paulo", None], [1, 2], [1.5, None]]
+    assert body["row_count"] == 2
+
+
+def test_json_module_fallback(monkeypatch):
+    """Test the same output without orjson."""
+    expected = json.loads(json_body(ENVELOPE, FRAME, "columnar"))
+    monkeypatch.setattr(serialization, "orjson", None)
+    assert json.loads(json_body(ENVELOPE, FRAME, "columnar")) == expected
+    assert json.loads(json_body(ENVELOPE, FRAME))["result"][1] == {"city": None, "n": 2, "v": None}
+
+
+def test_arrow_body():
+    """Test the Arrow stream round-trips with the envelope as metadata."""
+    pa = pytest.importorskip("pyarrow")
+    table = pa.ipc.open_stream(serialization.arrow_body(ENVELOPE, FRAME)).read_all()
+    assert table.column_names == ["city", "n", "v"]
+    assert table.column("n").to_pylist() == [1, 2]
+    assert json.loads(table.schema.metadata[b"sql"]) == "SELECT 1;"
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """/query over a small database with a fixed generated query."""
+    from src.api.app import app
+    path = tmp_path / "ecommerce.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE numbers (n INTEGER, label TEXT)")
+    conn.executemany("INSERT INTO numbers VALUES (?, ?)", [(i, f"n{i}") for i in range(5)])
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(CONFIG, "db_path", path)
+    monkeypatch.setattr(CONFIG, "cache_enabled", False)
+
+    async def fake_generate(question, timeout=None):
+        return "SELECT n, label FROM numbers ORDER BY n;"
+    monkeypatch.setattr(generator, "agenerate_sql", fake_generate)
+    return TestClient(app)
+
+
+def test_query_formats(client):
+    """Test /query content negotiation."""
+    records = client.post("/query", json={"question": "Numbers?"})
+    assert records.headers["content-type"] == "application/json"
+    assert records.json()["result"][0] == {"n": 0, "label": "n0"}
+
+    columnar = client.post("/query", json={"question": "Numbers?"}, headers={"Accept": COLUMNAR})
+    assert columnar.headers["content-type"] == COLUMNAR
+    assert columnar.json()["data"] == [[0, 1, 2, 3, 4], ["n0", "n1", "n2", "n3", "n4"]]
+
+    by_name = client.post("/query", json={"question": "Numbers?", "format": "columnar", "limit": 2})
+    assert by_name.json()["data"] == [[0, 1], ["n0", "n1"]]
+    assert by_name.json()["next_cursor"]
+
+
+def test_query_arrow(client):
+    """Test Arrow IPC responses."""
+    pa = pytest.importorskip("pyarrow")
+    response = client.post("/query", json={"question": "Numbers?"}, headers={"Accept": ARROW})
+    assert response.headers["content-type"] == ARROW
+    assert pa.ipc.open_stream(response.content).read_all().num_rows == 5
+
+
+def test_query_format_errors(client):
+    """Test unknown formats (400) and unacceptable Accept headers (406)."""
+    assert client.post("/query", json={"question": "Numbers?", "format": "xml"}).status_code == 400
+    assert client.post("/query", json={"question": "Numbers?"}, headers={"Accept": "text/html"}).status_code == 406
+
+
+def test_query_openapi_lists_formats(client):
+    """Test the /query schema declares every media type it can return."""
+    from src.api.app import ColumnarSQLResponse
+    content = client.get("/openapi.json").json()["paths"]["/query"]["post"]["responses"]["200"]["content"]
+    assert set(content) == set(serialization.FORMATS.values())
+    columnar = json.loads(json_body(ENVELOPE, FRAME, "columnar"))
+    assert ColumnarSQLResponse(**columnar).row_count == 2
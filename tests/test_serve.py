@@ -0,0 +1,48 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+
+# A supervisor whose workers record their pid, then drain on SIGTERM
+SCRIPT = """
+import os, signal, sys, time
+from pathlib import Path
+from src.api.serve import Supervisor, bind
+
+out = Path(sys.argv[1])
+
+def worker(sock):
+    (out / f"{os.getpid()}.up").touch()
+    def drain(signum, frame):
+        time.sleep(0.2)  # an in-flight request
+        (out / f"{os.getpid()}.drained").touch()
+        sys.exit(0)
+    signal.signal(signal.SIGTERM, drain)
+    while True:
+        time.sleep(0.05)
+
+Supervisor(bind("127.0.0.1", 0), workers=2, target=worker, graceful_timeout=5).run()
+"""
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+def test_supervisor_restarts_and_drains(tmp_path):
+    """Test crashed workers are replaced and SIGTERM drains the rest."""
+    process = subprocess.Popen([sys.executable, "-c", SCRIPT, str(tmp_path)])
+
+    def up():
+        return sorted(int(p.stem) for p in tmp_path.glob("*.up"))
+
+    wait_for(lambda: len(up()) == 2)
+    os.kill(up()[0], signal.SIGKILL)
+    wait_for(lambda: len(up()) == 3)
+    process.send_signal(signal.SIGTERM)
+    assert process.wait(timeout=10) == 0
+    assert len(list(tmp_path.glob("*.drained"))) == 2
@@ -0,0 +1,58 @@
+import os
+import pandas as pd
+from src.config.settings import CONFIG
+from src.sql.correction import FixCache
+from src.sql.result_cache import ResultCache
+from src.sql.shared_cache import SharedCache, get_shared_cache
+
+
+def test_round_trip(tmp_path):
+    """Test values written by one instance are read by another."""
+    writer = SharedCache(tmp_path / "shared.db", max_bytes=10_000)
+    writer.put("a", b"alpha")
+    reader = SharedCache(tmp_path / "shared.db", max_bytes=10_000)
+    assert reader.get("a") == b"alpha"
+    assert reader.get("b") is None
+    assert reader.stats()["hits"] == 1 and reader.stats()["misses"] == 1
+
+
+def test_eviction(tmp_path):
+    """Test the oldest entries go once the byte budget is exceeded."""
+    cache = SharedCache(tmp_path / "shared.db", max_bytes=1_000)
+    for i in range(30):
+        cache.put(f"k{i}", bytes(90))
+    assert cache.stats()["bytes"] <= 1_000
+    assert cache.get("k0") is None
+    assert cache.get("k29") == bytes(90)
+    cache.put("big", bytes(500))
+    assert cache.get("big") is None
+
+
+def test_reopens_after_fork(tmp_path):
+    """Test a child process opens its own connection."""
+    cache = SharedCache(tmp_path / "shared.db", max_bytes=10_000)
+    cache.put("parent", b"1")
+    pid = os.fork()
+    if pid == 0:
+        cache.put("child", b"2")
+        os._exit(0 if cache.get("parent") == b"1" else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert cache.get("child") == b"2"
+
+
+def test_tiers_share_results(tmp_path, monkeypatch):
+    """Test one process's results and fixes are found by another's caches."""
+    monkeypatch.setattr(CONFIG, "db_path", tmp_path / "shop.db")
+    version = ("shop.db", None, None)
+    frame = pd.DataFrame({"city": ["recife", None], "n": [3, 4]})
+    ResultCache(shared=True).put("SELECT city, n FROM t", frame, version)
+    other = ResultCache(shared=True)
+    pd.testing.assert_frame_equal(other.get("select city, n from t", version), frame)
+    assert other.stats()["shared_hits"] == 1
+    assert other.get("SELECT city, n FROM t", ("shop.db", (1, 1), None)) is None
+    FixCache(shared=True).put("SELEC 1", "syntax error", "SELECT 1")
+    assert FixCache(shared=True).get("SELEC 1", "syntax error") == "SELECT 1"
+    monkeypatch.setattr(CONFIG, "shared_cache_enabled", False)
+    assert get_shared_cache() is None
+    assert ResultCache(shared=True).get("SELECT city, n FROM t", version) is None
@@ -0,0 +1,76 @@
+import time
+import pytest
+from fastapi.testclient import TestClient
+from src.api import startup
+from src.api.app import app
+from src.config.settings import CONFIG
+from src.evaluation.benchmark import gold_queries
+from src.evaluation.synthetic import build_database
+
+IMPORTTIME = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     _io
+import time:      3000 |       3120 |   pandas.core
+import time:       500 |       3620 | pandas
+"""
+
+
+@pytest.fixture
+def shop(tmp_path, monkeypatch):
+    """A small synthetic database, stub LLM backend."""
+    monkeypatch.setattr(CONFIG, "db_path", build_database(tmp_path / "olist.db", 200))
+    monkeypatch.setattr(CONFIG, "llm_backend", "stub")
+    return CONFIG.db_path
+
+
+def wait_ready(client, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        response = client.get("/ready")
+        if response.status_code == 200 or time.monotonic() > deadline:
+            return response
+        time.sleep(0.05)
+
+
+def test_ready_after_stages(shop):
+    """Test /ready turns 200 once every stage has finished, with timings."""
+    with TestClient(app) as client:
+        response = wait_ready(client)
+    assert response.status_code == 200
+    stages = response.json()["stages"]
+    assert [stages[s]["state"] for s in startup.STAGES] == ["done", "done", "skipped", "done"]
+    assert stages["page_cache"]["detail"] == {"queries": len(gold_queries()), "failed": 0}
+    assert all(stage["ms"] is not None for stage in stages.values())
+
+
+def test_not_ready_until_required_done(shop, monkeypatch):
+    """Test a failed required stage keeps /ready at 503; optional ones don't."""
+    def broken():
+        raise RuntimeError("no index")
+    monkeypatch.setattr(startup, "load_indexes", broken)
+    monkeypatch.setattr(CONFIG, "db_path", shop.parent / "missing.db")
+    with TestClient(app) as client:
+        assert client.get("/ready").status_code == 503
+        deadline = time.monotonic() + 30
+        while startup.get_startup().stages["page_cache"]["state"] in ("pending", "running"):
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+        report = client.get("/ready")
+    assert report.status_code == 503
+    indexes = report.json()["stages"]["indexes"]
+    assert (indexes["state"], indexes["detail"]) == ("failed", "no index")
+    assert report.json()["stages"]["page_cache"]["state"] == "failed"
+
+
+def test_parse_importtime():
+    """Test importtime lines become (module, self, cumulative, depth)."""
+    assert startup.parse_importtime(IMPORTTIME) == [
+        ("_io", 120, 120, 2), ("pandas.core", 3000, 3120, 1), ("pandas", 500, 3620, 0)
+    ]
+
+
+def test_profile_startup():
+    """Test the cold-start profile times a fresh interpreter."""
+    report = startup.profile_startup(top=3)
+    assert set(report["stages_ms"]) == {"imports", "indexes", "total"}
+    assert report["wall_ms"] >= report["stages_ms"]["total"]
+    assert len(report["packages"]) == 3 and report["modules"] > 100
@@ -0,0 +1,111 @@
+import asyncio
+import json
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from src.config.settings import CONFIG
+from src.sql import generator
+from src.sql.generator import SQLStreamExtractor
+
+
+def _ndjson(tokens):
+    lines = [json.dumps({"response": t, "done": False}) for t in tokens]
+    lines.append(json.dumps({"response": "", "done": True}))
+    return "\n".join(lines) + "\n"
+
+
+@pytest.fixture
+def mock_stream(monkeypatch):
+    """Ollama stub that streams a statement followed by chatter."""
+    tokens = ["SELECT", " COUNT(*)", " FROM", " orders", ";", " This", " counts", " orders."]
+    
+    def handler(request):
+        return httpx.Response(200, text=_ndjson(tokens))
+    monkeypatch.setattr(generator, "_async_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    yield
+    monkeypatch.setattr(generator, "_async_client", None)
+
+
+def test_extractor_stops_at_semicolon():
+    """Test cut-off after the first statement."""
+    extractor = SQLStreamExtractor()
+    assert extractor.feed("SELECT * FROM orders") is False
+    assert extractor.feed(";") is True
+    assert extractor.sql == "SELECT * FROM orders;"
+
+
+def test_extractor_ignores_semicolon_in_string():
+    """Test ';' inside a literal does not end the statement."""
+    extractor = SQLStreamExtractor()
+    assert extractor.feed("SELECT * FROM orders WHERE order_status = 'a;b'") is False
+
+
+def test_extractor_fence():
+    """Test cut-off on a closed sql fence."""
+    extractor = SQLStreamExtractor()
+    assert extractor.feed("Here is the query:\n```sql\nSELECT 1\n") is False
+    assert extractor.feed("```") is True
+    assert extractor.sql == "SELECT 1"
+
+
+def test_extractor_prose_waits():
+    """Test prose with ';' before the SQL is not a cut-off."""
+    extractor = SQLStreamExtractor()
+    assert extractor.feed("Sure; here you go:") is False
+
+
+def test_acall_llm_stream_cuts_off(mock_stream):
+    """Test streaming call stops before the trailing explanation."""
+    result = asyncio.run(generator.acall_llm_stream("prompt"))
+    assert result == "SELECT COUNT(*) FROM orders;"
+
+
+def test_query_stream_endpoint(mock_stream, tmp_path, monkeypatch):
+    """Test SSE endpoint emits partial SQL then rows."""
+    import sqlite3
+    from src.api.app import app
+    
+    db = tmp_path / "test.db"
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE orders (order_id TEXT)")
+    conn.execute("INSERT INTO orders VALUES ('o1')")
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(CONFIG, "db_path", db)
+    monkeypatch.setattr(CONFIG, "cache_enabled", False)
+    
+    response = TestClient(app).get("/query/stream", params={"question": "How many orders?"})
+    events = [line[len("event: "):] for line in response.text.splitlines() if line.startswith("event: ")]
+    assert events[0] == "sql_partial"
+    assert events[-3:] == ["sql", "rows", "done"]
+
+
+def test_astream_sql_deadline(monkeypatch):
+    """Test a stalled stream fails at the LLM deadline instead of hanging."""
+    async def stalled(prompt):
+        yield "SELECT"
+        await asyncio.sleep(10)
+        yield " 1;"
+
+    monkeypatch.setattr(generator, "astream_llm", stalled)
+
+    async def main():
+        return [partial async for partial in generator.astream_sql("q", timeout=0.05)]
+
+    with pytest.raises(TimeoutError, match="deadline"):
+        asyncio.run(main())
+
+
+def test_query_stream_is_admitted_by_scheduler(monkeypatch):
+    """Test /query/stream is shed like /query when the LLM backlog is full."""
+    from src.api.app import app
+    from src.sql import scheduler
+
+    class Full:
+        def slot(self):
+            raise scheduler.Overloaded(429, "LLM backlog full")
+
+    monkeypatch.setattr(CONFIG, "cache_enabled", False)
+    monkeypatch.setattr(scheduler, "get_scheduler", lambda: Full())
+    response = TestClient(app).get("/query/stream", params={"question": "How many orders?"})
+    assert 'event: error\ndata: {"error":"LLM backlog full","status":429}' in response.text
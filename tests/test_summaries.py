@@ -0,0 +1,114 @@
+import sqlite3
+import pytest
+from src.sql.executor import execute_sql, get_schema
+from src.sql.summaries import SummaryRegistry
+
+REVENUE = (
+    "SELECT p.product_category, SUM(oi.price) FROM order_items oi "
+    "JOIN products p ON oi.product_id = p.product_id GROUP BY p.product_category"
+)
+
+
+@pytest.fixture
+def shop_db():
+    """Project schema with two categories."""
+    conn = sqlite3.connect(":memory:")
+    with open("data/database/schema.sql") as f:
+        conn.executescript(f.read())
+    conn.execute("INSERT INTO products VALUES ('p1', 'books', 1, 1, 1, 1), ('p2', 'toys', 1, 1, 1, 1)")
+    conn.execute("INSERT INTO order_items VALUES ('o1', 1, 'p1', 10.0, 1.0), ('o2', 1, 'p2', 5.0, 1.0), ('o3', 1, 'p1', 2.5, 1.0)")
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def registry(shop_db):
+    registry = SummaryRegistry({"mv_revenue": REVENUE})
+    registry.refresh(shop_db)
+    return registry
+
+
+def test_rewrite_matching_query(shop_db, registry):
+    """Test alias-independent matching through the AST."""
+    sql = (
+        "SELECT prod.product_category, SUM(items.price) as revenue FROM products prod "
+        "JOIN order_items items ON prod.product_id = items.product_id "
+        "GROUP BY prod.product_category ORDER BY revenue DESC"
+    )
+    rewritten = registry.rewrite(sql, shop_db)
+    assert "mv_revenue" in rewritten
+    assert shop_db.execute(rewritten).fetchall() == shop_db.execute(sql).fetchall()
+
+
+def test_rewrite_keeps_other_queries(shop_db, registry):
+    """Test different shapes are left alone."""
+    sql = (
+        "SELECT p.product_category, SUM(oi.freight_value) as freight FROM order_items oi "
+        "JOIN products p ON oi.product_id = p.product_id GROUP BY p.product_category"
+    )
+    assert registry.rewrite(sql, shop_db) == sql
+    filtered = (
+        "SELECT p.product_category, SUM(oi.price) as revenue FROM order_items oi "
+        "JOIN products p ON oi.product_id = p.product_id WHERE oi.price > 3 GROUP BY p.product_category"
+    )
+    assert registry.rewrite(filtered, shop_db) == filtered
+
+
+def test_stale_summary_not_used(shop_db, registry):
+    """Test source changes disable the summary until refreshed."""
+    sql = REVENUE.replace("SUM(oi.price)", "SUM(oi.price) as revenue")
+    shop_db.execute("INSERT INTO order_items VALUES ('o4', 1, 'p2', 1.0, 1.0)")
+    shop_db.commit()
+    assert registry.rewrite(sql, shop_db) == sql
+    assert registry.refresh(shop_db) == ["mv_revenue"]
+    assert registry.refresh(shop_db) == []
+    assert "mv_revenue" in registry.rewrite(sql, shop_db)
+
+
+def _rows(conn, sql):
+    return sorted(tuple(round(v, 6) if isinstance(v, float) else v for v in r) for r in conn.execute(sql))
+
+
+@pytest.mark.parametrize("measures", [
+    "SUM(oi.price) AS s, AVG(oi.price) AS a, MIN(oi.price) AS lo, COUNT(*) AS n",
+    "AVG(oi.price) AS a, COUNT(DISTINCT oi.order_id) AS orders",
+])
+def test_incremental_refresh_matches_rebuild(shop_db, measures):
+    """Test appended rows are merged in (or their groups recomputed) to the rebuilt result."""
+    sql = REVENUE.replace("SUM(oi.price)", measures)
+    registry = SummaryRegistry({"mv_revenue": sql})
+    registry.refresh(shop_db)
+    shop_db.execute("INSERT INTO products VALUES ('p3', 'games', 1, 1, 1, 1)")
+    shop_db.execute("INSERT INTO order_items VALUES ('o1', 2, 'p3', 7.0, 1.0), ('o4', 1, 'p2', 1.0, 1.0)")
+    shop_db.commit()
+    assert registry.refresh(shop_db) == ["mv_revenue"]
+    merged = _rows(shop_db, "SELECT * FROM mv_revenue")
+    registry.refresh(shop_db, force=True)
+    assert merged == _rows(shop_db, "SELECT * FROM mv_revenue")
+    assert "mv_revenue" in registry.rewrite(sql, shop_db)
+    assert _rows(shop_db, registry.rewrite(sql, shop_db)) == _rows(shop_db, sql)
+
+
+def test_update_makes_summary_stale(shop_db, registry):
+    """Test an UPDATE, which keeps row counts and rowids, still disables the summary."""
+    sql = REVENUE.replace("SUM(oi.price)", "SUM(oi.price) as revenue")
+    shop_db.execute("UPDATE order_items SET price = 100.0 WHERE order_id = 'o1'")
+    shop_db.commit()
+    assert registry.rewrite(sql, shop_db) == sql
+    assert registry.refresh(shop_db) == ["mv_revenue"]
+    assert _rows(shop_db, registry.rewrite(sql, shop_db)) == _rows(shop_db, sql)
+
+
+def test_executor_uses_summary(shop_db, monkeypatch):
+    """Test execute_sql returns identical results through the summary."""
+    from src.sql import summaries
+    
+    registry = SummaryRegistry({"mv_revenue": REVENUE})
+    registry.refresh(shop_db)
+    sql = REVENUE.replace("SUM(oi.price)", "ROUND(SUM(oi.price), 1) as revenue") + " ORDER BY revenue"
+    monkeypatch.setattr(summaries, "_registry", registry)
+    success, result, error = execute_sql(sql, shop_db)
+    assert success is True
+    assert result["revenue"].tolist() == [5.0, 12.5]
+    assert "_summary_meta" not in get_schema(shop_db)
@@ -0,0 +1,104 @@
+import sqlite3
+import pytest
+from fastapi.testclient import TestClient
+from src.config.settings import CONFIG
+from src.sql import backends, telemetry
+from src.sql.backends import StubBackend
+from src.sql.telemetry import Histogram, Registry, request_trace, server_timing, span
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry(monkeypatch):
+    """Isolate the metrics registry per test."""
+    monkeypatch.setattr(telemetry, "REGISTRY", Registry(window=100))
+
+
+def test_histogram_buckets_and_quantiles():
+    """Test cumulative buckets and window quantiles."""
+    h = Histogram((1, 10), window=100)
+    for value in range(1, 101):
+        h.observe(value)
+    assert h.counts == [1, 10]
+    assert h.count == 100 and h.sum == 5050
+    assert h.quantile(0.5) == 51
+    assert h.quantile(0.99) == 100
+
+
+def test_span_records_histogram_and_trace():
+    """Test spans feed both the registry and the request trace."""
+    with request_trace() as trace:
+        with span("llm"):
+            pass
+        with span("llm"):
+            pass
+    assert telemetry.REGISTRY.get("stage_seconds", "llm").count == 2
+    assert set(trace) == {"llm"}
+    with span("llm"):
+        pass
+    assert telemetry.REGISTRY.get("stage_seconds", "llm").count == 3
+
+
+def test_server_timing_format():
+    """Test the Server-Timing header value."""
+    assert server_timing({"llm": 812.345, "sqlite": 4.1}) == "llm;dur=812.35, sqlite;dur=4.10"
+
+
+def test_render_prometheus():
+    """Test histogram, quantile and gauge lines."""
+    telemetry.observe("stage_seconds", 0.02, "sqlite")
+    telemetry.observe("rows_returned", 5)
+    text = telemetry.REGISTRY.render({"query_cache_hit_ratio": ("Hit ratio.", 0.5)})
+    assert "# TYPE texttosql_stage_seconds histogram" in text
+    assert 'texttosql_stage_seconds_bucket{stage="sqlite",le="0.025"} 1' in text
+    assert 'texttosql_stage_seconds_bucket{stage="sqlite",le="0.01"} 0' in text
+    assert 'texttosql_stage_seconds_count{stage="sqlite"} 1' in text
+    assert 'texttosql_stage_seconds_recent{stage="sqlite",quantile="0.95"} 0.02' in text
+    assert 'texttosql_rows_returned_bucket{le="10"} 1' in text
+    assert "texttosql_query_cache_hit_ratio 0.5" in text
+
+
+def test_metrics_disabled(monkeypatch):
+    """Test observations are dropped when metrics are off."""
+    monkeypatch.setattr(CONFIG, "metrics_enabled", False)
+    with span("llm"):
+        pass
+    assert telemetry.REGISTRY.get("stage_seconds", "llm") is None
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    """/query on a small database with the stub LLM backend."""
+    from src.api.app import app
+    path = tmp_path / "ecommerce.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE orders (order_id TEXT)")
+    conn.executemany("INSERT INTO orders VALUES (?)", [("o1",), ("o2",)])
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(CONFIG, "db_path", path)
+    monkeypatch.setattr(CONFIG, "cache_enabled", False)
+    monkeypatch.setattr(CONFIG, "result_cache_enabled", False)
+    monkeypatch.setattr(CONFIG, "llm_backend", "stub")
+    monkeypatch.setattr(backends, "_backend_name", "stub")
+    monkeypatch.setattr(backends, "_backend", StubBackend({"list orders": "SELECT order_id FROM orders;"}, 0, 0))
+    return TestClient(app)
+
+
+def test_debug_header_breakdown(api):
+    """Test X-Debug-Timing returns every stage of the request."""
+    response = api.post("/query", json={"question": "List orders"}, headers={"X-Debug-Timing": "1"})
+    assert response.json()["result"] == [{"order_id": "o1"}, {"order_id": "o2"}]
+    stages = {part.split(";")[0] for part in response.headers["server-timing"].split(", ")}
+    assert {"cache_lookup", "generate", "prompt_build", "llm", "extract_sql", "validate",
+            "sqlite", "dataframe", "serialize", "total"} <= stages
+    assert "server-timing" not in api.post("/query", json={"question": "List orders"}).headers
+
+
+def test_metrics_endpoint(api):
+    """Test /metrics serves the recorded stages."""
+    api.post("/query", json={"question": "List orders"})
+    response = api.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'texttosql_stage_seconds_count{stage="total"} 1' in response.text
+    assert 'texttosql_stage_seconds_recent{stage="llm",quantile="0.99"}' in response.text
+    assert 'texttosql_rows_returned_count 1' in response.text
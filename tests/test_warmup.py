@@ -0,0 +1,95 @@
+import json
+import time
+from collections import deque
+from unittest.mock import MagicMock
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from src.api.app import app
+from src.config.settings import CONFIG
+from src.sql import generator
+
+OLLAMA_DONE = {
+    "response": "SELECT 1;",
+    "done": True,
+    "context": [1, 2, 3, 4],
+    "eval_count": 1,
+    "load_duration": 2_000_000_000,
+    "prompt_eval_count": 60,
+    "prompt_eval_duration": 300_000_000,
+    "eval_duration": 10_000_000,
+    "total_duration": 2_400_000_000,
+}
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    """Isolate warm-up state and timings per test."""
+    monkeypatch.setattr(generator, "_prefix_context", None)
+    monkeypatch.setattr(generator, "_warmup", {})
+    monkeypatch.setattr(generator, "_timings", deque(maxlen=10))
+    monkeypatch.setattr(generator, "_first_token", deque(maxlen=10))
+
+
+def _post(monkeypatch, data):
+    response = MagicMock()
+    response.json.return_value = data
+    post = MagicMock(return_value=response)
+    monkeypatch.setattr(generator.requests, "post", post)
+    return post
+
+
+def test_prompt_starts_with_static_prefix():
+    """Test every prompt shares the static prefix."""
+    assert generator.build_prompt("How many orders?").startswith(generator.PROMPT_PREFIX)
+    assert "{" not in generator.PROMPT_PREFIX
+
+
+def test_payload_keep_alive():
+    """Test requests ask Ollama to keep the model loaded."""
+    assert generator._payload("x")["keep_alive"] == CONFIG.llm_keep_alive
+
+
+def test_warm_up_records_timings(monkeypatch):
+    """Test warm-up prefills the prefix and reports Ollama timings."""
+    post = _post(monkeypatch, OLLAMA_DONE)
+    timings = generator.warm_up()
+    assert post.call_args.kwargs["json"]["prompt"] == generator.PROMPT_PREFIX
+    assert timings["load_ms"] == 2000
+    assert timings["prompt_tokens"] == 60
+    assert generator.llm_timings()["warmup"]["prompt_eval_ms"] == 300
+
+
+def test_context_reuse(monkeypatch):
+    """Test context mode sends only the suffix after the prefilled prefix."""
+    monkeypatch.setattr(CONFIG, "llm_reuse_context", True)
+    _post(monkeypatch, OLLAMA_DONE)
+    generator.warm_up()
+    payload = generator._payload(generator.PROMPT_PREFIX + "\nQ: x\nSQL:")
+    assert payload["context"] == [1, 2, 3]
+    assert payload["raw"] is True
+    assert payload["prompt"] == "\nQ: x\nSQL:"
+
+
+def test_call_llm_records_request_timing(monkeypatch):
+    """Test per-request prompt-eval timings are kept."""
+    _post(monkeypatch, OLLAMA_DONE)
+    generator.call_llm("prompt")
+    stats = generator.llm_timings()
+    assert stats["requests"] == 1
+    assert stats["avg"]["prompt_eval_ms"] == 300
+
+
+def test_api_startup_warm_up(monkeypatch):
+    """Test the API warms the model up on startup."""
+    def handler(request):
+        assert json.loads(request.content)["prompt"] == generator.PROMPT_PREFIX
+        return httpx.Response(200, json=OLLAMA_DONE)
+    monkeypatch.setattr(generator, "_async_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    with TestClient(app) as client:
+        for _ in range(50):
+            stats = client.get("/llm/stats").json()
+            if stats["warmup"]:
+                break
+            time.sleep(0.01)
+    assert stats["warmup"]["prompt_tokens"] == 60